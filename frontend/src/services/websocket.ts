@@ -23,7 +23,7 @@ class WebSocketService {
         });
 
         // Register for all expected events
-        ['sensor:frame', 'anomaly:detected', 'entity:tracking', 'session:stats', 'node:status']
+        ['sensor:frame', 'anomaly:detected', 'anomaly:updated', 'anomaly:closed', 'entity:tracking', 'session:stats', 'node:status']
             .forEach(event => {
                 this.socket!.on(event, (data: any) => {
                     const cbs = this.callbacks.get(event) || [];
@@ -16,24 +16,38 @@ export const AlertPanel = () => {
         // Connect if not already (MeshView also connects, but idempotent)
         wsService.connect(import.meta.env.VITE_WS_URL || 'https://motiongrid-api-rrsyyeqnbq-uc.a.run.app');
 
-        const unsubscribe = wsService.on('anomaly:detected', (data: any) => {
-            console.log('Anomaly received:', data);
+        // Python sends: { anomalyId, headline, severity, occurredAt, lastSeenAt, ... }
+        // anomalyId is stable for an incident: OPEN and UPDATE upsert it, CLOSE removes it
+        const toAlert = (data: any): Anomaly => ({
+            id: data.anomalyId || 'unknown',
+            headline: data.headline || 'Unknown Anomaly',
+            severity: data.severity || 'LOW',
+            // occurredAt is ISO string now
+            time: data.occurredAt ? new Date(data.occurredAt).toLocaleTimeString() : new Date().toLocaleTimeString()
+        });
 
-            // Map Python payload to frontend model
-            // Python sends: { anomalyId, headline, severity, occurredAt, ... }
-            const newAlert: Anomaly = {
-                id: data.anomalyId || 'unknown',
-                headline: data.headline || 'Unknown Anomaly',
-                severity: data.severity || 'LOW',
-                // occurredAt is ISO string now
-                time: data.occurredAt ? new Date(data.occurredAt).toLocaleTimeString() : new Date().toLocaleTimeString()
-            };
+        const onDetected = (data: any) => {
+            const alert = toAlert(data);
+            setAlerts(prev => [alert, ...prev.filter(a => a.id !== alert.id)].slice(0, 50)); // Keep last 50
+        };
+        const onUpdated = (data: any) => {
+            const alert = toAlert(data);
+            setAlerts(prev => prev.some(a => a.id === alert.id)
+                ? prev.map(a => a.id === alert.id ? alert : a)
+                : [alert, ...prev].slice(0, 50));
+        };
+        const onClosed = (data: any) => {
+            setAlerts(prev => prev.filter(a => a.id !== data.anomalyId));
+        };
 
-            setAlerts(prev => [newAlert, ...prev].slice(0, 50)); // Keep last 50
-        });
+        wsService.on('anomaly:detected', onDetected);
+        wsService.on('anomaly:updated', onUpdated);
+        wsService.on('anomaly:closed', onClosed);
 
         return () => {
-            // Unsubscribe logic if wsService supports it, or just let it exist
+            wsService.off('anomaly:detected', onDetected);
+            wsService.off('anomaly:updated', onUpdated);
+            wsService.off('anomaly:closed', onClosed);
         };
     }, []);
 
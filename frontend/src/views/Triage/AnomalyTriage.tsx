@@ -17,23 +17,46 @@ export const AnomalyTriage = () => {
     const [investigating] = useState<TriageTask[]>([
         { id: 'A-099', title: 'Crowd Density Warning', time: '09:30 AM', severity: 'MEDIUM' },
     ]);
-    const [resolved] = useState<TriageTask[]>([
+    const [resolved, setResolved] = useState<TriageTask[]>([
         { id: 'A-055', title: 'Sensor Dropout', time: 'Yesterday', severity: 'LOW' },
     ]);
 
     useEffect(() => {
         wsService.connect(import.meta.env.VITE_WS_URL || 'https://motiongrid-api-rrsyyeqnbq-uc.a.run.app');
 
-        const unsubscribe = wsService.on('anomaly:detected', (data: any) => {
-            const newTask: TriageTask = {
-                id: data.anomalyId || 'unknown',
-                title: data.headline || 'Unknown Anomaly',
-                severity: data.severity || 'LOW',
-                time: data.occurredAt ? new Date(data.occurredAt).toLocaleTimeString() : new Date().toLocaleTimeString()
-            };
-            setNewIncidents(prev => [newTask, ...prev]);
+        // anomalyId is stable for an incident: OPEN and UPDATE upsert it, CLOSE moves it to Resolved
+        const toTask = (data: any): TriageTask => ({
+            id: data.anomalyId || 'unknown',
+            title: data.headline || 'Unknown Anomaly',
+            severity: data.severity || 'LOW',
+            time: data.occurredAt ? new Date(data.occurredAt).toLocaleTimeString() : new Date().toLocaleTimeString()
         });
-        return () => { };
+
+        const onDetected = (data: any) => {
+            const task = toTask(data);
+            setNewIncidents(prev => [task, ...prev.filter(t => t.id !== task.id)]);
+        };
+        const onUpdated = (data: any) => {
+            const task = toTask(data);
+            setNewIncidents(prev => prev.some(t => t.id === task.id)
+                ? prev.map(t => t.id === task.id ? task : t)
+                : [task, ...prev]);
+        };
+        const onClosed = (data: any) => {
+            const task = toTask(data);
+            setNewIncidents(prev => prev.filter(t => t.id !== task.id));
+            setResolved(prev => [task, ...prev.filter(t => t.id !== task.id)]);
+        };
+
+        wsService.on('anomaly:detected', onDetected);
+        wsService.on('anomaly:updated', onUpdated);
+        wsService.on('anomaly:closed', onClosed);
+
+        return () => {
+            wsService.off('anomaly:detected', onDetected);
+            wsService.off('anomaly:updated', onUpdated);
+            wsService.off('anomaly:closed', onClosed);
+        };
     }, []);
 
     return (
@@ -13,6 +13,7 @@ import helmet from 'helmet';
 import mongoose from 'mongoose';
 import { connectDB } from './database';
 import { socketService } from './services/SocketService';
+import { entityWireDecoder } from './services/EntityWireDecoder';
 import { authenticate as authMiddleware } from './middleware/auth';
 import rateLimit from 'express-rate-limit';
 
@@ -64,7 +65,7 @@ app.use(cors({
 
 // 3. Helmet headers
 app.use(helmet());
-app.use(express.json());
+app.use(express.json({ limit: process.env.JSON_BODY_LIMIT || '10mb' }));
 
 // Basic health check (Always available)
 app.get('/health', (req, res) => {
@@ -93,12 +94,49 @@ app.post('/internal/entity-update', async (req, res) => {
     res.json({ status: 'ok' });
 });
 
+// Binary entity updates: a JSON schema handshake followed by delta-encoded frames
+app.post('/internal/entity-schema', async (req, res) => {
+    const { sessionId, ...schema } = req.body;
+    entityWireDecoder.applySchema(sessionId, schema);
+    res.json({ status: 'ok', schemaId: schema.schemaId });
+});
+
+app.post('/internal/entity-update/binary', express.raw({ type: 'application/octet-stream', limit: '10mb' }), async (req, res) => {
+    const sessionId = (req.query.sessionId as string) || null;
+    try {
+        const { entities, stats, sentAt } = entityWireDecoder.decode(sessionId, req.body);
+        const latencyMs = sentAt ? Math.round((Date.now() / 1000 - sentAt) * 1000) : 0;
+        socketService.emit('entity:tracking', { entities, stats, latencyMs }, sessionId ? `session:${sessionId}` : undefined);
+        res.json({ status: 'ok' });
+    } catch (err: any) {
+        // 409 tells the simulation to resend its schema
+        res.status(409).json({ status: 'error', message: err.message });
+    }
+});
+
 app.post('/internal/anomaly', async (req, res) => {
     const { sessionId, anomaly } = req.body;
     socketService.emit('anomaly:detected', anomaly, sessionId ? `session:${sessionId}` : undefined);
     res.json({ status: 'ok' });
 });
 
+// Incident events batched by the simulation's background publisher:
+// OPEN (or no event field) -> anomaly:detected, UPDATE -> anomaly:updated, CLOSE -> anomaly:closed
+const ANOMALY_EVENTS: Record<string, string> = {
+    OPEN: 'anomaly:detected',
+    UPDATE: 'anomaly:updated',
+    CLOSE: 'anomaly:closed'
+};
+
+app.post('/internal/anomalies', async (req, res) => {
+    const { sessionId, anomalies } = req.body;
+    const room = sessionId ? `session:${sessionId}` : undefined;
+    for (const anomaly of anomalies || []) {
+        socketService.emit(ANOMALY_EVENTS[anomaly.event] || 'anomaly:detected', anomaly, room);
+    }
+    res.json({ status: 'ok', count: (anomalies || []).length });
+});
+
 const startServer = async () => {
     try {
         console.log('[STARTUP] Connecting to database...');
@@ -54,6 +54,29 @@ router.get('/:id/stream', async (req, res) => {
     }
 });
 
+router.get('/:id/lidar/stream', async (req, res) => {
+    try {
+        const nodeId = req.params.id;
+        const simulationUrl = process.env.SIMULATION_API_URL || 'http://localhost:8000';
+
+        // lod / voxel / codec / rate are chosen per client and passed through
+        const { lod, voxel, codec, rate } = req.query;
+        const response = await axios({
+            method: 'get',
+            url: `${simulationUrl}/nodes/${nodeId}/lidar/stream`,
+            params: { lod, voxel, codec, rate },
+            responseType: 'stream'
+        });
+
+        // Length-prefixed binary point cloud messages
+        res.setHeader('Content-Type', response.headers['content-type']);
+        response.data.pipe(res);
+        req.on('close', () => response.data.destroy());
+    } catch (err: any) {
+        res.status(err.response?.status || 503).send('LIDAR stream unavailable');
+    }
+});
+
 router.post('/:id/calibrate', async (req, res) => {
     try {
         const nodeId = req.params.id;
@@ -0,0 +1,103 @@
+// Decoder for the simulation's binary entity-update format
+// (see simulation/src/core/wire_format.py for the layout).
+
+const WIRE_MAGIC = 'MIGE';
+const WIRE_VERSION = 1;
+const FLAG_KEYFRAME = 0x01;
+const FLAG_WIDE_INDEX = 0x02;
+const HEADER_SIZE = 40; // struct '<4sBBHIIddfI'
+
+interface EntitySchema {
+    schemaId: number;
+    positionResolution: number;
+    entities: any[];
+}
+
+interface DecoderState {
+    schema: EntitySchema;
+    positions: Float64Array;
+    velocities: Float64Array;
+}
+
+function halfToFloat(bits: number): number {
+    const sign = bits & 0x8000 ? -1 : 1;
+    const exponent = (bits >> 10) & 0x1f;
+    const fraction = bits & 0x03ff;
+    if (exponent === 0) return sign * Math.pow(2, -14) * (fraction / 1024);
+    if (exponent === 0x1f) return fraction ? NaN : sign * Infinity;
+    return sign * Math.pow(2, exponent - 15) * (1 + fraction / 1024);
+}
+
+class EntityWireDecoder {
+    // Keyed by session id ('' for the unmanaged default session)
+    private states = new Map<string, DecoderState>();
+
+    applySchema(sessionId: string | null, schema: EntitySchema) {
+        const count = schema.entities.length;
+        this.states.set(sessionId || '', {
+            schema,
+            positions: new Float64Array(count * 3),
+            velocities: new Float64Array(count * 3)
+        });
+    }
+
+    decode(sessionId: string | null, buffer: Buffer) {
+        const state = this.states.get(sessionId || '');
+        const view = new DataView(buffer.buffer, buffer.byteOffset, buffer.byteLength);
+
+        if (buffer.toString('ascii', 0, 4) !== WIRE_MAGIC || view.getUint8(4) !== WIRE_VERSION) {
+            throw new Error('Not an entity update frame');
+        }
+        const flags = view.getUint8(5);
+        const schemaId = view.getUint32(8, true);
+        if (!state || state.schema.schemaId !== schemaId) {
+            throw new Error(`Unknown schema ${schemaId}`);
+        }
+
+        const frame = view.getUint32(12, true);
+        const time = view.getFloat64(16, true);
+        const sentAt = view.getFloat64(24, true);
+        const fps = view.getFloat32(32, true);
+        const count = view.getUint32(36, true);
+
+        const wide = (flags & FLAG_WIDE_INDEX) !== 0;
+        const indexSize = wide ? 4 : 2;
+        let posOffset = HEADER_SIZE + count * indexSize;
+        let velOffset = posOffset + count * 6;
+        const resolution = state.schema.positionResolution;
+
+        for (let i = 0; i < count; i++) {
+            const offset = HEADER_SIZE + i * indexSize;
+            const index = wide ? view.getUint32(offset, true) : view.getUint16(offset, true);
+            for (let axis = 0; axis < 3; axis++) {
+                state.positions[index * 3 + axis] = view.getInt16(posOffset, true) * resolution;
+                state.velocities[index * 3 + axis] = halfToFloat(view.getUint16(velOffset, true));
+                posOffset += 2;
+                velOffset += 2;
+            }
+        }
+
+        const entities = state.schema.entities.map((attrs, index) => ({
+            ...attrs,
+            position: {
+                x: state.positions[index * 3],
+                y: state.positions[index * 3 + 1],
+                z: state.positions[index * 3 + 2]
+            },
+            velocity: {
+                x: state.velocities[index * 3],
+                y: state.velocities[index * 3 + 1],
+                z: state.velocities[index * 3 + 2]
+            }
+        }));
+
+        return {
+            stats: { fps, frame, time },
+            sentAt,
+            keyframe: (flags & FLAG_KEYFRAME) !== 0,
+            entities
+        };
+    }
+}
+
+export const entityWireDecoder = new EntityWireDecoder();
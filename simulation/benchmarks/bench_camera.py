@@ -0,0 +1,53 @@
+"""
+CameraSimulator render benchmark: legacy vs fast path at 1080p and 720p.
+
+Run from the simulation directory:
+    python -m benchmarks.bench_camera [--entities 50] [--frames 60]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.nodes.camera_simulator import CameraSimulator, RESOLUTION_PRESETS
+
+
+def make_entities(count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return [
+        {'id': f'E{i}', 'position': {'x': float(x), 'y': float(y), 'z': 0.0}}
+        for i, (x, y) in enumerate(rng.uniform(-15, 15, size=(count, 2)))
+    ]
+
+
+def bench(preset: str, mode: str, entities, frames: int) -> float:
+    """Mean milliseconds per rendered + encoded frame."""
+    config = RESOLUTION_PRESETS[preset]
+    camera = CameraSimulator(
+        resolution={'width': config['width'], 'height': config['height']},
+        fps=30, fov=90, render_mode=mode, jpeg_quality=config['jpegQuality']
+    )
+    camera.render(entities, timestamp=0.0)  # Warm caches
+
+    start = time.perf_counter()
+    for i in range(1, frames + 1):
+        camera.render(entities, timestamp=i * camera.frame_interval * 1.01)
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entities', type=int, default=50)
+    parser.add_argument('--frames', type=int, default=60)
+    args = parser.parse_args()
+
+    entities = make_entities(args.entities)
+    print(f"{'preset':<8}{'legacy ms':>12}{'fast ms':>12}{'speedup':>10}")
+    for preset in ('1080p', '720p'):
+        legacy = bench(preset, 'legacy', entities, args.frames)
+        fast = bench(preset, 'fast', entities, args.frames)
+        print(f"{preset:<8}{legacy:>12.2f}{fast:>12.2f}{legacy / fast:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+LidarSimulator scan benchmark: the original per-call allocation scan vs the
+pooled scan (copy and view modes), across entity counts.
+
+Run from the simulation directory:
+    python -m benchmarks.bench_lidar [--entities 10 100 1000] [--scans 100]
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from src.nodes.lidar_simulator import LidarSimulator
+from .bench_camera import make_entities
+
+
+def reference_scan(entities):
+    """The original scan: meshgrid, per-entity RNG draws and vstack/hstack per call."""
+    x = np.linspace(-20, 20, 100)
+    y = np.linspace(-20, 20, 100)
+    X, Y = np.meshgrid(x, y)
+    Z = np.zeros_like(X)
+    ground_points = np.stack([X.flatten(), Y.flatten(), Z.flatten()], axis=1)
+    entity_points = []
+    for entity in entities:
+        pos = entity.get('position', {'x': 0, 'y': 0, 'z': 0})
+        entity_points.append(np.random.normal([pos['x'], pos['y'], pos['z']], 0.2, (50, 3)))
+    points = np.vstack([ground_points] + entity_points) if entity_points else ground_points
+    intensities = np.random.rand(len(points), 1)
+    return np.hstack([points, intensities]).astype(np.float32)
+
+
+def bench(scan, entities, scans: int):
+    """(mean ms per scan, peak KB allocated during one scan)."""
+    scan(entities)  # Warm buffers
+    start = time.perf_counter()
+    for _ in range(scans):
+        scan(entities)
+    elapsed = (time.perf_counter() - start) * 1000 / scans
+
+    tracemalloc.start()
+    scan(entities)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entities', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--scans', type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'entities':<10}{'mode':<10}{'ms/scan':>10}{'peak KB':>10}")
+    for count in args.entities:
+        entities = make_entities(count)
+        pooled = LidarSimulator('VLP-16', 16, 100, return_views=False)
+        views = LidarSimulator('VLP-16', 16, 100)
+        modes = (
+            ('original', reference_scan),
+            ('copy', lambda e: pooled.scan(e, 0.0)),
+            ('views', lambda e: views.scan(e, 0.0)),
+        )
+        for name, scan in modes:
+            ms, peak = bench(scan, entities, args.scans)
+            print(f"{count:<10}{name:<10}{ms:>10.3f}{peak:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
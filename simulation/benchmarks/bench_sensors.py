@@ -0,0 +1,82 @@
+"""
+Sensor stage benchmark: serial EdgeNode.generate_frame vs SensorPool across
+worker counts.
+
+Run from the simulation directory:
+    python -m benchmarks.bench_sensors [--nodes 8] [--entities 200] [--frames 30]
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from src.core.entity_store import EntityStore
+from src.core.sensor_pool import SensorPool, node_seed
+from src.nodes.edge_node import EdgeNode
+
+
+def node_config(index: int, preset: str):
+    return {
+        'nodeId': f'node-{index}',
+        'position': {'x': 0, 'y': 0, 'z': 5},
+        'orientation': {'pitch': 0, 'yaw': 0, 'roll': 0},
+        'sensors': {'camera': {'enabled': True, 'preset': preset}, 'lidar': {'enabled': True}}
+    }
+
+
+def make_store(count: int, seed: int = 0) -> EntityStore:
+    store = EntityStore(capacity=count)
+    rng = np.random.default_rng(seed)
+    for i, (x, y) in enumerate(rng.uniform(-15, 15, size=(count, 2))):
+        store.append({'id': f'E{i}', 'position': {'x': x, 'y': y, 'z': 0.0}})
+    return store
+
+
+def bench_serial(configs, store, frames: int) -> float:
+    nodes = [EdgeNode.from_config(c, seed=node_seed(0, i)) for i, c in enumerate(configs)]
+    start = time.perf_counter()
+    for frame in range(frames):
+        timestamp = frame / 29.0
+        for node in nodes:
+            node.generate_frame(store, timestamp)
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def bench_pool(configs, store, frames: int, workers: int) -> float:
+    pool = SensorPool(workers=workers, seed=0).start()
+    try:
+        for config in configs:
+            pool.add_node(config)
+        pool.generate(store, -1.0)  # Warm up workers and buffers
+        start = time.perf_counter()
+        for frame in range(frames):
+            pool.generate(store, frame / 29.0)
+        return (time.perf_counter() - start) * 1000 / frames
+    finally:
+        pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nodes', type=int, default=8)
+    parser.add_argument('--entities', type=int, default=200)
+    parser.add_argument('--frames', type=int, default=30)
+    parser.add_argument('--preset', default='720p')
+    args = parser.parse_args()
+
+    configs = [node_config(i, args.preset) for i in range(args.nodes)]
+    store = make_store(args.entities)
+
+    serial = bench_serial(configs, store, args.frames)
+    print(f"{'workers':<10}{'ms/frame':>10}{'speedup':>10}")
+    print(f"{'serial':<10}{serial:>10.2f}{1.0:>9.1f}x")
+    workers = 1
+    while workers <= min(args.nodes, os.cpu_count() or 1):
+        ms = bench_pool(configs, store, args.frames, workers)
+        print(f"{workers:<10}{ms:>10.2f}{serial / ms:>9.1f}x")
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,312 @@
+"""
+Scaling benchmark suite for every simulation stage.
+
+Sweeps entity counts (and node counts for the full orchestrator frame), times
+each stage and writes machine-readable JSON. With --compare, stages slower than
+the baseline by more than --tolerance are reported and the exit code is 1.
+
+Run from the simulation directory:
+    python -m benchmarks.suite [--entities 10 100 1000 10000] [--nodes 1 2 4 8]
+                               [--stages physics lidar ...] [--output results.json]
+                               [--compare baseline.json --tolerance 1.25]
+"""
+import argparse
+import atexit
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from src.core.entity_store import EntityStore
+from src.core.orchestrator import SimulationOrchestrator
+from src.core.physics_engine import PhysicsEngine
+from src.core.shard_pool import ShardPool
+from src.anomalies.generator import AnomalyGenerator
+from src.nodes.camera_simulator import CameraSimulator, RESOLUTION_PRESETS
+from src.nodes.fusion_engine import FusionEngine
+from src.nodes.lidar_simulator import LidarSimulator
+from src.nodes.preprocess import PointCloudFilter
+from src.sports.basketball import BasketballScenario
+from src.sports.combat import CombatScenario
+from src.sports.crowd import CrowdModel
+from src.sports.soccer import SoccerScenario
+
+DEFAULT_ENTITIES = [10, 100, 1000, 10000]
+DEFAULT_NODES = [1, 2, 4, 8]
+
+# name -> (setup(entities, nodes) -> zero-arg callable, sweeps node counts)
+STAGES: Dict[str, tuple] = {}
+
+
+def stage(name: str, sweeps_nodes: bool = False):
+    def register(setup: Callable):
+        STAGES[name] = (setup, sweeps_nodes)
+        return setup
+    return register
+
+
+def make_entities(count: int, seed: int = 0, extent=(0.0, 0.0, 30.0, 16.0), store: Optional[EntityStore] = None,
+                  prefix: str = 'E') -> EntityStore:
+    """Passive PERSON entities (spectators and staff) spread over ``extent``."""
+    store = store if store is not None else EntityStore(capacity=count)
+    rng = np.random.default_rng(seed)
+    x0, y0, x1, y1 = extent
+    positions = rng.uniform((x0, y0), (x1, y1), size=(count, 2))
+    velocities = rng.normal(0.0, 1.0, size=(count, 2))
+    roles = ('SPECTATOR', 'STAFF', 'SECURITY')
+    for i in range(count):
+        store.append({
+            'id': f'{prefix}{i}',
+            'type': 'PERSON',
+            'role': roles[i % len(roles)],
+            'position': {'x': positions[i, 0], 'y': positions[i, 1], 'z': 0.0},
+            'velocity': {'x': velocities[i, 0], 'y': velocities[i, 1], 'z': 0.0},
+            'radius': 0.3
+        })
+    return store
+
+
+def node_config(index: int, preset: str = '720p') -> dict:
+    return {
+        'nodeId': f'node-{index}',
+        'position': {'x': 0, 'y': 0, 'z': 5},
+        'orientation': {'pitch': 0, 'yaw': 0, 'roll': 0},
+        'sensors': {'camera': {'enabled': True, 'preset': preset}, 'lidar': {'enabled': True}}
+    }
+
+
+# ----------------------------------------------------------------------
+# Stages
+# ----------------------------------------------------------------------
+@stage('physics')
+def setup_physics(entities: int, nodes: int):
+    store = make_entities(entities)
+    engine = PhysicsEngine()
+    return lambda: engine.step(store, engine.fixed_dt)
+
+
+def _scenario_setup(scenario_cls, extent):
+    def setup(entities: int, nodes: int):
+        scenario = scenario_cls({'crowdCount': 0}) if scenario_cls is BasketballScenario else scenario_cls({})
+        store = EntityStore()
+        scenario.initialize(store)
+        # Fill the venue with passive entities up to the requested count
+        make_entities(max(entities - len(store), 0), store=store, extent=extent, prefix='PAD_')
+        return lambda: scenario.update(store, 1.0 / 30.0)
+    return setup
+
+
+stage('scenario.basketball')(_scenario_setup(BasketballScenario, (-5.0, -5.0, 33.0, 20.0)))
+stage('scenario.soccer')(_scenario_setup(SoccerScenario, (-5.0, -5.0, 110.0, 73.0)))
+stage('scenario.combat')(_scenario_setup(CombatScenario, (-3.0, -3.0, 12.0, 12.0)))
+
+
+@stage('crowd')
+def setup_crowd(entities: int, nodes: int):
+    # Worst case: every spectator walking out at once
+    crowd = CrowdModel(entities, (0.0, 0.0, 28.65, 15.24), seed=0)
+    store = EntityStore(capacity=entities)
+    store.extend(crowd.entities('egress', duration=0.0))
+    dt = 1.0 / 30.0
+    for _ in range(15):
+        crowd.step(store, dt)
+        store.positions[:] += store.velocities * dt
+
+    def run():
+        crowd.step(store, dt)
+        store.positions[:] += store.velocities * dt
+    return run
+
+
+@stage('crowd.sharded')
+def setup_crowd_sharded(entities: int, nodes: int):
+    """The crowd stage with forces split over one shard process per core."""
+    pool = ShardPool(workers=max(os.cpu_count() or 1, 2), min_agents=0).start()
+    atexit.register(pool.close)
+    crowd = CrowdModel(entities, (0.0, 0.0, 28.65, 15.24), seed=0)
+    store = EntityStore(capacity=entities)
+    store.extend(crowd.entities('egress', duration=0.0))
+    dt = 1.0 / 30.0
+    for _ in range(15):
+        crowd.step(store, dt)
+        store.positions[:] += store.velocities * dt
+
+    def run():
+        crowd.step(store, dt, shards=pool)
+        store.positions[:] += store.velocities * dt
+    return run
+
+
+@stage('camera')
+def setup_camera(entities: int, nodes: int):
+    store = make_entities(entities, extent=(-15.0, -8.0, 15.0, 8.0))
+    preset = RESOLUTION_PRESETS['720p']
+    camera = CameraSimulator({'width': preset['width'], 'height': preset['height']}, fps=30, fov=90)
+    clock = itertools.count(1)
+    return lambda: camera.render(store, next(clock))
+
+
+@stage('lidar')
+def setup_lidar(entities: int, nodes: int):
+    store = make_entities(entities)
+    lidar = LidarSimulator('VLP-16', 16, 100, seed=0)
+    return lambda: lidar.scan(store, 0.0)
+
+
+@stage('fusion')
+def setup_fusion(entities: int, nodes: int):
+    store = make_entities(entities, extent=(-10.0, 1.0, 10.0, 15.0))
+    points = LidarSimulator('VLP-16', 16, 100, seed=0).scan(store, 0.0)
+    engine = FusionEngine()
+    return lambda: engine.fuse(None, points, store)
+
+
+@stage('preprocess')
+def setup_preprocess(entities: int, nodes: int):
+    store = make_entities(entities, extent=(-10.0, 1.0, 10.0, 15.0))
+    points = LidarSimulator('VLP-16', 16, 100, seed=0).scan(store, 0.0)
+    cloud_filter = PointCloudFilter(ground='height', voxel=0.25)
+    return lambda: cloud_filter.apply(points)
+
+
+@stage('fusion.preprocessed')
+def setup_fusion_preprocessed(entities: int, nodes: int):
+    """Fusion fed by a node with ground removal and 0.25 m voxels."""
+    store = make_entities(entities, extent=(-10.0, 1.0, 10.0, 15.0))
+    points = LidarSimulator('VLP-16', 16, 100, seed=0).scan(store, 0.0)
+    cloud_filter = PointCloudFilter(ground='height', voxel=0.25)
+    engine = FusionEngine()
+    return lambda: engine.fuse(None, cloud_filter.apply(points), store)
+
+
+@stage('anomalies')
+def setup_anomalies(entities: int, nodes: int):
+    scenario = BasketballScenario({'crowdCount': 0})
+    store = make_entities(entities, extent=(-5.0, -5.0, 33.0, 20.0))
+    generator = AnomalyGenerator()
+    clock = itertools.count(1)
+    return lambda: generator.detect(store, scenario, next(clock) / 30.0)
+
+
+@stage('frame', sweeps_nodes=True)
+def setup_frame(entities: int, nodes: int):
+    orch = SimulationOrchestrator({})
+    for index in range(nodes):
+        orch.add_node(node_config(index, preset='480p'))
+    orch.reseed(0)
+    orch.load_scenario('BASKETBALL', {'crowdCount': 0})
+    make_entities(max(entities - len(orch.entities), 0), store=orch.entities,
+                  extent=(-5.0, -5.0, 33.0, 20.0), prefix='PAD_')
+    dt = 1.0 / orch.target_fps
+    clock = itertools.count(1)
+    return lambda: orch.step(next(clock) * dt, dt)
+
+
+# ----------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------
+def measure(fn: Callable, min_time: float, max_repeats: int) -> Dict:
+    """Time ``fn`` after one warm-up call, repeating until ``min_time`` has elapsed."""
+    fn()
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < max_repeats and (not samples or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples = np.array(samples)
+    return {
+        'repeats': len(samples),
+        'mean_ms': float(samples.mean()),
+        'p50_ms': float(np.percentile(samples, 50)),
+        'p95_ms': float(np.percentile(samples, 95)),
+        'min_ms': float(samples.min())
+    }
+
+
+def run_suite(stages: List[str], entity_counts: List[int], node_counts: List[int],
+              min_time: float = 0.2, max_repeats: int = 50, stage_budget_ms: float = 2000.0,
+              log: Callable[[str], None] = print) -> Dict:
+    """
+    Run every (stage, entities[, nodes]) case. Once a stage's mean exceeds
+    ``stage_budget_ms``, its larger cases are recorded as skipped.
+    """
+    results = []
+    for name in stages:
+        setup, sweeps_nodes = STAGES[name]
+        over_budget = False
+        for entities in entity_counts:
+            for nodes in (node_counts if sweeps_nodes else [1]):
+                case = {'stage': name, 'entities': entities, 'nodes': nodes}
+                if over_budget:
+                    results.append(dict(case, skipped='over budget'))
+                    continue
+                stats = measure(setup(entities, nodes), min_time, max_repeats)
+                results.append(dict(case, **stats))
+                log(f"{name:<22}{entities:>8}{nodes:>6}{stats['mean_ms']:>12.3f}{stats['p95_ms']:>12.3f}")
+                over_budget = stats['mean_ms'] > stage_budget_ms
+
+    return {
+        'meta': {
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpuCount': os.cpu_count()
+        },
+        'results': results
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[Dict]:
+    """Cases whose mean time grew by more than ``tolerance`` x the baseline."""
+    reference = {
+        (r['stage'], r['entities'], r['nodes']): r['mean_ms']
+        for r in baseline['results'] if 'mean_ms' in r
+    }
+    regressions = []
+    for result in current['results']:
+        key = (result['stage'], result['entities'], result['nodes'])
+        if 'mean_ms' in result and key in reference and result['mean_ms'] > reference[key] * tolerance:
+            regressions.append(dict(result, baseline_ms=reference[key], ratio=result['mean_ms'] / reference[key]))
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entities', type=int, nargs='+', default=DEFAULT_ENTITIES)
+    parser.add_argument('--nodes', type=int, nargs='+', default=DEFAULT_NODES)
+    parser.add_argument('--stages', nargs='+', choices=sorted(STAGES), default=list(STAGES))
+    parser.add_argument('--min-time', type=float, default=0.2, help='Seconds to spend timing each case')
+    parser.add_argument('--max-repeats', type=int, default=50)
+    parser.add_argument('--stage-budget-ms', type=float, default=2000.0,
+                        help='Skip larger cases of a stage once one case is slower than this')
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--compare', help='Baseline results JSON to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    print(f"{'stage':<22}{'entities':>8}{'nodes':>6}{'mean ms':>12}{'p95 ms':>12}")
+    current = run_suite(args.stages, args.entities, args.nodes, args.min_time,
+                        args.max_repeats, args.stage_budget_ms)
+    with open(args.output, 'w') as handle:
+        json.dump(current, handle, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as handle:
+            regressions = compare(current, json.load(handle), args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['stage']} entities={r['entities']} nodes={r['nodes']}: "
+                  f"{r['mean_ms']:.3f} ms vs {r['baseline_ms']:.3f} ms ({r['ratio']:.2f}x)")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
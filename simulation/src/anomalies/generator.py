@@ -1,247 +1,156 @@
 import numpy as np
 from typing import List, Dict, Optional
-import uuid
 from datetime import datetime
 
+from ..core.entity_store import EntityStore, positions_of
+from ..core.zone_index import ZoneIndex, zone_index_key
+from .lifecycle import OPEN, AnomalyLifecycle
+from .rules import Rule, RuleEngine, RuleFrame, default_rules
+from .trajectory import TrajectoryHistory
+
+
+class _ChangeTracker:
+    """
+    Rows of an EntityStore whose position or velocity changed since the
+    previous pass. Returns None (re-evaluate everything) on the first pass,
+    for plain entity lists, and whenever rows or attributes such as role
+    changed, which the store's version counters record.
+    """
+
+    def __init__(self):
+        self._key = None
+        self._xy = None
+        self._velocities = None
+
+    def update(self, entities) -> Optional[tuple]:
+        """(moved rows, rows whose velocity changed), or None."""
+        if not isinstance(entities, EntityStore):
+            self._key = None
+            return None
+        key = (id(entities), entities.version, entities.attr_version)
+        xy = entities.positions[:, :2]
+        velocities = entities.velocities
+        if key != self._key or self._xy is None or len(self._xy) != len(xy):
+            self._key = key
+            self._xy = xy.copy()
+            self._velocities = velocities.copy()
+            return None
+        moved = np.flatnonzero((xy != self._xy).any(axis=1))
+        accelerated = np.flatnonzero((velocities != self._velocities).any(axis=1))
+        self._xy[moved] = xy[moved]
+        self._velocities[accelerated] = velocities[accelerated]
+        return moved, accelerated
+
+
 class AnomalyGenerator:
     """
     Generates realistic anomalies based on entity behavior and scenario context.
+
+    Detection runs the vectorized rules in ``rules`` (see rules.py). With
+    ``incremental`` (the default) zone membership and rule results are kept
+    between passes and re-evaluated only for the entities that moved or changed
+    velocity and the zones whose members changed; the anomalies returned are the
+    same as a full pass. Time-based rules (loitering) run on every pass.
     """
     
-    def __init__(self):
+    def __init__(self, zone_cell_size: float = 0.5, incremental: bool = True):
         self.baselines = {}  # Zone -> baseline metrics
-        self.anomaly_rate = 2.0  # anomalies per minute (configurable)
         self.last_anomaly_time = 0
-        self.min_anomaly_interval = 5.0  # seconds between anomalies
+        self.min_anomaly_interval = 5.0  # per-incident cooldown after it closes (seconds)
+        # Detections -> open/update/close events (see emit)
+        self.lifecycle = AnomalyLifecycle()
+        
+        # Zone lookup grid, compiled once per zone layout
+        self.zone_cell_size = zone_cell_size
+        self._zone_index = None
+        self._zone_index_key = None
+        
+        # Bounded per-entity position history for loitering (60s window)
+        self.trajectories = TrajectoryHistory(window=60.0, bucket_dt=1.0, ttl=30.0)
+        
+        # Rule registry (see rules.py); scenarios tune it via ``anomaly_rules``
+        self.rules: List[Rule] = default_rules()
+        self._engine = None
+        self._engine_key = None
+        
+        # State carried between passes for incremental evaluation
+        self.incremental = incremental
+        self._changes = _ChangeTracker()
+        self._membership = None
         
     def detect(self, entities: List[Dict], scenario, timestamp: float) -> List[Dict]:
         """
         Check for anomalies based on entity behavior.
         Returns list of anomaly dicts.
         """
-        anomalies = []
+        occurred_at = datetime.fromtimestamp(timestamp).isoformat()
         
         # Update baselines
         self._update_baselines(entities, scenario)
         
-        # 1. Crowd Compression (Geographics + Proxemics)
-        for zone in scenario.zones:
-            compression = self._check_crowd_compression(entities, zone, timestamp)
-            if compression:
-                anomalies.append(compression)
-        
-        # 2. Speed Violations (Kinetics)
-        speed_anomalies = self._check_speed_anomalies(entities, timestamp)
-        anomalies.extend(speed_anomalies)
+        # What changed since the last pass (None: evaluate everything)
+        changes = self._changes.update(entities) if self.incremental else None
         
-        # 3. Loitering (Atmospherics)
-        loitering = self._check_loitering(entities, timestamp)
-        anomalies.extend(loitering)
+        # Zone membership from one grid lookup, or a re-lookup of the moved rows
+        membership, affected, relooked = self._zone_membership(entities, scenario, changes)
         
-        # 4. Restricted Zone Entry (Geographics)
-        trespass = self._check_restricted_zones(entities, scenario, timestamp)
-        anomalies.extend(trespass)
+        # Every rule in one pass: crowd compression (Geographics + Proxemics), speed
+        # (Kinetics), loitering (Atmospherics), restricted zone entry (Geographics)
+        engine, rebuilt = self._engine_for(scenario)
+        if rebuilt or not relooked:
+            # New rules or a full lookup (e.g. zones edited): per-zone state is stale
+            changes = None
+        frame = RuleFrame(entities, scenario, timestamp, membership, self.trajectories, self.baselines)
+        anomalies = engine.evaluate(frame, changes, affected, occurred_at)
         
         # Apply Rule of Three
         anomalies = self._apply_rule_of_three(anomalies, timestamp)
         
         return anomalies
     
-    def _check_crowd_compression(self, entities: List[Dict], zone, timestamp: float) -> Optional[Dict]:
-        """Detect crowd compression/crush risk."""
-        # Filter entities in this zone
-        entities_in_zone = [
-            e for e in entities 
-            if self._entity_in_zone(e, zone)
-        ]
-        
-        if not entities_in_zone:
-            return None
-        
-        # Calculate density
-        area = zone.area
-        density = len(entities_in_zone) / area
-        
-        # Get baseline
-        baseline_key = f"{zone.name}_density"
-        baseline_density = self.baselines.get(baseline_key, 0.5)
-        
-        # Threshold: 2.5× baseline or >4 people/m² (crowd crush risk)
-        threshold = max(baseline_density * 2.5, 4.0)
-        
-        if density > threshold:
-            severity = 'CRITICAL' if density > 6.0 else 'HIGH'
-            
-            return {
-                'anomalyId': f'ANOM_{uuid.uuid4().hex[:8]}',
-                'type': 'GEOGRAPHICS',
-                'subtype': 'CROWD_COMPRESSION',
-                'severity': severity,
-                'scenario': 'CRUSH',
-                'headline': f'{zone.name} Crowd Compression Risk',
-                'description': f'Density {density:.1f} people/m², {density/baseline_density:.1f}× baseline',
-                'baselineText': f'Normal density: {baseline_density:.1f} people/m²',
-                'anomalyText': f'Current density: {density:.1f} people/m² ({len(entities_in_zone)} in {area:.0f}m²)',
-                'zone': zone.name,
-                'location': zone.center if hasattr(zone, 'center') else {'x': 0, 'y': 0, 'z': 0},
-                'entityIds': [e['id'] for e in entities_in_zone],
-                'metrics': {
-                    'baselineDelta': ((density / baseline_density) - 1) * 100,
-                    'confidence': 0.95,
-                    'riskScore': min(density * 15, 100)
-                },
-                'occurredAt': datetime.fromtimestamp(timestamp).isoformat(),
-                'ruleOfThreeHit': False
-            }
-        
-        return None
+    def register(self, rule: Rule):
+        """Add a rule; its anomalies are reported after those of the rules before it."""
+        self.rules.append(rule)
     
-    def _check_speed_anomalies(self, entities: List[Dict], timestamp: float) -> List[Dict]:
-        """Detect excessive speed violations."""
-        anomalies = []
-        
-        for entity in entities:
-            if entity.get('type') != 'PERSON':
-                continue
-                
-            vel = entity.get('velocity', {'x': 0, 'y': 0, 'z': 0})
-            speed = np.sqrt(vel['x']**2 + vel['y']**2)  # Horizontal speed
-            
-            # Thresholds based on role
-            role = entity.get('role', 'SPECTATOR')
-            if role == 'PLAYER':
-                max_speed = 10.0  # m/s (fast sprinting)
-            elif role == 'OFFICIAL':
-                max_speed = 5.0   # m/s
-            else:
-                max_speed = 2.0   # m/s (walking speed for spectators)
-            
-            if speed > max_speed * 1.5:  # 1.5× threshold
-                anomalies.append({
-                    'anomalyId': f'ANOM_{uuid.uuid4().hex[:8]}',
-                    'type': 'KINETICS',
-                    'subtype': 'SPEED_VIOLATION',
-                    'severity': 'MEDIUM',
-                    'headline': f'Excessive Speed: {entity["id"]}',
-                    'description': f'Entity moving at {speed:.1f} m/s, {(speed/max_speed):.1f}× expected',
-                    'baselineText': f'Expected max speed: {max_speed:.1f} m/s for {role}',
-                    'anomalyText': f'Current speed: {speed:.1f} m/s',
-                    'zone': 'UNKNOWN',  # TODO: Determine zone from position
-                    'location': entity['position'],
-                    'entityIds': [entity['id']],
-                    'metrics': {
-                        'baselineDelta': ((speed / max_speed) - 1) * 100,
-                        'confidence': 0.88,
-                        'riskScore': min(speed * 8, 100)
-                    },
-                    'occurredAt': datetime.fromtimestamp(timestamp).isoformat(),
-                    'ruleOfThreeHit': False
-                })
-        
-        return anomalies
+    def _engine_for(self, scenario) -> tuple:
+        """(engine, rebuilt): rules configured for the scenario, rebuilt when it or the registry changes."""
+        key = (id(scenario), tuple(id(rule) for rule in self.rules))
+        if self._engine is not None and key == self._engine_key:
+            return self._engine, False
+        overrides = getattr(scenario, 'anomaly_rules', None) or {}
+        self._engine = RuleEngine([rule.configure(overrides.get(rule.subtype)) for rule in self.rules])
+        self._engine_key = key
+        return self._engine, True
     
-    def _check_loitering(self, entities: List[Dict], timestamp: float) -> List[Dict]:
-        """Detect loitering patterns (entities staying in same small area for too long)."""
-        anomalies = []
-        
-        # Initialize history if not present
-        if not hasattr(self, 'position_history'):
-            self.position_history = {} # entity_id -> list of (timestamp, pos)
-            
-        for entity in entities:
-            if entity.get('type') != 'PERSON':
-                continue
-                
-            eid = entity['id']
-            pos = entity['position']
-            
-            # Update history
-            if eid not in self.position_history:
-                self.position_history[eid] = []
-                
-            self.position_history[eid].append((timestamp, pos))
-            
-            # Prune old history (> 60 seconds)
-            cutoff = timestamp - 60.0
-            self.position_history[eid] = [p for p in self.position_history[eid] if p[0] > cutoff]
-            
-            # Check for loitering if we have enough data (e.g. > 10 seconds)
-            history = self.position_history[eid]
-            if len(history) < 30: # Assuming ~3fps check rate, need 10s
-                continue
-                
-            # Calculate bounding box of movement over last window
-            xs = [p[1]['x'] for p in history]
-            ys = [p[1]['y'] for p in history]
-            
-            if not xs or not ys:
-                continue
-                
-            x_range = max(xs) - min(xs)
-            y_range = max(ys) - min(ys)
-            
-            # If stayed within 3m box for > 15s (approx len check)
-            if x_range < 3.0 and y_range < 3.0 and (history[-1][0] - history[0][0]) > 15.0:
-                # Check if already flagged recently to avoid spam is hard without state, 
-                # but Rule of Three handles clustering.
-                
-                anomalies.append({
-                    'anomalyId': f'ANOM_{uuid.uuid4().hex[:8]}',
-                    'type': 'ATMOSPHERICS',
-                    'subtype': 'LOITERING',
-                    'severity': 'LOW',
-                    'headline': f'Loitering Detected: {eid}',
-                    'description': f'Entity remained in 3m radius for > 15s',
-                    'baselineText': 'Normal transit time: < 10s',
-                    'anomalyText': f'Stationary duration: {history[-1][0] - history[0][0]:.1f}s',
-                    'zone': 'UNKNOWN', 
-                    'location': pos,
-                    'entityIds': [eid],
-                    'metrics': {
-                        'baselineDelta': 50,
-                        'confidence': 0.85,
-                        'riskScore': 40
-                    },
-                    'occurredAt': datetime.fromtimestamp(timestamp).isoformat(),
-                    'ruleOfThreeHit': False
-                })
-                
-        return anomalies
+    def emit(self, anomalies: List[Dict], timestamp: float) -> List[Dict]:
+        """
+        Turn one pass of ``detect`` output into incident events (see lifecycle),
+        using ``min_anomaly_interval`` as the per-incident cooldown.
+        """
+        events = self.lifecycle.update(anomalies, timestamp, cooldown=self.min_anomaly_interval)
+        if any(event['event'] == OPEN for event in events):
+            self.last_anomaly_time = timestamp
+        return events
     
-    def _check_restricted_zones(self, entities: List[Dict], scenario, timestamp: float) -> List[Dict]:
-        """Detect entities entering restricted zones."""
-        anomalies = []
-        
-        restricted_zones = [z for z in scenario.zones if z.type == 'RESTRICTED']
-        
-        for zone in restricted_zones:
-            for entity in entities:
-                if entity.get('role') == 'PLAYER':
-                    continue  # Players allowed in restricted zones
-                    
-                if self._entity_in_zone(entity, zone):
-                    anomalies.append({
-                        'anomalyId': f'ANOM_{uuid.uuid4().hex[:8]}',
-                        'type': 'GEOGRAPHICS',
-                        'subtype': 'RESTRICTED_ZONE_ENTRY',
-                        'severity': 'HIGH',
-                        'headline': f'Unauthorized Entry: {zone.name}',
-                        'description': f'{entity["id"]} entered restricted zone',
-                        'baselineText': f'Zone {zone.name} is restricted',
-                        'anomalyText': f'{entity["role"]} entity detected in zone',
-                        'zone': zone.name,
-                        'location': entity['position'],
-                        'entityIds': [entity['id']],
-                        'metrics': {
-                            'baselineDelta': 100,
-                            'confidence': 0.92,
-                            'riskScore': 75
-                        },
-                        'occurredAt': datetime.fromtimestamp(timestamp).isoformat(),
-                        'ruleOfThreeHit': False
-                    })
-        
-        return anomalies
+    def _zone_membership(self, entities: List[Dict], scenario, changes) -> tuple:
+        """
+        (membership, per-zone mask of zones whose members changed, incremental):
+        ``incremental`` is False when every entity was looked up again, e.g.
+        because the zones changed and the grid was recompiled.
+        """
+        key = zone_index_key(scenario.zones)
+        if self._zone_index is None or key != self._zone_index_key:
+            self._zone_index = ZoneIndex(scenario.zones, cell_size=self.zone_cell_size)
+            self._zone_index_key = key
+            changes = None
+        
+        xy = positions_of(entities)
+        if changes is None or self._membership is None:
+            self._membership = self._zone_index.lookup(xy)
+            return self._membership, np.ones(len(scenario.zones), dtype=bool), False
+        
+        self._membership, affected = self._zone_index.relookup(self._membership, xy, changes[0])
+        return self._membership, affected, True
     
     def _apply_rule_of_three(self, anomalies: List[Dict], timestamp: float) -> List[Dict]:
         """
@@ -253,11 +162,13 @@ class AnomalyGenerator:
         temporal_threshold = 30.0  # seconds
         
         groups = []
-        for anomaly in anomalies:
+        # Parse each occurredAt once rather than once per comparison
+        times = [datetime.fromisoformat(a['occurredAt']).timestamp() for a in anomalies]
+        for anomaly, occurred in zip(anomalies, times):
             placed = False
             for group in groups:
                 # Check if anomaly belongs to this group
-                representative = group[0]
+                representative, representative_time = group[0]
                 
                 # Spatial proximity
                 loc1 = anomaly['location']
@@ -268,21 +179,19 @@ class AnomalyGenerator:
                 )
                 
                 # Temporal proximity
-                time_diff = abs(
-                    anomaly['occurredAt'].timestamp() - 
-                    representative['occurredAt'].timestamp()
-                )
+                time_diff = abs(occurred - representative_time)
                 
                 if dist < spatial_threshold and time_diff < temporal_threshold:
-                    group.append(anomaly)
+                    group.append((anomaly, occurred))
                     placed = True
                     break
             
             if not placed:
-                groups.append([anomaly])
+                groups.append([(anomaly, occurred)])
         
         # Check each group for Rule of Three
         for group in groups:
+            group = [anomaly for anomaly, _ in group]
             distinct_types = set(a['type'] for a in group)
             
             if len(distinct_types) >= 3:
@@ -304,13 +213,3 @@ class AnomalyGenerator:
             baseline_key = f"{zone.name}_density"
             if baseline_key not in self.baselines:
                 self.baselines[baseline_key] = 1.0  # 1 person/m² default
-    
-    def _entity_in_zone(self, entity: Dict, zone) -> bool:
-        """Check if entity is inside zone bounds."""
-        pos = entity['position']
-        bounds = zone.bounds  # (x_min, y_min, x_max, y_max)
-        
-        return (
-            bounds[0] <= pos['x'] <= bounds[2] and
-            bounds[1] <= pos['y'] <= bounds[3]
-        )
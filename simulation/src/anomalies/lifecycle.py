@@ -0,0 +1,129 @@
+"""
+Stateful emission of detected anomalies.
+
+Detection reports every rule hit on every pass, so a referee standing in a
+restricted zone would otherwise become a new anomaly on every frame. The
+lifecycle turns those detections into incidents keyed by (subtype, zone,
+entity) and emits only deltas:
+
+    OPEN    first detection of a key; the incident keeps this anomalyId
+    UPDATE  severity or the rule-of-three flag changed, or ``update_interval``
+            seconds passed since the incident was last emitted
+    CLOSE   the key went undetected for ``close_after`` seconds
+
+A closed key is in cooldown for the generator's ``min_anomaly_interval``:
+detections of it are suppressed until the cooldown ends, so a flickering
+incident cannot reopen every few frames. Downstream traffic is then
+proportional to incidents, not to the detection rate.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+OPEN, UPDATE, CLOSE = 'OPEN', 'UPDATE', 'CLOSE'
+
+
+def incident_key(anomaly: Dict) -> Tuple:
+    """(subtype, zone, entity); zone-wide anomalies such as crowd compression have no entity."""
+    entity_ids = anomaly.get('entityIds') or []
+    entity = entity_ids[0] if len(entity_ids) == 1 else None
+    return anomaly['subtype'], anomaly.get('zone'), entity
+
+
+class _Incident:
+    __slots__ = ('anomaly_id', 'opened_at', 'last_seen', 'last_emitted', 'record', 'detections')
+
+    def __init__(self, anomaly_id: str, timestamp: float):
+        self.anomaly_id = anomaly_id
+        self.opened_at = timestamp
+        self.last_seen = timestamp
+        self.last_emitted = timestamp
+        self.record: Optional[Dict] = None
+        self.detections = 0
+
+
+class AnomalyLifecycle:
+    """Open/update/close deltas for a stream of per-pass detections."""
+
+    def __init__(self, close_after: float = 2.0, update_interval: float = 5.0):
+        self.close_after = close_after
+        self.update_interval = update_interval
+        self.active: Dict[Tuple, _Incident] = {}
+        self._cooldown_until: Dict[Tuple, float] = {}
+        self.counters = {'detections': 0, 'opened': 0, 'updated': 0, 'closed': 0, 'suppressed': 0}
+
+    def update(self, detections: List[Dict], timestamp: float, cooldown: float = 0.0) -> List[Dict]:
+        """Fold in one detection pass and return the resulting events (possibly none)."""
+        self.counters['detections'] += len(detections)
+        pending: Dict[Tuple, str] = {}
+        incident_ids: Dict[str, str] = {}
+
+        for anomaly in detections:
+            key = incident_key(anomaly)
+            incident = self.active.get(key)
+            if incident is None:
+                if timestamp < self._cooldown_until.get(key, float('-inf')):
+                    self.counters['suppressed'] += 1
+                    continue
+                self._cooldown_until.pop(key, None)
+                incident = self.active[key] = _Incident(anomaly['anomalyId'], timestamp)
+                pending[key] = OPEN
+            elif key not in pending:
+                previous = incident.record
+                changed = (anomaly['severity'] != previous['severity'] or
+                           anomaly.get('ruleOfThreeHit') != previous.get('ruleOfThreeHit'))
+                if changed or timestamp - incident.last_emitted >= self.update_interval:
+                    pending[key] = UPDATE
+            incident.record = anomaly
+            incident.last_seen = timestamp
+            incident.detections += 1
+            incident_ids[anomaly['anomalyId']] = incident.anomaly_id
+
+        events = [self._event(kind, self.active[key], timestamp, incident_ids) for key, kind in pending.items()]
+        for key, kind in pending.items():
+            self.active[key].last_emitted = timestamp
+            self.counters['opened' if kind == OPEN else 'updated'] += 1
+
+        for key in [key for key, incident in self.active.items()
+                    if timestamp - incident.last_seen >= self.close_after]:
+            incident = self.active.pop(key)
+            self._cooldown_until[key] = timestamp + cooldown
+            events.append(self._event(CLOSE, incident, timestamp, incident_ids))
+            self.counters['closed'] += 1
+
+        # Forget cooldowns that have run out
+        if len(self._cooldown_until) > len(self.active):
+            for key in [key for key, until in self._cooldown_until.items() if until <= timestamp]:
+                del self._cooldown_until[key]
+        return events
+
+    def reset(self, timestamp: Optional[float] = None) -> List[Dict]:
+        """
+        Forget every incident, e.g. when the scenario is replaced. With a
+        ``timestamp``, returns CLOSE events for the incidents still open so
+        downstream views do not keep them forever.
+        """
+        events = []
+        if timestamp is not None:
+            events = [self._event(CLOSE, incident, timestamp, {}) for incident in self.active.values()]
+            self.counters['closed'] += len(events)
+        self.active.clear()
+        self._cooldown_until.clear()
+        return events
+
+    def get_stats(self) -> Dict:
+        return dict(self.counters, active=len(self.active), coolingDown=len(self._cooldown_until))
+
+    def _event(self, kind: str, incident: _Incident, timestamp: float, incident_ids: Dict[str, str]) -> Dict:
+        event = dict(incident.record)
+        event['anomalyId'] = incident.anomaly_id
+        if 'relatedAnomalies' in event:
+            # Point at incidents rather than at this pass's per-detection ids
+            event['relatedAnomalies'] = [incident_ids.get(a, a) for a in event['relatedAnomalies']]
+        event['event'] = kind
+        event['status'] = 'CLOSED' if kind == CLOSE else 'ACTIVE'
+        event['openedAt'] = datetime.fromtimestamp(incident.opened_at).isoformat()
+        event['lastSeenAt'] = datetime.fromtimestamp(incident.last_seen).isoformat()
+        event['detections'] = incident.detections
+        if kind == CLOSE:
+            event['closedAt'] = datetime.fromtimestamp(timestamp).isoformat()
+        return event
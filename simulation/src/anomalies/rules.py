@@ -0,0 +1,369 @@
+"""
+Vectorized anomaly rules.
+
+A rule is a predicate over whole arrays for one detection pass (speed, zone
+membership, role codes, dwell time) rather than a per-entity Python check, and
+declares its thresholds per role ('default' covers roles it does not list).
+Rules come in three scopes:
+
+    entity  evaluate(frame, rows)           -> (hit, value) per row
+    zone    evaluate(frame, zone_ids)       -> (hit, value) per zone
+    member  evaluate(frame, rows, zone_id)  -> hit per member row of one zone
+            (only zones whose type is in ``zone_types``)
+
+``depends`` says what invalidates a cached result: 'velocity' and 'position'
+rules are re-evaluated only for the rows that changed (zone and member rules
+only for zones whose members changed), 'time' rules on every pass. The
+RuleEngine runs every rule in one pass and builds anomaly records only for the
+hits, so a rule's per-frame cost is a few array operations however many
+entities it covers.
+
+Scenarios tune rules through ``scenario.anomaly_rules``, e.g.
+``{'SPEED_VIOLATION': {'thresholds': {'PLAYER': 11.0}}}``.
+"""
+import copy
+import uuid
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..core.entity_store import codes_of, ids_of, mask_of, positions_of, velocities_of
+from ..core.zone_index import ZoneMembership
+
+
+class RuleFrame:
+    """Arrays of one detection pass; the costlier ones are built on first use."""
+
+    def __init__(self, entities, scenario, timestamp: float, membership: ZoneMembership,
+                 trajectories, baselines: Dict[str, float]):
+        self.entities = entities
+        self.scenario = scenario
+        self.zones = scenario.zones
+        self.timestamp = timestamp
+        self.membership = membership
+        self.baselines = baselines
+        self.ids = ids_of(entities)
+        self.positions = positions_of(entities)
+        self.velocities = velocities_of(entities)
+        self.role_codes, self.role_labels = codes_of(entities, 'role')
+        self.is_person = mask_of(entities, type='PERSON')
+        self._trajectories = trajectories
+        self._dwell = None
+
+    def by_role(self, thresholds: Dict[str, float], rows: np.ndarray) -> np.ndarray:
+        """Per-row value of a {role: value} table for ``rows``."""
+        table = np.full(len(self.role_labels), thresholds.get('default', np.nan), dtype=np.float64)
+        for code, label in enumerate(self.role_labels):
+            if label in thresholds:
+                table[code] = thresholds[label]
+        return table[self.role_codes[rows]]
+
+    def baseline(self, zone_id: int) -> float:
+        return self.baselines.get(f"{self.zones[zone_id].name}_density", 0.5)
+
+    @property
+    def dwell(self) -> Tuple[np.ndarray, ...]:
+        """
+        Per-row (x_range, y_range, duration, samples) over the trajectory window;
+        folds this pass's sample of every person into the history on first use.
+        """
+        if self._dwell is None:
+            n = len(self.ids)
+            x_range, y_range = np.full(n, np.inf), np.full(n, np.inf)
+            duration, samples = np.zeros(n), np.zeros(n, dtype=np.int64)
+            rows = np.flatnonzero(self.is_person)
+            if len(rows):
+                result = self._trajectories.update([self.ids[row] for row in rows],
+                                                   self.positions[rows], self.timestamp)
+                for column, values in zip((x_range, y_range, duration, samples), result):
+                    column[rows] = values
+            self._dwell = (x_range, y_range, duration, samples)
+        return self._dwell
+
+
+class Rule:
+    """Base rule; subclasses set the class attributes and implement evaluate/record."""
+
+    type = ''
+    subtype = ''
+    scope = 'entity'
+    depends = 'time'
+    thresholds: Dict[str, float] = {}
+
+    def __init__(self, **thresholds: float):
+        self.thresholds = dict(self.thresholds, **thresholds)
+
+    def configure(self, overrides: Optional[Dict]) -> 'Rule':
+        """Copy with ``{'thresholds': {...}, <attribute>: value}`` overrides applied."""
+        rule = copy.copy(self)
+        for key, value in (overrides or {}).items():
+            if key == 'thresholds':
+                rule.thresholds = dict(self.thresholds, **value)
+            elif hasattr(rule, key):
+                setattr(rule, key, value)
+            else:
+                raise KeyError(f"{self.subtype} has no setting {key!r}")
+        return rule
+
+    def record(self, frame: RuleFrame, index, value: float, occurred_at: str, **detail) -> Dict:
+        raise NotImplementedError
+
+
+class CrowdCompressionRule(Rule):
+    """Zone density above ``factor`` × baseline and the 'default' people/m² floor."""
+
+    type = 'GEOGRAPHICS'
+    subtype = 'CROWD_COMPRESSION'
+    scope = 'zone'
+    depends = 'position'
+    thresholds = {'default': 4.0}
+    factor = 2.5
+    critical = 6.0
+
+    def evaluate(self, frame: RuleFrame, zone_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        counts = frame.membership.counts[zone_ids]
+        areas = np.array([frame.zones[z].area for z in zone_ids.tolist()], dtype=np.float64)
+        baselines = np.array([frame.baseline(z) for z in zone_ids.tolist()], dtype=np.float64)
+        density = counts / areas
+        # Threshold: factor × baseline or the crowd crush floor
+        hit = (counts > 0) & (density > np.maximum(baselines * self.factor, self.thresholds['default']))
+        return hit, density
+
+    def record(self, frame: RuleFrame, zone_id: int, density: float, occurred_at: str,
+               entity_ids: Sequence[str] = ()) -> Dict:
+        zone = frame.zones[zone_id]
+        count = int(frame.membership.counts[zone_id])
+        area = zone.area
+        baseline_density = frame.baseline(zone_id)
+        return {
+            'anomalyId': _anomaly_id(),
+            'type': self.type,
+            'subtype': self.subtype,
+            'severity': 'CRITICAL' if density > self.critical else 'HIGH',
+            'scenario': 'CRUSH',
+            'headline': f'{zone.name} Crowd Compression Risk',
+            'description': f'Density {density:.1f} people/m², {density/baseline_density:.1f}× baseline',
+            'baselineText': f'Normal density: {baseline_density:.1f} people/m²',
+            'anomalyText': f'Current density: {density:.1f} people/m² ({count} in {area:.0f}m²)',
+            'zone': zone.name,
+            'location': zone.center if hasattr(zone, 'center') else {'x': 0, 'y': 0, 'z': 0},
+            'entityIds': list(entity_ids),
+            'metrics': {
+                'baselineDelta': ((density / baseline_density) - 1) * 100,
+                'confidence': 0.95,
+                'riskScore': min(density * 15, 100)
+            },
+            'occurredAt': occurred_at,
+            'ruleOfThreeHit': False
+        }
+
+
+class SpeedRule(Rule):
+    """Horizontal speed above ``factor`` × the role's expected maximum (m/s)."""
+
+    type = 'KINETICS'
+    subtype = 'SPEED_VIOLATION'
+    depends = 'velocity'
+    # Fast sprinting, officials, walking speed for spectators and everyone else
+    thresholds = {'PLAYER': 10.0, 'OFFICIAL': 5.0, 'default': 2.0}
+    factor = 1.5
+
+    def evaluate(self, frame: RuleFrame, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        velocities = frame.velocities[rows]
+        speed = np.sqrt(velocities[:, 0]**2 + velocities[:, 1]**2)
+        hit = frame.is_person[rows] & (speed > frame.by_role(self.thresholds, rows) * self.factor)
+        return hit, speed
+
+    def record(self, frame: RuleFrame, row: int, speed: float, occurred_at: str) -> Dict:
+        entity = frame.entities[row]
+        role = entity.get('role', 'SPECTATOR')
+        max_speed = frame.by_role(self.thresholds, np.array([row]))[0]
+        return {
+            'anomalyId': _anomaly_id(),
+            'type': self.type,
+            'subtype': self.subtype,
+            'severity': 'MEDIUM',
+            'headline': f'Excessive Speed: {entity["id"]}',
+            'description': f'Entity moving at {speed:.1f} m/s, {(speed/max_speed):.1f}× expected',
+            'baselineText': f'Expected max speed: {max_speed:.1f} m/s for {role}',
+            'anomalyText': f'Current speed: {speed:.1f} m/s',
+            'zone': 'UNKNOWN',  # TODO: Determine zone from position
+            'location': dict(entity['position']),
+            'entityIds': [entity['id']],
+            'metrics': {
+                'baselineDelta': ((speed / max_speed) - 1) * 100,
+                'confidence': 0.88,
+                'riskScore': min(speed * 8, 100)
+            },
+            'occurredAt': occurred_at,
+            'ruleOfThreeHit': False
+        }
+
+
+class LoiteringRule(Rule):
+    """A person staying within a ``box`` metre square for longer than the role's dwell time (s)."""
+
+    type = 'ATMOSPHERICS'
+    subtype = 'LOITERING'
+    depends = 'time'
+    thresholds = {'default': 15.0}
+    box = 3.0
+    # Assuming ~3 fps checks, 30 samples ~ 10s of data
+    min_samples = 30
+
+    def evaluate(self, frame: RuleFrame, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        x_range, y_range, duration, samples = (column[rows] for column in frame.dwell)
+        hit = (frame.is_person[rows] & (samples >= self.min_samples) &
+               (x_range < self.box) & (y_range < self.box) &
+               (duration > frame.by_role(self.thresholds, rows)))
+        return hit, duration
+
+    def record(self, frame: RuleFrame, row: int, duration: float, occurred_at: str) -> Dict:
+        eid = frame.ids[row]
+        x, y, z = frame.positions[row].tolist()
+        return {
+            'anomalyId': _anomaly_id(),
+            'type': self.type,
+            'subtype': self.subtype,
+            'severity': 'LOW',
+            'headline': f'Loitering Detected: {eid}',
+            'description': f'Entity remained in 3m radius for > 15s',
+            'baselineText': 'Normal transit time: < 10s',
+            'anomalyText': f'Stationary duration: {duration:.1f}s',
+            'zone': 'UNKNOWN',
+            'location': {'x': x, 'y': y, 'z': z},
+            'entityIds': [eid],
+            'metrics': {
+                'baselineDelta': 50,
+                'confidence': 0.85,
+                'riskScore': 40
+            },
+            'occurredAt': occurred_at,
+            'ruleOfThreeHit': False
+        }
+
+
+class RestrictedZoneRule(Rule):
+    """Anyone inside a RESTRICTED zone whose role is not in ``exempt_roles``."""
+
+    type = 'GEOGRAPHICS'
+    subtype = 'RESTRICTED_ZONE_ENTRY'
+    scope = 'member'
+    depends = 'position'
+    zone_types = ('RESTRICTED',)
+    # Players allowed in restricted zones
+    exempt_roles = ('PLAYER',)
+
+    def evaluate(self, frame: RuleFrame, rows: np.ndarray, zone_id: int) -> np.ndarray:
+        exempt = np.array([label in self.exempt_roles for label in frame.role_labels], dtype=bool)
+        return ~exempt[frame.role_codes[rows]]
+
+    def record(self, frame: RuleFrame, index: Tuple[int, int], value: float, occurred_at: str) -> Dict:
+        row, zone_id = index
+        entity = frame.entities[row]
+        zone = frame.zones[zone_id]
+        return {
+            'anomalyId': _anomaly_id(),
+            'type': self.type,
+            'subtype': self.subtype,
+            'severity': 'HIGH',
+            'headline': f'Unauthorized Entry: {zone.name}',
+            'description': f'{entity["id"]} entered restricted zone',
+            'baselineText': f'Zone {zone.name} is restricted',
+            'anomalyText': f'{entity.get("role", "UNKNOWN")} entity detected in zone',
+            'zone': zone.name,
+            'location': dict(entity['position']),
+            'entityIds': [entity['id']],
+            'metrics': {
+                'baselineDelta': 100,
+                'confidence': 0.92,
+                'riskScore': 75
+            },
+            'occurredAt': occurred_at,
+            'ruleOfThreeHit': False
+        }
+
+
+def default_rules() -> List[Rule]:
+    """The built-in rules, in the order their anomalies are reported."""
+    return [CrowdCompressionRule(), SpeedRule(), LoiteringRule(), RestrictedZoneRule()]
+
+
+class RuleEngine:
+    """
+    Evaluates rules in one pass, keeping each rule's hits between passes so
+    only what its ``depends`` says may have changed is re-evaluated.
+    """
+
+    def __init__(self, rules: Sequence[Rule]):
+        self.rules = list(rules)
+        self._state: List[Optional[object]] = [None] * len(self.rules)
+
+    def reset(self):
+        self._state = [None] * len(self.rules)
+
+    def evaluate(self, frame: RuleFrame, changes: Optional[tuple], affected: np.ndarray,
+                 occurred_at: str) -> List[Dict]:
+        """
+        Anomaly records of every rule hit. ``changes`` is (moved rows, rows whose
+        velocity changed), or None to re-evaluate everything; ``affected`` marks
+        zones whose members changed.
+        """
+        if changes is None:
+            self.reset()
+        anomalies = []
+        for i, rule in enumerate(self.rules):
+            evaluate = getattr(self, f'_{rule.scope}')
+            self._state[i] = evaluate(rule, frame, self._state[i], changes, affected, occurred_at, anomalies)
+        return anomalies
+
+    def _entity(self, rule: Rule, frame: RuleFrame, state, changes, affected, occurred_at, out):
+        n = len(frame.ids)
+        if state is None or rule.depends == 'time':
+            rows = np.arange(n)
+            state = (np.zeros(n, dtype=bool), np.zeros(n))
+        else:
+            rows = changes[1] if rule.depends == 'velocity' else changes[0]
+        hit, value = state
+        if len(rows):
+            hit[rows], value[rows] = rule.evaluate(frame, rows)
+        for row in np.flatnonzero(hit).tolist():
+            out.append(rule.record(frame, row, value[row], occurred_at))
+        return state
+
+    def _zone(self, rule: Rule, frame: RuleFrame, state, changes, affected, occurred_at, out):
+        num_zones = len(frame.zones)
+        if state is None or rule.depends == 'time':
+            zone_ids = np.arange(num_zones)
+            state = (np.zeros(num_zones, dtype=bool), np.zeros(num_zones), {})
+        else:
+            zone_ids = np.flatnonzero(affected)
+        hit, value, members = state
+        if len(zone_ids):
+            hit[zone_ids], value[zone_ids] = rule.evaluate(frame, zone_ids)
+            for zone_id in zone_ids.tolist():
+                members.pop(zone_id, None)
+                if hit[zone_id]:
+                    # Member ids of a hit zone only change when the zone is affected
+                    members[zone_id] = [frame.ids[row] for row in frame.membership.rows_in(zone_id)]
+        for zone_id in np.flatnonzero(hit).tolist():
+            out.append(rule.record(frame, zone_id, value[zone_id], occurred_at, entity_ids=members[zone_id]))
+        return state
+
+    def _member(self, rule: Rule, frame: RuleFrame, state, changes, affected, occurred_at, out):
+        full = state is None or rule.depends == 'time'
+        if full:
+            state = {}
+        for zone_id, zone in enumerate(frame.zones):
+            if zone.type not in rule.zone_types:
+                continue
+            if full or affected[zone_id] or zone_id not in state:
+                rows = frame.membership.rows_in(zone_id)
+                state[zone_id] = rows[rule.evaluate(frame, rows, zone_id)].tolist()
+            for row in state[zone_id]:
+                out.append(rule.record(frame, (row, zone_id), 1.0, occurred_at))
+        return state
+
+
+def _anomaly_id() -> str:
+    return f'ANOM_{uuid.uuid4().hex[:8]}'
@@ -0,0 +1,225 @@
+import numpy as np
+from typing import Dict, List, Sequence, Tuple
+
+class TrajectoryHistory:
+    """
+    Bounded, bucketed position history for many tracked entities.
+
+    Each track owns one row of a single 2D ring buffer with ``window / bucket_dt``
+    time buckets; a bucket keeps the running x/y extents and sample count of the
+    positions seen during it. Extents of the completed buckets are aggregated once
+    per bucket rotation, so a per-frame update is O(1) per entity: fold the new
+    sample into the current bucket and combine with the cached aggregate.
+
+    The window is bucket-granular (it spans ``window`` to ``window + bucket_dt``
+    seconds). Tracks not seen for ``ttl`` seconds are evicted; buffers grow on
+    demand up to ``max_tracks`` rows, beyond which the least recently seen tracks
+    are evicted.
+    """
+
+    def __init__(self, window: float = 60.0, bucket_dt: float = 1.0,
+                 ttl: float = 30.0, max_tracks: int = 50_000, initial_capacity: int = 1024):
+        self.window = window
+        self.bucket_dt = bucket_dt
+        self.ttl = ttl
+        self.max_tracks = max_tracks
+        self.num_buckets = int(np.ceil(window / bucket_dt)) + 1
+
+        self.capacity = 0
+        self._slot_ids: List = []
+        self._index: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._grow(min(initial_capacity, max_tracks))
+
+        self._bucket = None  # Absolute index of the current bucket
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, entity_id: str) -> bool:
+        return entity_id in self._index
+
+    def update(self, ids: Sequence[str], xy: np.ndarray, timestamp: float) -> Tuple[np.ndarray, ...]:
+        """
+        Record one sample per entity and return, per entity, the window's
+        (x_range, y_range, duration, sample_count).
+        """
+        bucket = int(np.floor(timestamp / self.bucket_dt))
+        if bucket != self._bucket:
+            self._rotate(bucket, timestamp)
+
+        n = len(ids)
+        if n == 0:
+            empty = np.zeros(0)
+            return empty, empty, empty, np.zeros(0, dtype=np.int64)
+
+        slots = self._slots_for(ids, timestamp)
+        tracked = slots >= 0
+        if not tracked.all():
+            x_range = np.full(n, np.inf)
+            y_range = np.full(n, np.inf)
+            duration = np.zeros(n)
+            samples = np.zeros(n, dtype=np.int64)
+            if tracked.any():
+                parts = self._update_slots(slots[tracked], xy[tracked], timestamp, bucket)
+                for out, part in zip((x_range, y_range, duration, samples), parts):
+                    out[tracked] = part
+            return x_range, y_range, duration, samples
+
+        return self._update_slots(slots, xy, timestamp, bucket)
+
+    def _update_slots(self, slots: np.ndarray, xy: np.ndarray, timestamp: float, bucket: int):
+        col = bucket % self.num_buckets
+        x = xy[:, 0].astype(np.float32)
+        y = xy[:, 1].astype(np.float32)
+
+        cur_min_x = np.minimum(self._min_x[slots, col], x)
+        cur_max_x = np.maximum(self._max_x[slots, col], x)
+        cur_min_y = np.minimum(self._min_y[slots, col], y)
+        cur_max_y = np.maximum(self._max_y[slots, col], y)
+        self._min_x[slots, col] = cur_min_x
+        self._max_x[slots, col] = cur_max_x
+        self._min_y[slots, col] = cur_min_y
+        self._max_y[slots, col] = cur_max_y
+        self._count[slots, col] += 1
+        self._last_seen[slots] = timestamp
+
+        x_range = np.maximum(cur_max_x, self._agg_max_x[slots]) - np.minimum(cur_min_x, self._agg_min_x[slots])
+        y_range = np.maximum(cur_max_y, self._agg_max_y[slots]) - np.minimum(cur_min_y, self._agg_min_y[slots])
+        samples = self._agg_count[slots] + self._count[slots, col]
+
+        oldest_bucket = np.minimum(self._agg_oldest[slots], bucket)
+        window_start = np.maximum(oldest_bucket * self.bucket_dt, self._first_seen[slots])
+        duration = timestamp - window_start
+
+        return x_range, y_range, duration, samples
+
+    def evict_stale(self, timestamp: float) -> int:
+        """Drop tracks not updated within ``ttl`` seconds. Returns how many were dropped."""
+        used = np.flatnonzero(self._last_seen > -np.inf)
+        stale = used[self._last_seen[used] < timestamp - self.ttl]
+        for slot in stale.tolist():
+            self._release(slot)
+        return len(stale)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _slots_for(self, ids: Sequence[str], timestamp: float) -> np.ndarray:
+        index = self._index
+        slots = np.fromiter((index.get(eid, -1) for eid in ids), dtype=np.int64, count=len(ids))
+        missing = np.flatnonzero(slots < 0)
+        if len(missing):
+            while len(missing) > len(self._free) and self.capacity < self.max_tracks:
+                self._grow(min(self.capacity * 2, self.max_tracks))
+            if len(missing) > len(self._free):
+                self._evict_oldest(len(missing) - len(self._free), keep=slots[slots >= 0])
+            # Anything beyond the cap stays untracked (slot -1) this frame
+            for i in missing[:len(self._free)].tolist():
+                slots[i] = self._allocate(ids[i], timestamp)
+        return slots
+
+    def _grow(self, capacity: int):
+        """Resize every per-track array to ``capacity`` rows (never beyond max_tracks)."""
+        old = self.capacity
+        B = self.num_buckets
+
+        def resized(name, fill, dtype, per_bucket):
+            shape = (capacity, B) if per_bucket else (capacity,)
+            grown = np.full(shape, fill, dtype=dtype)
+            if old:
+                grown[:old] = getattr(self, name)
+            setattr(self, name, grown)
+
+        for name in ('_min_x', '_min_y'):
+            resized(name, np.inf, np.float32, True)
+        for name in ('_max_x', '_max_y'):
+            resized(name, -np.inf, np.float32, True)
+        resized('_count', 0, np.int32, True)
+
+        # Aggregates over every bucket except the current one
+        for name in ('_agg_min_x', '_agg_min_y'):
+            resized(name, np.inf, np.float32, False)
+        for name in ('_agg_max_x', '_agg_max_y'):
+            resized(name, -np.inf, np.float32, False)
+        resized('_agg_count', 0, np.int64, False)
+        resized('_agg_oldest', np.iinfo(np.int64).max, np.int64, False)
+
+        resized('_first_seen', 0.0, np.float64, False)
+        resized('_last_seen', -np.inf, np.float64, False)
+
+        self._slot_ids.extend([None] * (capacity - old))
+        self._free.extend(range(capacity - 1, old - 1, -1))
+        self.capacity = capacity
+
+    def _allocate(self, entity_id: str, timestamp: float) -> int:
+        slot = self._free.pop()
+        self._index[entity_id] = slot
+        self._slot_ids[slot] = entity_id
+        self._first_seen[slot] = timestamp
+        self._last_seen[slot] = timestamp
+        return slot
+
+    def _release(self, slot: int):
+        del self._index[self._slot_ids[slot]]
+        self._slot_ids[slot] = None
+        self._min_x[slot] = np.inf
+        self._max_x[slot] = -np.inf
+        self._min_y[slot] = np.inf
+        self._max_y[slot] = -np.inf
+        self._count[slot] = 0
+        self._agg_min_x[slot] = np.inf
+        self._agg_max_x[slot] = -np.inf
+        self._agg_min_y[slot] = np.inf
+        self._agg_max_y[slot] = -np.inf
+        self._agg_count[slot] = 0
+        self._agg_oldest[slot] = np.iinfo(np.int64).max
+        self._last_seen[slot] = -np.inf
+        self._free.append(slot)
+        self.evictions += 1
+
+    def _evict_oldest(self, count: int, keep: np.ndarray):
+        """Hard memory cap: free up to ``count`` least recently seen tracks."""
+        last_seen = self._last_seen.copy()
+        last_seen[keep] = np.inf  # Never evict tracks being updated this frame
+        last_seen[last_seen == -np.inf] = np.inf  # Already free
+        candidates = int(np.isfinite(last_seen).sum())
+        count = min(count, candidates)
+        if count <= 0:
+            return
+        victims = np.argpartition(last_seen, count - 1)[:count]
+        for slot in victims.tolist():
+            self._release(slot)
+
+    def _rotate(self, bucket: int, timestamp: float):
+        """Advance to a new bucket: clear expired columns and rebuild aggregates."""
+        B = self.num_buckets
+        if self._bucket is None or bucket - self._bucket >= B or bucket < self._bucket:
+            expired = range(B)
+        else:
+            expired = [b % B for b in range(self._bucket + 1, bucket + 1)]
+        for col in expired:
+            self._min_x[:, col] = np.inf
+            self._max_x[:, col] = -np.inf
+            self._min_y[:, col] = np.inf
+            self._max_y[:, col] = -np.inf
+            self._count[:, col] = 0
+        self._bucket = bucket
+
+        self.evict_stale(timestamp)
+
+        # Aggregate the completed buckets (all columns but the current one)
+        col = bucket % B
+        others = np.r_[0:col, col + 1:B]
+        self._agg_min_x = self._min_x[:, others].min(axis=1)
+        self._agg_max_x = self._max_x[:, others].max(axis=1)
+        self._agg_min_y = self._min_y[:, others].min(axis=1)
+        self._agg_max_y = self._max_y[:, others].max(axis=1)
+        counts = self._count[:, others]
+        self._agg_count = counts.sum(axis=1, dtype=np.int64)
+
+        # Absolute bucket index of the oldest non-empty completed bucket
+        ages = (col - others) % B  # 1 = previous bucket, B - 1 = oldest
+        age = np.where(counts > 0, ages, 0).max(axis=1)
+        self._agg_oldest = np.where(age > 0, bucket - age, np.iinfo(np.int64).max)
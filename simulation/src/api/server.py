@@ -1,23 +1,50 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
+import json
 import uvicorn
 import os
+from typing import Optional
 
 from src.core.orchestrator import SimulationOrchestrator
+from src.core.recorder import resolve_recording_path
+from src.core.session_manager import (
+    SessionManager, SessionNotFound, SessionLimitExceeded, apply_runtime_config, orchestrator_status
+)
+from src.api.stream_hub import StreamHub, PointCloudHub, MJPEG_BOUNDARY, length_prefixed
+from src.nodes.pointcloud import CODECS, DEFAULT_CODEC, LOD_VOXELS, MIN_VOXEL
 
 orchestrator = None
+session_manager = None
+stream_hub = StreamHub()
+lidar_hub = PointCloudHub()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    global orchestrator
+    global orchestrator, session_manager
     # Initialize with default config
     orchestrator = SimulationOrchestrator({})
+    # Camera frames are fanned out to stream viewers by the hub
+    stream_hub.bind_loop(asyncio.get_running_loop())
+    orchestrator.camera_frame_listeners.append(stream_hub.publish)
+    lidar_hub.bind_loop(asyncio.get_running_loop())
+    orchestrator.lidar_frame_listeners.append(lidar_hub.publish)
+    # Additional independent sessions (SESSION_WORKERS > 0 hosts them in worker processes)
+    session_manager = SessionManager(
+        workers=int(os.environ.get('SESSION_WORKERS', 0)),
+        max_sessions=int(os.environ.get('MAX_SESSIONS', 32)),
+        on_frame=lambda session_id, node_id, frame: stream_hub.publish(_session_stream(session_id, node_id), frame)
+    )
     print("Simulation Engine Starting...")
     yield
     # Shutdown
+    stream_hub.close()
+    lidar_hub.close()
+    if session_manager:
+        session_manager.close()
     if orchestrator:
         orchestrator.stop()
     print("Simulation Engine Stopping...")
@@ -52,43 +79,241 @@ async def stop_simulation():
     orchestrator.stop()
     return {"status": "stopped"}
 
+@app.post("/simulation/recording/start")
+async def start_recording(config: dict):
+    if not orchestrator:
+        raise HTTPException(status_code=503, detail="Orchestrator not initialized")
+    if not config.get('path'):
+        raise HTTPException(status_code=400, detail="Recording path required")
+    try:
+        # Client paths are names under RECORDINGS_DIR, never arbitrary locations
+        path = resolve_recording_path(config['path'])
+        orchestrator.start_recording(path, record_lidar=config.get('lidar', False))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"status": "recording", "path": config['path']}
+
+@app.post("/simulation/recording/stop")
+async def stop_recording():
+    if not orchestrator:
+        raise HTTPException(status_code=503, detail="Orchestrator not initialized")
+    path = orchestrator.stop_recording()
+    return {"status": "stopped", "path": path}
+
+@app.post("/simulation/headless")
+def run_headless(config: dict):
+    """
+    Fast-forward a separate simulation instance (no wall-clock pacing) and stream
+    one NDJSON line per frame, followed by a summary line.
+    Body: sport, frames | duration, dt, seed, nodes, sampleEvery, includeEntities.
+    """
+    if config.get('frames') is None and config.get('duration') is None:
+        raise HTTPException(status_code=400, detail="Specify frames or duration")
+
+    sim = SimulationOrchestrator({
+        key: config[key] for key in ('physics', 'seed', 'sensorWorkers') if key in config
+    })
+    for node_config in config.get('nodes', []):
+        sim.add_node(node_config)
+    seed = config.get('seed')
+    if seed is not None:
+        sim.reseed(seed)
+    sim.load_scenario(config.get('sport', 'BASKETBALL'), config)
+
+    return StreamingResponse(_headless_lines(sim, config), media_type="application/x-ndjson")
+
+def _headless_lines(sim: SimulationOrchestrator, config: dict):
+    sample_every = max(int(config.get('sampleEvery', 1)), 1)
+    include_entities = config.get('includeEntities', True)
+    frame_count = anomaly_count = 0
+    for result in sim.iter_headless(frames=config.get('frames'), duration=config.get('duration'), dt=config.get('dt')):
+        frame_count += 1
+        anomaly_count += len(result['anomalies'])
+        if result['frame'] % sample_every and not result['anomalies']:
+            continue
+        line = {'frame': result['frame'], 'time': result['time'], 'anomalies': result['anomalies']}
+        if include_entities and result['frame'] % sample_every == 0:
+            line['entities'] = result['entities'].to_records()
+        yield json.dumps(line, default=_json_default) + '\n'
+    yield json.dumps({'summary': {'frames': frame_count, 'simTime': sim.current_time, 'anomalies': anomaly_count}}) + '\n'
+
+def _json_default(value):
+    # NumPy scalars inside anomaly metrics
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
 @app.get("/nodes/{node_id}/stream")
 async def get_stream(node_id: str):
     if not orchestrator:
         raise HTTPException(status_code=503, detail="Orchestrator not initialized")
     
+    if not any(node.node_id == node_id for node in orchestrator.nodes):
+        raise HTTPException(status_code=404, detail=f"Node {node_id} not found")
+
     return StreamingResponse(
-        orchestrator.get_video_stream(node_id), 
-        media_type="multipart/x-mixed-replace; boundary=frame"
+        stream_hub.subscribe(node_id),
+        media_type=f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}"
     )
 
+def _lidar_stream_options(node_id: str, lod: str, voxel: Optional[float], codec: Optional[str], rate: float):
+    """Validate a LIDAR stream request; returns (voxel, codec)."""
+    if not orchestrator:
+        raise HTTPException(status_code=503, detail="Orchestrator not initialized")
+    node = next((node for node in orchestrator.nodes if node.node_id == node_id), None)
+    if node is None or node.lidar is None:
+        raise HTTPException(status_code=404, detail=f"Node {node_id} has no LIDAR")
+    if voxel is None:
+        if lod not in LOD_VOXELS:
+            raise HTTPException(status_code=400, detail=f"Unknown lod: {lod} (one of {', '.join(LOD_VOXELS)})")
+        voxel = LOD_VOXELS[lod]
+    elif not voxel >= MIN_VOXEL:
+        raise HTTPException(status_code=400, detail=f"voxel must be at least {MIN_VOXEL}")
+    if not rate > 0:
+        raise HTTPException(status_code=400, detail="rate must be positive")
+    codec = codec or DEFAULT_CODEC
+    if codec not in CODECS:
+        raise HTTPException(status_code=400, detail=f"Unknown codec: {codec}")
+    return voxel, codec
+
+@app.get("/nodes/{node_id}/lidar/stream")
+async def get_lidar_stream(node_id: str, lod: str = 'medium', voxel: Optional[float] = None,
+                           codec: Optional[str] = None, rate: float = 10.0):
+    """
+    Chunked binary stream of a node's point clouds: each message is a uint32
+    little-endian length followed by an encoded cloud (see nodes.pointcloud).
+    """
+    voxel, codec = _lidar_stream_options(node_id, lod, voxel, codec, rate)
+
+    async def messages():
+        async for message in lidar_hub.subscribe_clouds(node_id, voxel=voxel, codec=codec, rate=rate):
+            yield length_prefixed(message)
+
+    return StreamingResponse(messages(), media_type="application/octet-stream")
+
+@app.websocket("/nodes/{node_id}/lidar/ws")
+async def lidar_websocket(websocket: WebSocket, node_id: str, lod: str = 'medium',
+                          voxel: Optional[float] = None, codec: Optional[str] = None, rate: float = 10.0):
+    """One binary WebSocket message per encoded cloud."""
+    try:
+        voxel, codec = _lidar_stream_options(node_id, lod, voxel, codec, rate)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=e.detail)
+        return
+    await websocket.accept()
+    try:
+        async for message in lidar_hub.subscribe_clouds(node_id, voxel=voxel, codec=codec, rate=rate):
+            await websocket.send_bytes(message)
+    except WebSocketDisconnect:
+        pass
+
 @app.get("/simulation/status")
 async def get_status():
     if not orchestrator:
         return {"running": False, "error": "Orchestrator not initialized"}
     
-    return {
-        "running": orchestrator.running,
-        "paused": orchestrator.paused,
-        "active_scenario": orchestrator.scenario.sport if orchestrator.scenario else None,
-        "fps": getattr(orchestrator, 'actual_fps', 0),
-        "target_fps": getattr(orchestrator, 'target_fps', 30),
-        "entity_count": len(orchestrator.entities)
-    }
+    return dict(orchestrator_status(orchestrator), streams=stream_hub.get_stats(),
+                lidarStreams=lidar_hub.get_stats())
+
+@app.get("/simulation/metrics")
+async def get_metrics():
+    """Stage timings, overruns and per-node sensor timings in Prometheus text format."""
+    if not orchestrator:
+        raise HTTPException(status_code=503, detail="Orchestrator not initialized")
+    return PlainTextResponse(
+        orchestrator.metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
 
 @app.patch("/simulation/config")
 async def update_config(config: dict):
     if not orchestrator:
          return {"error": "Orchestrator not initialized"}
     
-    if 'targetFps' in config:
-        orchestrator.target_fps = config['targetFps']
-    
-    if 'anomalyRate' in config and hasattr(orchestrator, 'anomaly_generator'):
-        orchestrator.anomaly_generator.anomaly_rate = config['anomalyRate']
+    try:
+        apply_runtime_config(orchestrator, config)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     return {"status": "updated", "config": config}
 
+# ----------------------------------------------------------------------
+# Sessions: independent simulations keyed by session id
+# ----------------------------------------------------------------------
+def _session_stream(session_id: str, node_id: str) -> str:
+    return f"{session_id}/{node_id}"
+
+def _session_call(method, *args):
+    if not session_manager:
+        raise HTTPException(status_code=503, detail="Session manager not initialized")
+    try:
+        return method(session_manager, *args)
+    except SessionNotFound as e:
+        raise HTTPException(status_code=404, detail=f"Session {e} not found")
+    except SessionLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/sessions")
+def create_session(spec: dict):
+    """Body: sessionId?, sport, scenario, nodes, config, limits."""
+    return _session_call(SessionManager.create, spec, spec.get('sessionId'))
+
+@app.get("/sessions")
+def list_sessions():
+    return {"sessions": _session_call(SessionManager.list)}
+
+@app.post("/sessions/{session_id}/start")
+def start_session(session_id: str):
+    return _session_call(SessionManager.start, session_id)
+
+@app.post("/sessions/{session_id}/stop")
+def stop_session(session_id: str):
+    return _session_call(SessionManager.stop, session_id)
+
+@app.get("/sessions/{session_id}/status")
+def get_session_status(session_id: str):
+    return _session_call(SessionManager.status, session_id)
+
+@app.get("/sessions/{session_id}/metrics")
+def get_session_metrics(session_id: str):
+    return PlainTextResponse(
+        _session_call(SessionManager.metrics, session_id),
+        media_type="text/plain; version=0.0.4"
+    )
+
+@app.patch("/sessions/{session_id}/config")
+def update_session_config(session_id: str, config: dict):
+    return _session_call(SessionManager.update, session_id, config)
+
+@app.delete("/sessions/{session_id}")
+def delete_session(session_id: str):
+    _session_call(SessionManager.delete, session_id)
+    stream_hub.close_prefix(f"{session_id}/")
+    return {"status": "deleted", "sessionId": session_id}
+
+@app.get("/sessions/{session_id}/nodes/{node_id}/stream")
+def get_session_stream(session_id: str, node_id: str):
+    status = _session_call(SessionManager.status, session_id)
+    if node_id not in status['nodes']:
+        raise HTTPException(status_code=404, detail=f"Node {node_id} not found")
+    _session_call(SessionManager.watch, session_id, node_id, True)
+
+    async def frames():
+        try:
+            async for chunk in stream_hub.subscribe(_session_stream(session_id, node_id)):
+                yield chunk
+        finally:
+            try:
+                await asyncio.to_thread(session_manager.watch, session_id, node_id, False)
+            except SessionNotFound:
+                pass
+
+    return StreamingResponse(frames(), media_type=f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}")
+
 @app.post("/nodes/{node_id}/calibrate")
 async def calibrate_node(node_id: str):
     """Simulate calibration for a node."""
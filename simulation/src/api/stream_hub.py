@@ -0,0 +1,231 @@
+import asyncio
+import struct
+import threading
+from contextlib import aclosing
+from typing import AsyncIterator, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from ..nodes.pointcloud import DEFAULT_CODEC, encode_cloud
+
+MJPEG_BOUNDARY = 'frame'
+
+
+class _Channel:
+    """Latest frame of one node plus the future its viewers are waiting on."""
+
+    def __init__(self):
+        self.seq = 0
+        self.frame: Optional[bytes] = None
+        self.viewers = 0
+        self.closed = False
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self._chunk: Optional[bytes] = None
+        self._chunk_seq = 0
+        self._waiter: Optional[asyncio.Future] = None
+        self._wake_pending = False
+
+    def chunk(self):
+        """(seq, multipart chunk) for the latest frame, built at most once per frame."""
+        if self._chunk_seq != self.seq:
+            self._chunk = (
+                b'--' + MJPEG_BOUNDARY.encode() + b'\r\n'
+                b'Content-Type: image/jpeg\r\n\r\n' + self.frame + b'\r\n'
+            )
+            self._chunk_seq = self.seq
+        return self._chunk_seq, self._chunk
+
+
+class StreamHub:
+    """
+    Per-node MJPEG broadcast hub.
+
+    The simulation thread calls ``publish`` with each new JPEG; it only swaps a
+    reference and bumps the node's sequence number, and wakes the event loop when
+    the node has viewers. Viewers await the next sequence number instead of
+    polling, always take the latest frame (slow clients skip intermediate ones)
+    and share one multipart chunk per frame, so a node with no viewers costs
+    nothing and extra viewers cost no extra encoding.
+    """
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self._loop = loop
+        self._lock = threading.Lock()
+        self._channels: Dict[str, _Channel] = {}
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+    def publish(self, node_id: str, frame: bytes):
+        """Thread-safe: record a node's new frame and wake its viewers."""
+        with self._lock:
+            channel = self._channel(node_id)
+            channel.seq += 1
+            channel.frame = frame
+            if not channel.viewers or channel._wake_pending or self._loop is None:
+                return
+            channel._wake_pending = True
+        self._loop.call_soon_threadsafe(self._wake, channel)
+
+    async def subscribe(self, node_id: str) -> AsyncIterator[bytes]:
+        """Yield multipart chunks of a node's frames until the hub closes."""
+        async with aclosing(self._follow(node_id, _Channel.chunk)) as chunks:
+            async for chunk in chunks:
+                yield chunk
+
+    async def _follow(self, node_id: str, render: Callable[[_Channel], Tuple[int, object]]):
+        """
+        Yield ``render(channel)`` (called under the lock, returns (seq, item))
+        each time a newer frame is available, skipping frames a slow consumer missed.
+        """
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        with self._lock:
+            channel = self._channel(node_id)
+            channel.viewers += 1
+        last_seq = 0
+        try:
+            while not channel.closed:
+                if channel.frame is None or channel.seq == last_seq:
+                    await self._wait(channel)
+                    continue
+                with self._lock:
+                    seq, item = render(channel)
+                if last_seq:
+                    channel.frames_dropped += seq - last_seq - 1
+                last_seq = seq
+                channel.frames_sent += 1
+                yield item
+        finally:
+            with self._lock:
+                channel.viewers -= 1
+
+    def close(self, node_id: Optional[str] = None):
+        """End the streams of one node (or every node)."""
+        with self._lock:
+            channels = list(self._channels.values()) if node_id is None else [self._channel(node_id)]
+            for channel in channels:
+                channel.closed = True
+        if self._loop is not None:
+            for channel in channels:
+                self._loop.call_soon_threadsafe(self._wake, channel)
+
+    def close_prefix(self, prefix: str):
+        """End and forget every stream whose key starts with ``prefix`` (a deleted session)."""
+        with self._lock:
+            keys = [key for key in self._channels if key.startswith(prefix)]
+            channels = [self._channels.pop(key) for key in keys]
+            for channel in channels:
+                channel.closed = True
+        if self._loop is not None:
+            for channel in channels:
+                self._loop.call_soon_threadsafe(self._wake, channel)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                node_id: {
+                    'seq': channel.seq,
+                    'viewers': channel.viewers,
+                    'framesSent': channel.frames_sent,
+                    'framesDropped': channel.frames_dropped
+                }
+                for node_id, channel in self._channels.items()
+            }
+
+    def _channel(self, node_id: str) -> _Channel:
+        # Callers hold self._lock
+        channel = self._channels.get(node_id)
+        if channel is None:
+            channel = self._channels[node_id] = _Channel()
+        return channel
+
+    async def _wait(self, channel: _Channel):
+        if channel._waiter is None or channel._waiter.done():
+            channel._waiter = asyncio.get_running_loop().create_future()
+        await channel._waiter
+
+    def _wake(self, channel: _Channel):
+        """Runs on the event loop: release everyone waiting on the channel."""
+        with self._lock:
+            channel._wake_pending = False
+        waiter, channel._waiter = channel._waiter, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+
+class PointCloudHub(StreamHub):
+    """
+    Per-node LIDAR broadcast. ``publish`` takes a node's raw (N, 4) float32
+    cloud; each viewer chooses a voxel size (level of detail), codec and rate.
+    A frame is downsampled and encoded once per (voxel, codec) however many
+    viewers share it, off the event loop.
+
+    Published clouds may be pooled buffers the simulation overwrites later, so
+    the hub keeps a copy, and only of nodes that have viewers.
+    """
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        super().__init__(loop)
+        # node_id -> (seq, {(voxel, codec): message}, lock held while encoding that frame)
+        self._encoded: Dict[str, Tuple[int, Dict[tuple, bytes], threading.Lock]] = {}
+        self._encode_lock = threading.Lock()
+
+    async def subscribe_clouds(self, node_id: str, voxel: Optional[float] = None,
+                               codec: str = DEFAULT_CODEC, rate: Optional[float] = None) -> AsyncIterator[bytes]:
+        """Yield encoded clouds (see nodes.pointcloud) at most ``rate`` times a second."""
+        interval = 1.0 / rate if rate else 0.0
+        loop = asyncio.get_running_loop()
+        latest = self._follow(node_id, lambda channel: (channel.seq, (channel.seq, channel.frame)))
+        async with aclosing(latest) as clouds:
+            async for seq, (cloud, timestamp) in clouds:
+                started = loop.time()
+                yield await asyncio.to_thread(self._encode, node_id, seq, cloud, timestamp, voxel, codec)
+                if interval:
+                    # Frames published meanwhile are skipped; the next one sent is the latest
+                    await asyncio.sleep(max(started + interval - loop.time(), 0.0))
+
+    def publish(self, node_id: str, cloud: np.ndarray, timestamp: float = 0.0):
+        """
+        Thread-safe: keep a copy of a watched node's new cloud, with its
+        simulation timestamp for the message header, and wake its viewers.
+        """
+        with self._lock:
+            channel = self._channel(node_id)
+            channel.seq += 1
+            if not channel.viewers:
+                channel.frame = None
+                return
+            channel.frame = (cloud.copy(), timestamp)
+            if channel._wake_pending or self._loop is None:
+                return
+            channel._wake_pending = True
+        self._loop.call_soon_threadsafe(self._wake, channel)
+
+    def close_prefix(self, prefix: str):
+        super().close_prefix(prefix)
+        with self._encode_lock:
+            for node_id in [key for key in self._encoded if key.startswith(prefix)]:
+                del self._encoded[node_id]
+
+    def _encode(self, node_id: str, seq: int, cloud: np.ndarray, timestamp: float,
+                voxel: Optional[float], codec: str) -> bytes:
+        with self._encode_lock:
+            entry = self._encoded.get(node_id)
+            if entry is None or entry[0] != seq:
+                entry = self._encoded[node_id] = (seq, {}, threading.Lock())
+        _, messages, frame_lock = entry
+        # Viewers of the same frame wait for one encoding instead of repeating it
+        with frame_lock:
+            message = messages.get((voxel, codec))
+            if message is None:
+                message = messages[(voxel, codec)] = encode_cloud(
+                    cloud, seq=seq, timestamp=timestamp, voxel=voxel, codec=codec
+                )
+        return message
+
+
+def length_prefixed(message: bytes) -> bytes:
+    """Frame a binary message for a chunked HTTP stream: uint32 little-endian length, then the bytes."""
+    return struct.pack('<I', len(message)) + message
@@ -0,0 +1,484 @@
+import numpy as np
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+_AXES = ('x', 'y', 'z')
+_AXIS_INDEX = {'x': 0, 'y': 1, 'z': 2}
+_VECTOR_FIELDS = ('position', 'velocity')
+_CATEGORICAL_FIELDS = ('type', 'role', 'team')
+# Per-entity attributes carried alongside positions in published snapshots
+SNAPSHOT_ATTRIBUTES = ('type', 'role', 'team', 'color', 'radius', 'severity')
+
+
+class Vec3View(MutableMapping):
+    """
+    Live {'x', 'y', 'z'} view onto one row of a store vector column.
+    Reads and writes go straight to the underlying NumPy array.
+    """
+
+    __slots__ = ('_entity', '_field')
+
+    def __init__(self, entity: 'EntityView', field: str):
+        self._entity = entity
+        self._field = field
+
+    def _row(self) -> np.ndarray:
+        return self._entity._store._vectors[self._field][self._entity._row]
+
+    def __getitem__(self, axis: str) -> float:
+        return float(self._row()[_AXIS_INDEX[axis]])
+
+    def __setitem__(self, axis: str, value: float):
+        self._row()[_AXIS_INDEX[axis]] = value
+
+    def __delitem__(self, axis: str):
+        raise TypeError(f"Cannot delete axis '{axis}' from a {self._field} vector")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(_AXES)
+
+    def __len__(self) -> int:
+        return 3
+
+    def __array__(self, dtype=None, copy=None):
+        return np.array(self._row(), dtype=dtype)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class EntityView(MutableMapping):
+    """
+    Dict-compatible view of a single entity row in an EntityStore.
+    Lets scenario code written against plain dicts keep working unchanged.
+    """
+
+    __slots__ = ('_store', '_row', '_vectors')
+
+    def __init__(self, store: 'EntityStore', row: int):
+        self._store = store
+        self._row = row
+        self._vectors = {f: Vec3View(self, f) for f in _VECTOR_FIELDS}
+
+    def __getitem__(self, key: str) -> Any:
+        store = self._store
+        if key == 'id':
+            return store._ids[self._row]
+        if key in _VECTOR_FIELDS:
+            return self._vectors[key]
+        if key in _CATEGORICAL_FIELDS:
+            code = store._codes[key][self._row]
+            if code == 0:
+                raise KeyError(key)
+            return store._labels[key][code]
+        if key == 'radius':
+            radius = store._radius[self._row]
+            if np.isnan(radius):
+                raise KeyError(key)
+            return float(radius)
+        return store._extras[self._row][key]
+
+    def __setitem__(self, key: str, value: Any):
+        store = self._store
+        if key == 'id':
+            store._rename(self._row, value)
+        elif key in _VECTOR_FIELDS:
+            store._vectors[key][self._row] = _as_vector(value)
+        elif key in _CATEGORICAL_FIELDS:
+            store._codes[key][self._row] = store._intern(key, value)
+            store.attr_version += 1
+        elif key == 'radius':
+            store._radius[self._row] = np.nan if value is None else value
+            store.attr_version += 1
+        else:
+            store._extras[self._row][key] = value
+            store.attr_version += 1
+
+    def __delitem__(self, key: str):
+        if key not in self:
+            raise KeyError(key)
+        store = self._store
+        if key == 'id' or key in _VECTOR_FIELDS:
+            raise TypeError(f"Cannot delete required field '{key}'")
+        if key in _CATEGORICAL_FIELDS:
+            store._codes[key][self._row] = 0
+        elif key == 'radius':
+            store._radius[self._row] = np.nan
+        else:
+            del store._extras[self._row][key]
+        store.attr_version += 1
+
+    def __iter__(self) -> Iterator[str]:
+        store = self._store
+        yield 'id'
+        for field in _CATEGORICAL_FIELDS:
+            if store._codes[field][self._row] != 0:
+                yield field
+        yield from _VECTOR_FIELDS
+        if not np.isnan(store._radius[self._row]):
+            yield 'radius'
+        yield from store._extras[self._row]
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a detached plain-dict snapshot of this entity."""
+        snapshot = {}
+        for key in self:
+            value = self[key]
+            snapshot[key] = dict(value) if isinstance(value, Vec3View) else value
+        return snapshot
+
+    def __repr__(self) -> str:
+        return f"EntityView({self.to_dict()!r})"
+
+
+class EntityStore:
+    """
+    Structure-of-arrays entity table.
+
+    Positions, velocities, radii and categorical columns (type/role/team) live in
+    contiguous NumPy arrays so stages can operate on every entity at once. Iterating
+    the store yields dict-compatible EntityView rows, so code that expects the old
+    list-of-dicts (``for e in entities``, ``entities.append({...})``) still works.
+    """
+
+    def __init__(self, capacity: int = 256):
+        capacity = max(int(capacity), 1)
+        self._count = 0
+        self._vectors = {f: np.zeros((capacity, 3), dtype=np.float64) for f in _VECTOR_FIELDS}
+        self._radius = np.full(capacity, np.nan, dtype=np.float64)
+        self._codes = {f: np.zeros(capacity, dtype=np.int16) for f in _CATEGORICAL_FIELDS}
+        # Code 0 is reserved for "field not set"
+        self._labels: Dict[str, List[Optional[str]]] = {f: [None] for f in _CATEGORICAL_FIELDS}
+        self._label_codes: Dict[str, Dict[str, int]] = {f: {} for f in _CATEGORICAL_FIELDS}
+        self._ids: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._extras: List[Dict[str, Any]] = []
+        self._views: List[EntityView] = []
+        # Bumped whenever rows are added, removed or renamed
+        self.version = 0
+        # Bumped whenever a non-vector attribute changes through a view
+        self.attr_version = 0
+        self._snapshot_cache = None
+
+    # ------------------------------------------------------------------
+    # Column access
+    # ------------------------------------------------------------------
+    @property
+    def positions(self) -> np.ndarray:
+        """(N, 3) writable view of entity positions."""
+        return self._vectors['position'][:self._count]
+
+    @property
+    def velocities(self) -> np.ndarray:
+        """(N, 3) writable view of entity velocities."""
+        return self._vectors['velocity'][:self._count]
+
+    @property
+    def radii(self) -> np.ndarray:
+        """(N,) writable view of entity radii (NaN where unset)."""
+        return self._radius[:self._count]
+
+    @property
+    def type_codes(self) -> np.ndarray:
+        return self._codes['type'][:self._count]
+
+    @property
+    def role_codes(self) -> np.ndarray:
+        return self._codes['role'][:self._count]
+
+    @property
+    def team_codes(self) -> np.ndarray:
+        return self._codes['team'][:self._count]
+
+    @property
+    def ids(self) -> List[str]:
+        """Entity ids in row order. Treat as read-only."""
+        return self._ids
+
+    def labels(self, field: str) -> List[Optional[str]]:
+        """Code -> label table for a categorical field (index 0 is None)."""
+        return self._labels[field]
+
+    def code_for(self, field: str, label: Optional[str]) -> int:
+        """Return the code for a label, or -1 if the label has never been stored."""
+        if label is None:
+            return 0
+        return self._label_codes[field].get(label, -1)
+
+    def mask(self, **criteria: Optional[str]) -> np.ndarray:
+        """Boolean row mask, e.g. ``store.mask(type='PERSON', role='PLAYER')``."""
+        result = np.ones(self._count, dtype=bool)
+        for field, label in criteria.items():
+            result &= self._codes[field][:self._count] == self.code_for(field, label)
+        return result
+
+    # ------------------------------------------------------------------
+    # Row access
+    # ------------------------------------------------------------------
+    def row_of(self, entity_id: str) -> int:
+        """Row index for an entity id. Raises KeyError if unknown."""
+        return self._index[entity_id]
+
+    def get(self, entity_id: str, default: Any = None) -> Any:
+        row = self._index.get(entity_id)
+        return default if row is None else self._views[row]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[EntityView]:
+        return iter(self._views)
+
+    def __getitem__(self, index):
+        return self._views[index]
+
+    def __contains__(self, item: object) -> bool:
+        if isinstance(item, EntityView):
+            return item._store is self
+        return item in self._index
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    # ------------------------------------------------------------------
+    # Mutation
+    # ------------------------------------------------------------------
+    def append(self, entity: Dict[str, Any]) -> EntityView:
+        """Add an entity described by a plain dict and return its live view."""
+        entity_id = entity['id']
+        if entity_id in self._index:
+            raise ValueError(f"Duplicate entity id: {entity_id}")
+
+        row = self._count
+        self._reserve(row + 1)
+        self._count += 1
+        self._ids.append(entity_id)
+        self._index[entity_id] = row
+        self._extras.append({})
+
+        for field in _VECTOR_FIELDS:
+            self._vectors[field][row] = _as_vector(entity.get(field))
+        self._radius[row] = np.nan if entity.get('radius') is None else entity['radius']
+        for field in _CATEGORICAL_FIELDS:
+            self._codes[field][row] = self._intern(field, entity.get(field))
+
+        extras = self._extras[row]
+        for key, value in entity.items():
+            if key not in ('id', 'radius') and key not in _VECTOR_FIELDS and key not in _CATEGORICAL_FIELDS:
+                extras[key] = value
+
+        view = EntityView(self, row)
+        self._views.append(view)
+        self.version += 1
+        return view
+
+    def extend(self, entities: Iterable[Dict[str, Any]]):
+        for entity in entities:
+            self.append(entity)
+
+    def remove(self, entity_id: str):
+        """Remove an entity by swapping the last row into its slot (O(1))."""
+        row = self._index.pop(entity_id)
+        last = self._count - 1
+
+        if row != last:
+            for column in self._vectors.values():
+                column[row] = column[last]
+            self._radius[row] = self._radius[last]
+            for column in self._codes.values():
+                column[row] = column[last]
+            moved_id = self._ids[last]
+            self._ids[row] = moved_id
+            self._index[moved_id] = row
+            self._extras[row] = self._extras[last]
+            self._views[row] = self._views[last]
+            self._views[row]._row = row
+
+        self._ids.pop()
+        self._extras.pop()
+        self._views.pop()
+        self._count -= 1
+        self._clear_row(last)
+        self.version += 1
+
+    def clear(self):
+        for row in range(self._count):
+            self._clear_row(row)
+        self._count = 0
+        self._ids.clear()
+        self._index.clear()
+        self._extras.clear()
+        self._views.clear()
+        self.version += 1
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Detached plain-dict snapshot of every entity (e.g. for JSON payloads)."""
+        return [view.to_dict() for view in self._views]
+
+    def snapshot(self) -> 'EntitySnapshot':
+        """
+        Copy the dynamic columns for hand-off to another thread. Ids and static
+        attributes are rebuilt only when rows or attributes have changed.
+        """
+        key = (self.version, self.attr_version)
+        if self._snapshot_cache is None or self._snapshot_cache[0] != key:
+            ids = tuple(self._ids)
+            attributes = tuple(
+                {attr: view.get(attr) for attr in SNAPSHOT_ATTRIBUTES}
+                for view in self._views
+            )
+            self._snapshot_cache = (key, ids, attributes)
+        _, ids, attributes = self._snapshot_cache
+
+        return EntitySnapshot(
+            version=self.version,
+            schema_key=key,
+            ids=ids,
+            positions=self.positions.copy(),
+            velocities=self.velocities.copy(),
+            attributes=attributes
+        )
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _reserve(self, size: int):
+        capacity = len(self._radius)
+        if size <= capacity:
+            return
+        new_capacity = max(size, capacity * 2)
+        for field, column in self._vectors.items():
+            grown = np.zeros((new_capacity, 3), dtype=column.dtype)
+            grown[:capacity] = column
+            self._vectors[field] = grown
+        grown_radius = np.full(new_capacity, np.nan, dtype=self._radius.dtype)
+        grown_radius[:capacity] = self._radius
+        self._radius = grown_radius
+        for field, column in self._codes.items():
+            grown_codes = np.zeros(new_capacity, dtype=column.dtype)
+            grown_codes[:capacity] = column
+            self._codes[field] = grown_codes
+
+    def _clear_row(self, row: int):
+        for column in self._vectors.values():
+            column[row] = 0.0
+        self._radius[row] = np.nan
+        for column in self._codes.values():
+            column[row] = 0
+
+    def _intern(self, field: str, label: Optional[str]) -> int:
+        if label is None:
+            return 0
+        code = self._label_codes[field].get(label)
+        if code is None:
+            code = len(self._labels[field])
+            self._labels[field].append(label)
+            self._label_codes[field][label] = code
+        return code
+
+    def _rename(self, row: int, entity_id: str):
+        old_id = self._ids[row]
+        if entity_id == old_id:
+            return
+        if entity_id in self._index:
+            raise ValueError(f"Duplicate entity id: {entity_id}")
+        del self._index[old_id]
+        self._index[entity_id] = row
+        self._ids[row] = entity_id
+        self.version += 1
+
+
+class EntitySnapshot:
+    """
+    Point-in-time copy of an EntityStore: ids, position/velocity arrays and the
+    published static attributes. Safe to read from any thread.
+    """
+
+    __slots__ = ('version', 'schema_key', 'ids', 'positions', 'velocities', 'attributes')
+
+    def __init__(self, version: int, schema_key: tuple, ids: tuple, positions: np.ndarray,
+                 velocities: np.ndarray, attributes: tuple):
+        self.version = version
+        # Changes whenever ids or static attributes change
+        self.schema_key = schema_key
+        self.ids = ids
+        self.positions = positions
+        self.velocities = velocities
+        self.attributes = attributes
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Entity dicts in the /internal/entity-update JSON shape."""
+        records = []
+        for entity_id, attrs, pos, vel in zip(self.ids, self.attributes,
+                                              self.positions.tolist(), self.velocities.tolist()):
+            record = {'id': entity_id}
+            record.update(attrs)
+            record['position'] = {'x': pos[0], 'y': pos[1], 'z': pos[2]}
+            record['velocity'] = {'x': vel[0], 'y': vel[1], 'z': vel[2]}
+            records.append(record)
+        return records
+
+
+def _as_vector(value: Any) -> tuple:
+    """Coerce {'x','y','z'} mappings, sequences or None into an (x, y, z) tuple."""
+    if value is None:
+        return (0.0, 0.0, 0.0)
+    if isinstance(value, Mapping):
+        return (value.get('x', 0.0), value.get('y', 0.0), value.get('z', 0.0))
+    return tuple(value)
+
+
+def positions_of(entities) -> np.ndarray:
+    """
+    (N, 3) position array for either an EntityStore (zero-copy) or a list of
+    entity dicts (copied). Lets stages accept both during the migration.
+    """
+    if isinstance(entities, EntityStore):
+        return entities.positions
+    if not entities:
+        return np.zeros((0, 3), dtype=np.float64)
+    return np.array([_as_vector(e.get('position')) for e in entities], dtype=np.float64)
+
+
+def velocities_of(entities) -> np.ndarray:
+    """(N, 3) velocity array, like positions_of."""
+    if isinstance(entities, EntityStore):
+        return entities.velocities
+    if not entities:
+        return np.zeros((0, 3), dtype=np.float64)
+    return np.array([_as_vector(e.get('velocity')) for e in entities], dtype=np.float64)
+
+
+def ids_of(entities) -> List[str]:
+    """Entity ids in row order for an EntityStore or a list of entity dicts."""
+    if isinstance(entities, EntityStore):
+        return entities.ids
+    return [e['id'] for e in entities]
+
+
+def mask_of(entities, **criteria: Optional[str]) -> np.ndarray:
+    """Boolean row mask (see EntityStore.mask) for a store or a list of entity dicts."""
+    if isinstance(entities, EntityStore):
+        return entities.mask(**criteria)
+    return np.array([
+        all(e.get(field) == label for field, label in criteria.items())
+        for e in entities
+    ], dtype=bool)
+
+
+def codes_of(entities, field: str) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """
+    (per-row codes, code -> label table) of a categorical field for a store or
+    a list of entity dicts; code 0 is "not set", as in EntityStore.
+    """
+    if isinstance(entities, EntityStore):
+        return entities._codes[field][:len(entities)], entities.labels(field)
+    index: Dict[Optional[str], int] = {None: 0}
+    codes = np.array([index.setdefault(e.get(field), len(index)) for e in entities], dtype=np.int16)
+    return codes, list(index)
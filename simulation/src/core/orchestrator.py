@@ -1,15 +1,23 @@
-import os
 import time
 import threading
-from typing import List, Optional, Dict
+from typing import Callable, Dict, Iterator, List, Optional
 import numpy as np
 
+from .entity_store import EntityStore
 from .physics_engine import PhysicsEngine
+from .publisher import ApiPublisher
+from .recorder import SessionRecorder
+from .scheduler import FrameScheduler
 from .scenario_manager import ScenarioManager
+from .sensor_pool import SensorPool, node_seed
+from .shard_pool import ShardPool
 from ..nodes.edge_node import EdgeNode
 from ..anomalies.generator import AnomalyGenerator
+from ..utils.metrics import MetricsRegistry
 from ..utils.ptp_sync import PTPClock
 
+STAGES = ('scenario', 'physics', 'sensors', 'anomalies', 'record', 'publish')
+
 class SimulationOrchestrator:
     def __init__(self, config: dict):
         self.config = config
@@ -19,42 +27,81 @@ class SimulationOrchestrator:
         
         # Core components
         self.physics_engine = PhysicsEngine()
+        self.physics_engine.configure(config.get('physics', {}))
         self.scenario = None
         self.anomaly_generator = AnomalyGenerator()
+        if 'anomalyCooldown' in config:
+            self.anomaly_generator.min_anomaly_interval = float(config['anomalyCooldown'])
+        if 'anomalyCloseAfter' in config:
+            self.anomaly_generator.lifecycle.close_after = float(config['anomalyCloseAfter'])
         self.clock = PTPClock(is_master=True)
+        self.publisher = ApiPublisher(
+            api_url=config.get('apiUrl'),
+            session_id=config.get('sessionId'),
+            wire_format=config.get('wireFormat')
+        )
+        # Parallel sensor stage: 'sensorWorkers' > 0 shards nodes across processes
+        self.seed = config.get('seed')
+        # Scenario randomness for this orchestrator only; reseed() resets it in place
+        self.rng = np.random.default_rng(self.seed)
+        self.sensor_workers = int(config.get('sensorWorkers', 0) or 0)
+        self.sensor_pool: Optional[SensorPool] = None
+        # Spatially sharded crowd forces: 'shardWorkers' > 0 splits them across processes
+        self.shard_workers = int(config.get('shardWorkers', 0) or 0)
+        self.shard_pool: Optional[ShardPool] = None
+        # Optional session recorder ('record': {'path', 'lidar'} starts one with the loop)
+        self.recorder: Optional[SessionRecorder] = None
+        self._recorder_lock = threading.Lock()
         
         # State
         self.nodes: List[EdgeNode] = []
-        self.entities: List[Dict] = []
+        self.node_configs: List[dict] = []
+        # Called as listener(node_id, jpeg_bytes) for every newly rendered camera frame
+        self.camera_frame_listeners: List[Callable[[str, bytes], None]] = []
+        # Called as listener(node_id, cloud, timestamp) with every new (N, 4) float32 LIDAR cloud.
+        # It may be a pooled buffer that later frames overwrite: listeners copy what they keep
+        self.lidar_frame_listeners: List[Callable[[str, np.ndarray, float], None]] = []
+        self.entities = EntityStore()
         self.current_time = 0.0
         self.frame_count = 0
-        self.target_fps = 30
         self.actual_fps = 0.0
+        # Absolute-deadline frame and stage scheduling for the real-time loop
+        self.scheduler = FrameScheduler(config.get('targetFps', 30))
+        for stage, rate in config.get('rates', {}).items():
+            self.set_stage_rate(stage, rate)
+        
+        # Per-stage timing (served as Prometheus text at /simulation/metrics)
+        self.metrics = MetricsRegistry()
+        self._stage_timers = {
+            stage: self.metrics.timer('simulation_stage_seconds', 'Time spent in each frame stage', stage=stage)
+            for stage in STAGES
+        }
+        self._frame_timer = self.metrics.timer('simulation_frame_seconds', 'Busy time of a whole frame (excludes sleep)')
+        self._overruns = self.metrics.counter('simulation_frame_overruns_total', 'Frames that exceeded the frame budget')
+        self._skipped_frames = self.metrics.counter('simulation_frames_skipped_total', 'Frame deadlines skipped after overruns')
+        self._frames_total = self.metrics.counter('simulation_frames_total', 'Frames processed')
+        self._fps_gauge = self.metrics.gauge('simulation_fps', 'Measured frames per second of the real-time loop')
+        self._entities_gauge = self.metrics.gauge('simulation_entities', 'Entities in the simulation')
         
     def load_scenario(self, sport: str, config: dict):
         """Load sport-specific scenario."""
-        self.scenario = ScenarioManager.create_scenario(sport, config)
+        self.scenario = ScenarioManager.create_scenario(sport, config, rng=self.rng)
+        self.scenario.shards = self.shard_pool
+        self.entities.clear()
         self.scenario.initialize(self.entities)
+        self._reset_anomalies()
         print(f"Loaded scenario: {sport} with {len(self.entities)} entities")
         
     def add_node(self, node_config: dict) -> EdgeNode:
         """Add a sensor node to the simulation."""
-        node = EdgeNode(
-            node_id=node_config['nodeId'],
-            position=np.array([
-                node_config['position']['x'],
-                node_config['position']['y'],
-                node_config['position']['z']
-            ]),
-            orientation=np.array([
-                node_config['orientation']['pitch'],
-                node_config['orientation']['yaw'],
-                node_config['orientation']['roll']
-            ]),
-            sensors=node_config['sensors'],
-            calibration=node_config.get('calibration', {})
-        )
+        node = EdgeNode.from_config(node_config, seed=node_seed(self.seed, len(self.nodes)))
         self.nodes.append(node)
+        self.node_configs.append(node_config)
+        self.scheduler.add_stage(
+            f"sensors:{node.node_id}", _node_rate(node_config, self.config.get('rates', {}).get('sensors'))
+        )
+        if self.sensor_pool:
+            self.sensor_pool.add_node(node_config)
         print(f"Added node: {node_config['nodeId']}")
         return node
         
@@ -72,6 +119,14 @@ class SimulationOrchestrator:
             
         self.running = True
         self.paused = False
+        self.publisher.start()
+        if self.sensor_workers > 0:
+            self._start_sensor_pool()
+        if self.shard_workers > 0:
+            self._start_shard_pool()
+        record = self.config.get('record')
+        if record and self.recorder is None:
+            self.start_recording(record['path'], record_lidar=record.get('lidar', False))
         self.thread = threading.Thread(target=self._loop, daemon=True)
         self.thread.start()
         print("Simulation started")
@@ -81,6 +136,12 @@ class SimulationOrchestrator:
         self.running = False
         if self.thread:
             self.thread.join()
+        if self.sensor_pool:
+            self.sensor_pool.close()
+            self.sensor_pool = None
+        self._stop_shard_pool()
+        self.stop_recording()
+        self.publisher.stop()
         print("Simulation stopped")
         
     def pause(self):
@@ -91,153 +152,411 @@ class SimulationOrchestrator:
         """Resume the simulation."""
         self.paused = False
         
+    @property
+    def target_fps(self) -> float:
+        return self.scheduler.target_fps
+
+    @target_fps.setter
+    def target_fps(self, fps: float):
+        # Takes effect on the running loop's next frame
+        self.scheduler.set_target_fps(float(fps))
+
+    def set_stage_rate(self, stage: str, rate_hz: float):
+        """
+        Change a stage's rate live: 'physics' (fixed-step Hz), 'anomalies',
+        'publish', 'sensors' (every node) or a node id.
+        """
+        rate_hz = float(rate_hz)
+        if stage == 'physics':
+            self.physics_engine.configure({'hz': rate_hz})
+        elif stage == 'sensors':
+            for node in self.nodes:
+                self.scheduler.set_rate(f"sensors:{node.node_id}", rate_hz)
+        elif stage in self.scheduler.stages:
+            self.scheduler.set_rate(stage, rate_hz)
+        elif f"sensors:{stage}" in self.scheduler.stages:
+            self.scheduler.set_rate(f"sensors:{stage}", rate_hz)
+        else:
+            raise KeyError(f"Unknown stage: {stage}")
+
+    def get_stage_rates(self) -> Dict[str, float]:
+        rates = {'physics': 1.0 / self.physics_engine.fixed_dt}
+        rates.update({name: stage.rate for name, stage in self.scheduler.stages.items()})
+        return rates
+
     def _loop(self):
-        """Main simulation loop - runs at 30 FPS."""
-        target_dt = 1.0 / self.target_fps
+        """
+        Real-time loop. Behaviors and physics run every frame; sensors, anomaly
+        detection and entity publishing run at their own rates. Deadlines are
+        absolute, so sleep does not drift, and a frame that runs long makes the
+        scheduler skip deadlines and defer optional stages instead of queueing
+        catch-up frames.
+        """
+        scheduler = self.scheduler
+        scheduler.reset()
+        timers = self._stage_timers
         last_fps_check = time.time()
         fps_frame_count = 0
+        last_frame_start = time.perf_counter()
         
         while self.running:
             if self.paused:
                 time.sleep(0.1)
+                scheduler.reset()
+                last_frame_start = time.perf_counter()
                 continue
-                
-            loop_start = time.time()
             
-            # 1. Update simulation time (PTP clock)
-            self.current_time = self.clock.get_time() / 1e9  # Convert ns to seconds
+            # Real elapsed time since the previous frame drives behaviors and the physics
+            # accumulator, capped so a long stall does not replay as a burst of steps
+            frame_start = scheduler.begin_frame()
+            frame_dt = min(frame_start - last_frame_start, 0.25)
+            last_frame_start = frame_start
             
-            # 2. Update entity behaviors (scenario-specific)
-            if self.scenario:
-                self.scenario.update(self.entities, target_dt)
-            
-            # 3. Update physics (entity movement)
-            self.physics_engine.step(self.entities, target_dt)
+            # 1. Update simulation time (PTP clock)
+            timestamp = self.clock.get_time() / 1e9  # Convert ns to seconds
             
-            # 4. Generate sensor data from all nodes
-            # For this MVP, we just generate generating logs or frames
-            # Logic to publish via WebSocket would go here
-            # 4. Generate sensor data from all nodes
-            for node in self.nodes:
-                # This updates internal buffers like last_camera_frame
-                node.generate_frame(
-                    entities=self.entities,
-                    timestamp=self.current_time
-                )
+            # 2-3. Behaviors and physics (every frame)
+            self._advance(frame_dt, frame_dt)
             
-            # 5. Detect anomalies
-            if self.scenario:
-                anomalies = self.anomaly_generator.detect(
-                    entities=self.entities,
-                    scenario=self.scenario,
-                    timestamp=self.current_time
-                )
-                for anomaly in anomalies:
-                    self._publish_anomaly(anomaly)
+            # 4-5. Sensors and anomaly detection, when due and affordable
+            now = time.perf_counter()
+            due_nodes = [
+                index for index, node in enumerate(self.nodes)
+                if scheduler.should_run(f"sensors:{node.node_id}", now)
+            ]
+            detect = scheduler.should_run('anomalies', now)
+            result = self.process_frame(timestamp, sensor_nodes=due_nodes, detect=detect)
+            now = time.perf_counter()
+            frame_timings = {frame['nodeId']: frame.get('timings', {}) for frame in result['sensors']}
+            for index in due_nodes:
+                node_id = self.nodes[index].node_id
+                scheduler.ran(f"sensors:{node_id}", sum(frame_timings.get(node_id, {}).values()), now)
+            if detect:
+                scheduler.ran('anomalies', result['timings']['anomalies'], now)
             
-            # 6. Update frame counter
-            self.frame_count += 1
-            fps_frame_count += 1
+            # 6. Publish (incident events as soon as they happen, entities at the publish rate)
+            started = time.perf_counter()
+            self._publish_anomalies(result['anomalyEvents'])
+            if scheduler.should_run('publish', started):
+                self._publish_entities()
+                scheduler.ran('publish', time.perf_counter() - started)
+            timers['publish'].observe(time.perf_counter() - started)
             
             # 7. Calculate actual FPS every second
+            fps_frame_count += 1
             now = time.time()
             if now - last_fps_check >= 1.0:
                 self.actual_fps = fps_frame_count / (now - last_fps_check)
+                self._fps_gauge.set(self.actual_fps)
                 fps_frame_count = 0
                 last_fps_check = now
-                # print(f"Simulation FPS: {self.actual_fps:.1f} | Entities: {len(self.entities)}")
             
-            # 8. Sleep to maintain frame rate
-            elapsed = time.time() - loop_start
-            if elapsed < target_dt:
-                time.sleep(target_dt - elapsed)
+            busy = time.perf_counter() - frame_start
+            self._frame_timer.observe(busy)
+            if busy > scheduler.frame_period:
+                self._overruns.inc()
                 
-            # Broadcast updates (Every 3 frames approx 10Hz)
-            if self.frame_count % 3 == 0:
-                self._publish_entities()
+            # 8. Sleep until the next frame deadline
+            skipped = scheduler.skipped_frames
+            scheduler.wait()
+            if scheduler.skipped_frames > skipped:
+                self._skipped_frames.inc(scheduler.skipped_frames - skipped)
 
-    def _publish_entities(self):
-        """Send entity positions to API."""
-        try:
-            # Basic validation
-            if not self.entities:
-                return
-
-            payload = {
-                'sessionId': None, # TODO: Pass session ID if managed
-                'stats': {
-                    'fps': self.actual_fps,
-                    'frame': self.frame_count,
-                    'time': self.current_time
-                },
-                'sentAt': time.time(),
-                'entities': [
-                    {
-                        'id': e.get('id'),
-                        'type': e.get('type'),
-                        'role': e.get('role'),
-                        'team': e.get('team'),
-                        'position': e.get('position'),
-                        'velocity': e.get('velocity'),
-                        'color': e.get('color'),
-                        'radius': e.get('radius'),
-                        'severity': e.get('severity')
-                    }
-                    for e in self.entities
-                ]
-            }
-            
-            # Fire and forget POST
-            # Using threads or async here would be better for performance, 
-            # but for this simulation loop strictness, a short timeout is acceptable logic 
-            # if we assume local network.
-            try:
-                import requests
-                api_url = os.getenv('API_URL', 'http://api:3001')
-                response = requests.post(
-                    f"{api_url}/internal/entity-update",
-                    json=payload,
-                    timeout=0.2 
-                )
-                if response.status_code != 200:
-                    print(f"Warning: API returned status {response.status_code} for entity-update")
-            except ImportError:
-                print("requests module not found")
-            except Exception as e:
-                # print(f"Failed to publish entities: {e}")
-                pass # Still suppress to avoid loop crash, but could log periodically
-                
-        except Exception as e:
-            print(f"Error publishing entities: {e}")
+    def step(self, timestamp: float, frame_dt: float, behavior_dt: Optional[float] = None) -> Dict:
+        """
+        Advance the simulation by one frame at simulated time ``timestamp``.
+        ``frame_dt`` feeds the physics accumulator; scenario behaviors use
+        ``behavior_dt`` (defaults to ``frame_dt``). Returns the frame's node
+        sensor frames and detected anomalies.
+        """
+        self.current_time = timestamp
+        self._advance(frame_dt, frame_dt if behavior_dt is None else behavior_dt)
+        return self.process_frame(timestamp)
 
-    def _publish_anomaly(self, anomaly):
-        """Publish detected anomaly."""
-        try:
-            import requests
-            requests.post(
-                f"{os.getenv('API_URL', 'http://api:3001')}/internal/anomaly",
-                json={
-                    'sessionId': None,
-                    'anomaly': anomaly
-                },
-                timeout=0.1
+    def _advance(self, frame_dt: float, behavior_dt: float):
+        """Scenario behaviors, then physics in fixed timesteps."""
+        timers = self._stage_timers
+        
+        # Update entity behaviors (scenario-specific)
+        started = time.perf_counter()
+        if self.scenario:
+            self.scenario.update(self.entities, behavior_dt)
+        physics_started = time.perf_counter()
+        timers['scenario'].observe(physics_started - started)
+        
+        # Update physics (entity movement) in fixed timesteps
+        self.physics_engine.advance(self.entities, frame_dt)
+        timers['physics'].observe(time.perf_counter() - physics_started)
+
+    def process_frame(self, timestamp: float, sensor_nodes: Optional[List[int]] = None,
+                      detect: bool = True) -> Dict:
+        """
+        Run the per-frame pipeline on the current entity state without moving it:
+        sensors, anomaly detection and recording. Replay drives this directly.
+        ``sensor_nodes`` limits sensors to those node indices (None = all) and
+        ``detect=False`` skips anomaly detection; the scheduler uses both.
+        """
+        self.current_time = timestamp
+        timers = self._stage_timers
+        
+        # Generate sensor data from all nodes
+        started = time.perf_counter()
+        sensor_frames = self._generate_sensor_frames(sensor_nodes)
+        anomalies_started = time.perf_counter()
+        sensors_time = anomalies_started - started
+        timers['sensors'].observe(sensors_time)
+        self._observe_node_timings(sensor_frames)
+        
+        # Detect anomalies, then fold them into incident open/update/close events
+        anomalies = []
+        events = []
+        if self.scenario and detect:
+            anomalies = self.anomaly_generator.detect(
+                entities=self.entities,
+                scenario=self.scenario,
+                timestamp=self.current_time
             )
-        except Exception as e:
-            print(f"Failed to publish anomaly: {e}")
+            events = self.anomaly_generator.emit(anomalies, self.current_time)
+        anomalies_time = time.perf_counter() - anomalies_started
+        if detect:
+            timers['anomalies'].observe(anomalies_time)
+        
+        self.frame_count += 1
+        self._frames_total.inc()
+        self._entities_gauge.set(len(self.entities))
+        result = {
+            'frame': self.frame_count,
+            'time': self.current_time,
+            'sensors': sensor_frames,
+            'anomalies': anomalies,
+            'anomalyEvents': events,
+            'timings': {'sensors': sensors_time, 'anomalies': anomalies_time}
+        }
+        if self.recorder:
+            started = time.perf_counter()
+            with self._recorder_lock:
+                if self.recorder:
+                    self.recorder.record(result, self.entities)
+            timers['record'].observe(time.perf_counter() - started)
+        return result
+
+    def _observe_node_timings(self, sensor_frames: List[Dict]):
+        for frame in sensor_frames:
+            for sensor, seconds in frame.get('timings', {}).items():
+                self.metrics.timer(
+                    'simulation_node_sensor_seconds', 'Per-node sensor render/scan time',
+                    node=frame['nodeId'], sensor=sensor
+                ).observe(seconds)
+
+    def start_recording(self, path: str, record_lidar: bool = False) -> SessionRecorder:
+        """Record every following frame to ``path`` (see core.recorder)."""
+        recorder = SessionRecorder(path, record_lidar=record_lidar)
+        self.stop_recording()
+        with self._recorder_lock:
+            self.recorder = recorder
+        return recorder
+
+    def stop_recording(self) -> Optional[str]:
+        """Close the active recording; returns its path."""
+        with self._recorder_lock:
+            recorder, self.recorder = self.recorder, None
+        if recorder is None:
+            return None
+        recorder.close()
+        return recorder.path
+
+    def iter_headless(self, frames: Optional[int] = None, duration: Optional[float] = None,
+                      dt: Optional[float] = None, seed: Optional[int] = None,
+                      start_time: float = 0.0) -> Iterator[Dict]:
+        """
+        Fast-forward without wall-clock pacing: simulated time advances by ``dt``
+        (default 1 / target_fps) per frame for ``frames`` frames or ``duration``
+        simulated seconds, as fast as the CPU allows. Yields each step() result
+        plus an 'entities' snapshot. Its LIDAR clouds are pooled buffers that
+        later frames overwrite; copy them to keep them (run_headless does).
+
+        ``seed`` reseeds the orchestrator's scenario generator and every node's
+        sensor noise; load the scenario after seeding, or use run_headless with a
+        sport, for a reproducible setup.
+        """
+        if self.running:
+            raise RuntimeError("Cannot run headless while the real-time loop is running")
+        if frames is None and duration is None:
+            raise ValueError("Specify frames or duration")
+
+        dt = dt or 1.0 / self.target_fps
+        total = int(frames) if frames is not None else int(np.ceil(duration / dt - 1e-9))
+        if seed is not None:
+            self.reseed(seed)
+
+        # Every simulated dt must be integrated; never drop physics steps
+        physics = self.physics_engine
+        saved_cap = physics.max_steps_per_frame
+        physics.max_steps_per_frame = max(saved_cap, int(np.ceil(dt / physics.fixed_dt)) + 1)
+        if self.sensor_workers > 0 and self.nodes:
+            self._start_sensor_pool()
+        if self.shard_workers > 0:
+            self._start_shard_pool()
+        try:
+            for i in range(total):
+                result = self.step(start_time + (i + 1) * dt, dt)
+                result['entities'] = self.entities.snapshot()
+                yield result
+        finally:
+            physics.max_steps_per_frame = saved_cap
+            if self.sensor_pool:
+                self.sensor_pool.close()
+                self.sensor_pool = None
+            self._stop_shard_pool()
+
+    def run_headless(self, frames: Optional[int] = None, duration: Optional[float] = None,
+                     dt: Optional[float] = None, seed: Optional[int] = None,
+                     callback: Optional[Callable[[Dict], None]] = None,
+                     sport: Optional[str] = None, scenario_config: Optional[dict] = None,
+                     start_time: float = 0.0) -> Dict:
+        """
+        Run iter_headless to completion. Each frame result goes to ``callback``
+        if given, otherwise results are collected into the returned summary.
+        With ``sport`` the scenario is (re)loaded after seeding.
+        """
+        if seed is not None:
+            self.reseed(seed)
+        if sport is not None:
+            self.load_scenario(sport, scenario_config or {})
+
+        results = [] if callback is None else None
+        frame_count = anomaly_count = 0
+        started = time.perf_counter()
+        for result in self.iter_headless(frames=frames, duration=duration, dt=dt, start_time=start_time):
+            frame_count += 1
+            anomaly_count += len(result['anomalies'])
+            if callback is not None:
+                callback(result)
+            else:
+                results.append(_detach_clouds(result))
+        wall_time = time.perf_counter() - started
+
+        summary = {
+            'frames': frame_count,
+            'simTime': self.current_time - start_time,
+            'wallTime': wall_time,
+            'speedup': (self.current_time - start_time) / wall_time if wall_time > 0 else float('inf'),
+            'anomalies': anomaly_count
+        }
+        if results is not None:
+            summary['results'] = results
+        return summary
 
-    def get_video_stream(self, node_id: str):
-        """Generator for MJPEG stream from a specific node."""
-        node = next((n for n in self.nodes if n.node_id == node_id), None)
-        if not node:
+    def reseed(self, seed: int):
+        """Seed scenario randomness and rebuild nodes with per-node sensor seeds."""
+        self.seed = seed
+        # In place, so the loaded scenario (and its crowd) draw from the new stream
+        self.rng.bit_generator.state = np.random.default_rng(seed).bit_generator.state
+        self.nodes = [
+            EdgeNode.from_config(node_config, seed=node_seed(seed, index))
+            for index, node_config in enumerate(self.node_configs)
+        ]
+        self._reset_anomalies()
+
+    def _start_sensor_pool(self):
+        """Spin up the sensor worker processes and recreate every node there."""
+        pool = SensorPool(
+            workers=self.sensor_workers,
+            seed=self.seed,
+            start_method=self.config.get('sensorStartMethod', 'spawn')
+        ).start()
+        for node_config in self.node_configs:
+            pool.add_node(node_config)
+        self.sensor_pool = pool
+
+    def _start_shard_pool(self):
+        """Spin up the crowd shard processes and hand them to the scenario."""
+        self.shard_pool = ShardPool(
+            workers=self.shard_workers,
+            min_agents=self.config.get('shardMinAgents', 4000),
+            start_method=self.config.get('shardStartMethod', 'spawn')
+        ).start()
+        if self.scenario:
+            self.scenario.shards = self.shard_pool
+
+    def _stop_shard_pool(self):
+        if self.shard_pool:
+            self.shard_pool.close()
+            self.shard_pool = None
+        if self.scenario:
+            self.scenario.shards = None
+
+    def _generate_sensor_frames(self, node_indices: Optional[List[int]] = None) -> List[Dict]:
+        """
+        Run the nodes' sensors for this frame, serially or on the sensor pool.
+        ``node_indices`` selects the nodes to run (None = all), in node order.
+        """
+        if node_indices is not None and not node_indices:
+            return []
+        indices = range(len(self.nodes)) if node_indices is None else sorted(node_indices)
+        if self.sensor_pool is None:
+            # This updates internal buffers like last_camera_frame
+            frames = [
+                self.nodes[i].generate_frame(entities=self.entities, timestamp=self.current_time)
+                for i in indices
+            ]
+        else:
+            frames = self.sensor_pool.generate(self.entities, self.current_time, node_indices)
+            for i, frame in zip(indices, frames):
+                image_data = frame['sensors'].get('camera')
+                if image_data:
+                    self.nodes[i].last_camera_frame = image_data
+
+        if self.camera_frame_listeners:
+            for frame in frames:
+                image_data = frame['sensors'].get('camera')
+                if image_data:
+                    for listener in self.camera_frame_listeners:
+                        listener(frame['nodeId'], image_data)
+        if self.lidar_frame_listeners:
+            for frame in frames:
+                cloud = frame['sensors'].get('lidar')
+                if cloud is not None:
+                    for listener in self.lidar_frame_listeners:
+                        listener(frame['nodeId'], cloud, frame['timestamp'])
+        return frames
+
+    def _publish_entities(self):
+        """Hand the latest entity state to the background publisher."""
+        if not self.entities:
             return
+        self.publisher.publish_entities(
+            self.entities.snapshot(),
+            stats={
+                'fps': self.actual_fps,
+                'frame': self.frame_count,
+                'time': self.current_time
+            }
+        )
 
-        while self.running:
-            frame = node.last_camera_frame
-            if frame:
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-            
-            # rate limit to approx 30 fps to avoid busy loop
-            time.sleep(0.033)
+    def _reset_anomalies(self):
+        """Close the incidents of the previous scenario or seed; none carry over."""
+        self._publish_anomalies(self.anomaly_generator.lifecycle.reset(self.current_time))
+
+    def _publish_anomalies(self, anomalies: List[Dict]):
+        """Queue incident events; they are POSTed in batches off-thread."""
+        self.publisher.publish_anomalies(anomalies)
+
+
+def _detach_clouds(result: Dict) -> Dict:
+    """Copy a frame result's LIDAR clouds, which alias buffers later frames overwrite."""
+    for frame in result['sensors']:
+        cloud = frame['sensors'].get('lidar')
+        if cloud is not None:
+            frame['sensors']['lidar'] = cloud.copy()
+    return result
 
 
+def _node_rate(node_config: dict, default: Optional[float] = None) -> float:
+    """Sensor rate of a node: its 'rate', the configured default, its camera fps or a 10 Hz LIDAR sweep."""
+    if node_config.get('rate') or default:
+        return float(node_config.get('rate') or default)
+    camera = node_config.get('sensors', {}).get('camera', {})
+    if camera.get('enabled'):
+        return float(camera.get('fps', 30))
+    return 10.0
@@ -1,39 +1,102 @@
 import numpy as np
-from typing import List
+
+from .entity_store import EntityStore, positions_of
 
 class PhysicsEngine:
-    def __init__(self):
+    """
+    Batched semi-implicit Euler integrator.
+
+    ``step`` integrates every entity with a handful of whole-array operations.
+    ``advance`` feeds variable frame times through a fixed-timestep accumulator so
+    the integration stays stable when the loop runs slower than its target rate.
+    """
+
+    def __init__(self, fixed_dt: float = 1.0 / 60.0, substeps: int = 1, max_steps_per_frame: int = 8):
         self.gravity = -9.81
         self.friction_coeff = 0.5
 
-    def step(self, entities: List[dict], dt: float):
+        self.fixed_dt = fixed_dt
+        self.substeps = max(int(substeps), 1)
+        self.max_steps_per_frame = max(int(max_steps_per_frame), 1)
+        self.accumulator = 0.0
+        self.dropped_time = 0.0  # Simulated seconds discarded to avoid a spiral of death
+
+        self._scratch = np.empty((0, 3))
+
+    def configure(self, config: dict):
+        """Apply physics settings ({'hz', 'substeps', 'maxStepsPerFrame'})."""
+        if 'hz' in config:
+            self.fixed_dt = 1.0 / float(config['hz'])
+        if 'substeps' in config:
+            self.substeps = max(int(config['substeps']), 1)
+        if 'maxStepsPerFrame' in config:
+            self.max_steps_per_frame = max(int(config['maxStepsPerFrame']), 1)
+
+    def advance(self, entities, frame_dt: float) -> int:
+        """
+        Add elapsed frame time to the accumulator and run as many fixed steps as fit.
+        Returns the number of fixed steps taken.
+        """
+        self.accumulator += frame_dt
+        steps = 0
+        while self.accumulator >= self.fixed_dt and steps < self.max_steps_per_frame:
+            self.step(entities, self.fixed_dt)
+            self.accumulator -= self.fixed_dt
+            steps += 1
+
+        # Too far behind: keep the fractional remainder, drop whole steps
+        if self.accumulator >= self.fixed_dt:
+            dropped = self.accumulator - (self.accumulator % self.fixed_dt)
+            self.dropped_time += dropped
+            self.accumulator -= dropped
+
+        return steps
+
+    def step(self, entities, dt: float):
         """
         Update entity positions based on velocity and forces.
+        Accepts an EntityStore (in place, no copies) or a list of entity dicts.
         """
-        for entity in entities:
-            # Simple Euler integration
-            vel = np.array(entity.get('velocity', [0, 0, 0]), dtype=float)
-            pos = np.array(entity.get('position', [0, 0, 0]), dtype=float)
-            
-            # Apply friction (damping)
-            vel = vel * (1.0 - self.friction_coeff * dt)
-            
-            # Update position
-            pos += vel * dt
-            
+        if isinstance(entities, EntityStore):
+            self._integrate(entities.positions, entities.velocities, dt)
+            return
+
+        if not entities:
+            return
+
+        pos = positions_of(entities)
+        vel = np.array([
+            [e['velocity'].get('x', 0.0), e['velocity'].get('y', 0.0), e['velocity'].get('z', 0.0)]
+            if e.get('velocity') else [0.0, 0.0, 0.0]
+            for e in entities
+        ], dtype=np.float64)
+
+        self._integrate(pos, vel, dt)
+
+        for entity, p, v in zip(entities, pos.tolist(), vel.tolist()):
+            entity['position'] = {'x': p[0], 'y': p[1], 'z': p[2]}
+            entity['velocity'] = {'x': v[0], 'y': v[1], 'z': v[2]}
+
+    def _integrate(self, pos: np.ndarray, vel: np.ndarray, dt: float):
+        """Damping, semi-implicit Euler and floor constraint over all rows."""
+        if len(pos) == 0:
+            return
+
+        if self._scratch.shape != pos.shape:
+            self._scratch = np.empty_like(pos)
+        scratch = self._scratch
+
+        h = dt / self.substeps
+        damping = 1.0 - self.friction_coeff * h
+
+        for _ in range(self.substeps):
+            # Apply friction (damping), then move with the updated velocity
+            vel *= damping
+            np.multiply(vel, h, out=scratch)
+            pos += scratch
+
             # Floor constraint (z >= 0)
-            if pos[2] < 0:
-                pos[2] = 0
-                vel[2] = 0
-            
-            # Update entity state
-            entity['position'] = {
-                'x': float(pos[0]),
-                'y': float(pos[1]),
-                'z': float(pos[2])
-            }
-            entity['velocity'] = {
-                'x': float(vel[0]),
-                'y': float(vel[1]),
-                'z': float(vel[2])
-            }
+            below = pos[:, 2] < 0
+            if below.any():
+                pos[below, 2] = 0.0
+                vel[below, 2] = 0.0
@@ -0,0 +1,259 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+from typing import Dict, List, Optional
+from urllib.parse import quote, urlparse
+
+from .entity_store import EntitySnapshot
+from .wire_format import BinaryEntityEncoder
+
+WIRE_FORMATS = ('json', 'binary')
+
+class ApiPublisher:
+    """
+    Background publisher for simulation -> API traffic.
+
+    The simulation loop only hands over data (``publish_entities`` /
+    ``publish_anomalies``) and returns immediately. A worker thread owns a single
+    keep-alive HTTP connection, encodes payloads and POSTs them:
+
+    * Entity snapshots are coalesced: only the newest pending snapshot is sent.
+    * Anomalies are queued (bounded) and sent in batches of up to
+      ``max_batch`` per request to ``/internal/anomalies``.
+
+    ``wire_format`` selects JSON entity updates or the binary delta format in
+    ``wire_format.py`` (schema handshake + quantized deltas).
+
+    The connection belongs to the worker, which closes it when it exits; the
+    counters are updated and read under the same condition as the queues.
+    """
+
+    def __init__(self, api_url: Optional[str] = None, session_id: Optional[str] = None,
+                 max_queue: int = 1000, max_batch: int = 100, timeout: float = 2.0,
+                 wire_format: Optional[str] = None, wire_options: Optional[Dict] = None):
+        self.api_url = api_url or os.getenv('API_URL', 'http://api:3001')
+        self.session_id = session_id
+        self.wire_format = (wire_format or os.getenv('PUBLISH_FORMAT', 'json')).lower()
+        if self.wire_format not in WIRE_FORMATS:
+            raise ValueError(f"Unknown wire format: {self.wire_format}")
+        self.encoder = BinaryEntityEncoder(**(wire_options or {}))
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.timeout = timeout
+
+        parsed = urlparse(self.api_url)
+        self._scheme = parsed.scheme or 'http'
+        self._host = parsed.hostname or 'localhost'
+        self._port = parsed.port
+        self._base_path = parsed.path.rstrip('/')
+
+        self._cond = threading.Condition()
+        self._pending_entities = None  # (snapshot, stats, sent_at)
+        self._pending_anomalies = deque()
+        self._running = False
+        self._abandon = False  # Set when stop() gave up waiting: exit without draining
+        self._thread = None
+        self._conn = None
+
+        self.counters = {
+            'entity_updates_queued': 0,
+            'entity_updates_sent': 0,
+            'entity_updates_coalesced': 0,
+            'anomalies_queued': 0,
+            'anomalies_sent': 0,
+            'anomalies_dropped': 0,
+            'schemas_sent': 0,
+            'bytes_sent': 0,
+            'requests_failed': 0,
+            'reconnects': 0
+        }
+        self._latency_ms_last = 0.0
+        self._latency_ms_max = 0.0
+        self._latency_ms_total = 0.0
+        self._requests = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def start(self):
+        if self._running:
+            return
+        if self._thread is not None:
+            # A worker stop() gave up on exits after its in-flight request
+            self._thread.join()
+        self._running = True
+        self._abandon = False
+        self._thread = threading.Thread(target=self._run, name='api-publisher', daemon=True)
+        self._thread.start()
+
+    def stop(self, flush_timeout: float = 1.0):
+        """
+        Stop the worker, giving it up to ``flush_timeout`` seconds to drain. A
+        worker still busy after that leaves the rest queued and exits once its
+        in-flight request returns.
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=flush_timeout)
+            if self._thread.is_alive():
+                with self._cond:
+                    self._abandon = True
+            else:
+                self._thread = None
+
+    # ------------------------------------------------------------------
+    # Producer API (called from the simulation loop, never blocks on I/O)
+    # ------------------------------------------------------------------
+    def publish_entities(self, snapshot: EntitySnapshot, stats: Dict):
+        with self._cond:
+            if self._pending_entities is not None:
+                self.counters['entity_updates_coalesced'] += 1
+            self._pending_entities = (snapshot, stats, time.time())
+            self.counters['entity_updates_queued'] += 1
+            self._cond.notify()
+
+    def publish_anomalies(self, anomalies: List[Dict]):
+        if not anomalies:
+            return
+        with self._cond:
+            for anomaly in anomalies:
+                if len(self._pending_anomalies) >= self.max_queue:
+                    self.counters['anomalies_dropped'] += 1
+                    continue
+                self._pending_anomalies.append(anomaly)
+                self.counters['anomalies_queued'] += 1
+            self._cond.notify()
+
+    def get_stats(self) -> Dict:
+        with self._cond:
+            stats = dict(self.counters)
+            stats['anomaly_queue_depth'] = len(self._pending_anomalies)
+            stats['latency_ms_last'] = round(self._latency_ms_last, 2)
+            stats['latency_ms_max'] = round(self._latency_ms_max, 2)
+            stats['latency_ms_avg'] = round(self._latency_ms_total / self._requests, 2) if self._requests else 0.0
+        return stats
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+    def _run(self):
+        try:
+            while True:
+                with self._cond:
+                    while self._running and self._pending_entities is None and not self._pending_anomalies:
+                        self._cond.wait()
+                    if self._abandon or (
+                            not self._running and self._pending_entities is None and not self._pending_anomalies):
+                        return
+
+                    entities = self._pending_entities
+                    self._pending_entities = None
+                    batch = []
+                    while self._pending_anomalies and len(batch) < self.max_batch:
+                        batch.append(self._pending_anomalies.popleft())
+
+                if entities is not None:
+                    self._send_entities(*entities)
+                if batch:
+                    self._send_anomalies(batch)
+        finally:
+            # Only the worker uses the connection, so only it closes it
+            self._close()
+
+    def _send_entities(self, snapshot: EntitySnapshot, stats: Dict, sent_at: float):
+        if self.wire_format == 'binary':
+            self._send_entities_binary(snapshot, stats, sent_at)
+            return
+
+        payload = {
+            'sessionId': self.session_id,
+            'stats': stats,
+            'sentAt': sent_at,
+            'entities': snapshot.to_records()
+        }
+        if self._post('/internal/entity-update', json.dumps(payload).encode('utf-8')):
+            self._count('entity_updates_sent')
+
+    def _send_entities_binary(self, snapshot: EntitySnapshot, stats: Dict, sent_at: float):
+        if self.encoder.needs_schema(snapshot):
+            schema = self.encoder.build_schema(snapshot)
+            schema['sessionId'] = self.session_id
+            if not self._post('/internal/entity-schema', json.dumps(schema).encode('utf-8')):
+                self.encoder.reset()
+                return
+            self._count('schemas_sent')
+
+        body = self.encoder.encode(snapshot, stats, sent_at)
+        path = '/internal/entity-update/binary'
+        if self.session_id:
+            path += f'?sessionId={quote(str(self.session_id))}'
+        if self._post(path, body, content_type='application/octet-stream'):
+            self._count('entity_updates_sent')
+        else:
+            # Receiver may have missed this delta; resync with a new handshake
+            self.encoder.reset()
+
+    def _send_anomalies(self, batch: List[Dict]):
+        payload = {
+            'sessionId': self.session_id,
+            'anomalies': batch
+        }
+        body = json.dumps(payload, default=str).encode('utf-8')
+        if self._post('/internal/anomalies', body):
+            self._count('anomalies_sent', len(batch))
+
+    def _post(self, path: str, body: bytes, content_type: str = 'application/json') -> bool:
+        """POST over the persistent connection; one reconnect attempt on failure."""
+        for attempt in range(2):
+            start = time.perf_counter()
+            try:
+                conn = self._connection()
+                conn.request('POST', self._base_path + path, body=body, headers={
+                    'Content-Type': content_type,
+                    'Connection': 'keep-alive'
+                })
+                response = conn.getresponse()
+                response.read()  # Drain so the connection can be reused
+                self._count('bytes_sent', len(body))
+                self._record_latency((time.perf_counter() - start) * 1000)
+                if response.status != 200:
+                    self._count('requests_failed')
+                    print(f"Warning: API returned status {response.status} for {path}")
+                    return False
+                return True
+            except (OSError, HTTPException):
+                self._close()
+                if attempt == 0:
+                    self._count('reconnects')
+        self._count('requests_failed')
+        return False
+
+    def _connection(self) -> HTTPConnection:
+        if self._conn is None:
+            conn_class = HTTPSConnection if self._scheme == 'https' else HTTPConnection
+            self._conn = conn_class(self._host, self._port, timeout=self.timeout)
+        return self._conn
+
+    def _close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def _count(self, name: str, amount: int = 1):
+        with self._cond:
+            self.counters[name] += amount
+
+    def _record_latency(self, latency_ms: float):
+        with self._cond:
+            self._latency_ms_last = latency_ms
+            self._latency_ms_max = max(self._latency_ms_max, latency_ms)
+            self._latency_ms_total += latency_ms
+            self._requests += 1
@@ -0,0 +1,409 @@
+"""
+Session recording and replay.
+
+A recording is a directory of append-only files:
+
+    index.bin        one FRAME_DTYPE record per frame (the time index)
+    positions.f64    (rows, 3) float64 entity positions, all frames back to back
+    velocities.f64   (rows, 3) float64 entity velocities
+    tables.jsonl     entity tables (ids + static attributes), one line per change
+    lidar_index.bin  one LIDAR_DTYPE record per recorded point cloud
+    lidar.f32        (points, 4) float32 x/y/z/intensity
+    anomalies.jsonl  one JSON line per frame that had anomalies
+    meta.json        format version and recording options
+
+A frame's entity rows are referenced by offset into the column files and its
+ids/attributes by table number, so ids are written only when the entity table
+changes. The bulk column files (positions, velocities, LIDAR) are written
+through growing shared memory maps, so recording a frame is a few memory
+copies rather than a write and a flush per file; they carry zero padding past
+the last frame until the recorder closes. The index record is appended and
+flushed last, so a crash never exposes a half-written frame.
+SessionRecording memory-maps the files for random access.
+
+Recording paths that come from clients go through resolve_recording_path,
+which confines them to RECORDINGS_DIR.
+"""
+import json
+import mmap
+import os
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .entity_store import EntityStore
+
+RECORDING_VERSION = 1
+
+FRAME_DTYPE = np.dtype([
+    ('frame', '<u8'),
+    ('time', '<f8'),
+    ('table', '<u4'),
+    ('count', '<u4'),
+    ('row', '<u8'),             # First row in positions/velocities
+    ('lidar_start', '<u8'),     # First record in lidar_index.bin
+    ('lidar_count', '<u4'),
+    ('anomaly_count', '<u4'),
+    ('anomaly_offset', '<i8'),  # Byte offset of the frame's line in anomalies.jsonl, -1 if none
+])
+
+LIDAR_DTYPE = np.dtype([
+    ('node', '<u4'),
+    ('point', '<u8'),           # First point in lidar.f32
+    ('count', '<u4'),
+])
+
+_DYNAMIC_KEYS = ('position', 'velocity')
+_MAPPED_FILES = ('positions.f64', 'velocities.f64', 'lidar_index.bin', 'lidar.f32')
+
+
+def resolve_recording_path(path: str, root: Optional[str] = None) -> str:
+    """
+    Directory for a client-supplied recording name, under ``root`` (default:
+    the RECORDINGS_DIR environment variable, else ./recordings). Raises
+    ValueError for absolute paths, '..' components or anything that resolves
+    outside the root.
+    """
+    root = os.path.realpath(root or os.getenv('RECORDINGS_DIR', 'recordings'))
+    parts = str(path or '').replace('\\', '/').split('/')
+    if not path or os.path.isabs(path) or '..' in parts:
+        raise ValueError(f"Invalid recording path: {path!r}")
+    resolved = os.path.realpath(os.path.join(root, path))
+    if resolved == root or os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f"Invalid recording path: {path!r}")
+    return resolved
+
+
+class _MappedAppender:
+    """
+    Append-only file written through a shared memory map that doubles as it
+    fills. Writes are memory copies (visible to readers through the page
+    cache at once); ``close`` trims the file to the bytes written.
+    """
+
+    def __init__(self, path: str, initial_capacity: int = 1 << 20):
+        open(path, 'ab').close()
+        self._handle = open(path, 'r+b')
+        self.size = os.path.getsize(path)
+        self._map = None
+        self._capacity = 0
+        self._reserve(max(self.size, initial_capacity))
+
+    def tell(self) -> int:
+        return self.size
+
+    def write(self, data) -> int:
+        if isinstance(data, np.ndarray):
+            data = np.ascontiguousarray(data).reshape(-1).view(np.uint8)
+        data = memoryview(data).cast('B')
+        end = self.size + len(data)
+        if end > self._capacity:
+            self._reserve(max(end, 2 * self._capacity))
+        self._map[self.size:end] = data
+        self.size = end
+        return len(data)
+
+    def flush(self):
+        pass  # Shared mapping: nothing buffered in the process
+
+    def close(self):
+        self._map.close()
+        self._handle.truncate(self.size)
+        self._handle.close()
+
+    def _reserve(self, capacity: int):
+        if self._map is not None:
+            self._map.close()
+        self._handle.truncate(capacity)
+        self._map = mmap.mmap(self._handle.fileno(), capacity)
+        self._capacity = capacity
+
+
+class SessionRecorder:
+    """Appends orchestrator frames to a recording directory."""
+
+    def __init__(self, path: str, record_lidar: bool = False, record_anomalies: bool = True):
+        self.path = path
+        self.record_lidar = record_lidar
+        self.record_anomalies = record_anomalies
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, 'index.bin')):
+            raise FileExistsError(f"Recording already exists: {path}")
+
+        self._files = {
+            name: open(os.path.join(path, name), 'ab')
+            for name in ('index.bin', 'tables.jsonl', 'anomalies.jsonl')
+        }
+        self._files.update({name: _MappedAppender(os.path.join(path, name)) for name in _MAPPED_FILES})
+        self._node_ids: List[str] = []
+        self._table_key = None
+        self._table = -1
+        self._row = 0
+        self._lidar_records = 0
+        self._lidar_points = 0
+        self.frames = 0
+        self.created = time.time()
+        self._write_meta()
+
+    def record(self, result: Dict[str, Any], entities: EntityStore):
+        """Append one step() result and the entity state it was produced from."""
+        key = (id(entities), entities.version, entities.attr_version)
+        if key != self._table_key:
+            self._write_table(entities)
+            self._table_key = key
+
+        count = len(entities)
+        self._files['positions.f64'].write(np.ascontiguousarray(entities.positions, dtype='<f8'))
+        self._files['velocities.f64'].write(np.ascontiguousarray(entities.velocities, dtype='<f8'))
+
+        lidar_start, lidar_count = self._lidar_records, 0
+        if self.record_lidar:
+            lidar_count = self._write_lidar(result.get('sensors', []))
+
+        anomalies = result.get('anomalies') or []
+        anomaly_offset = -1
+        if self.record_anomalies and anomalies:
+            handle = self._files['anomalies.jsonl']
+            anomaly_offset = handle.tell()
+            line = json.dumps({'frame': result['frame'], 'anomalies': anomalies}, default=_json_default)
+            handle.write(line.encode() + b'\n')
+            handle.flush()
+
+        record = np.zeros(1, dtype=FRAME_DTYPE)
+        record[0] = (
+            result['frame'], result['time'], self._table, count, self._row,
+            lidar_start, lidar_count, len(anomalies) if anomaly_offset >= 0 else 0, anomaly_offset
+        )
+        self._row += count
+        self.frames += 1
+
+        # Index last: readers only ever see complete frames (mapped columns need no flush)
+        self._files['index.bin'].write(record.tobytes())
+        self._files['index.bin'].flush()
+
+    def close(self):
+        self._write_meta()
+        for handle in self._files.values():
+            handle.close()
+        self._files = {}
+
+    def _write_table(self, entities: EntityStore):
+        self._table += 1
+        table = {
+            'table': self._table,
+            'entities': [
+                {k: v for k, v in view.to_dict().items() if k not in _DYNAMIC_KEYS}
+                for view in entities
+            ]
+        }
+        self._files['tables.jsonl'].write(json.dumps(table, default=_json_default).encode() + b'\n')
+        self._files['tables.jsonl'].flush()
+
+    def _write_lidar(self, sensor_frames: List[Dict]) -> int:
+        written = 0
+        for frame in sensor_frames:
+            cloud = frame['sensors'].get('lidar')
+            if cloud is None:
+                continue
+            node_id = frame['nodeId']
+            if node_id not in self._node_ids:
+                self._node_ids.append(node_id)
+                self._write_meta()
+            cloud = np.ascontiguousarray(cloud, dtype='<f4').reshape(-1, 4)
+            record = np.array([(self._node_ids.index(node_id), self._lidar_points, len(cloud))], dtype=LIDAR_DTYPE)
+            self._files['lidar.f32'].write(cloud)
+            self._files['lidar_index.bin'].write(record)
+            self._lidar_points += len(cloud)
+            self._lidar_records += 1
+            written += 1
+        return written
+
+    def _write_meta(self):
+        meta = {
+            'version': RECORDING_VERSION,
+            'created': self.created,
+            'recordLidar': self.record_lidar,
+            'recordAnomalies': self.record_anomalies,
+            'lidarNodes': self._node_ids,
+            'frames': self.frames
+        }
+        tmp = os.path.join(self.path, 'meta.json.tmp')
+        with open(tmp, 'w') as handle:
+            json.dump(meta, handle)
+        os.replace(tmp, os.path.join(self.path, 'meta.json'))
+
+
+class RecordedFrame:
+    """One frame of a recording. Arrays are read-only views into the memory maps."""
+
+    def __init__(self, index: int, frame: int, time: float, entities: List[Dict[str, Any]],
+                 positions: np.ndarray, velocities: np.ndarray, table: int,
+                 lidar: Dict[str, np.ndarray], anomalies: List[Dict]):
+        self.index = index
+        self.frame = frame
+        self.time = time
+        self.entities = entities  # Static attributes (id, type, role, ...) per row
+        self.positions = positions
+        self.velocities = velocities
+        self.table = table
+        self.lidar = lidar
+        self.anomalies = anomalies
+
+    @property
+    def ids(self) -> List[str]:
+        return [e['id'] for e in self.entities]
+
+
+class SessionRecording:
+    """Random-access reader over a recording directory."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as handle:
+            self.meta = json.load(handle)
+        if self.meta.get('version') != RECORDING_VERSION:
+            raise ValueError(f"Unsupported recording version: {self.meta.get('version')}")
+
+        self.index = self._map('index.bin', FRAME_DTYPE)
+        self.times = self.index['time']
+        self._positions = self._map('positions.f64', np.dtype('<f8'), 3)
+        self._velocities = self._map('velocities.f64', np.dtype('<f8'), 3)
+        self._lidar_index = self._map('lidar_index.bin', LIDAR_DTYPE)
+        self._lidar = self._map('lidar.f32', np.dtype('<f4'), 4)
+
+        self.tables: List[List[Dict[str, Any]]] = []
+        with open(os.path.join(path, 'tables.jsonl')) as handle:
+            for line in handle:
+                if line.endswith('\n'):
+                    self.tables.append(json.loads(line)['entities'])
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def duration(self) -> float:
+        return float(self.times[-1] - self.times[0]) if len(self) else 0.0
+
+    def seek(self, timestamp: float) -> int:
+        """Index of the first frame at or after ``timestamp``."""
+        return int(np.searchsorted(self.times, timestamp, side='left'))
+
+    def frame(self, index: int) -> RecordedFrame:
+        record = self.index[index]
+        start, count = int(record['row']), int(record['count'])
+
+        lidar = {}
+        first = int(record['lidar_start'])
+        for entry in self._lidar_index[first:first + int(record['lidar_count'])]:
+            point = int(entry['point'])
+            node_id = self.meta['lidarNodes'][int(entry['node'])]
+            lidar[node_id] = self._lidar[point:point + int(entry['count'])]
+
+        anomalies = []
+        if record['anomaly_offset'] >= 0:
+            with open(os.path.join(self.path, 'anomalies.jsonl'), 'rb') as handle:
+                handle.seek(int(record['anomaly_offset']))
+                anomalies = json.loads(handle.readline())['anomalies']
+
+        return RecordedFrame(
+            index=index,
+            frame=int(record['frame']),
+            time=float(record['time']),
+            entities=self.tables[int(record['table'])],
+            positions=self._positions[start:start + count],
+            velocities=self._velocities[start:start + count],
+            table=int(record['table']),
+            lidar=lidar,
+            anomalies=anomalies
+        )
+
+    def __iter__(self) -> Iterator[RecordedFrame]:
+        for index in range(len(self)):
+            yield self.frame(index)
+
+    def _map(self, name: str, dtype: np.dtype, width: int = 0) -> np.ndarray:
+        """Read-only memory map of whole records (a trailing partial record is ignored)."""
+        path = os.path.join(self.path, name)
+        record_size = dtype.itemsize * max(width, 1)
+        count = os.path.getsize(path) // record_size
+        shape = (count, width) if width else (count,)
+        if count == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=shape)
+
+
+class ReplayEngine:
+    """
+    Feeds a recording back through an orchestrator's sensor and anomaly stages
+    (no scenario behaviors or physics) at any speed, with random seek. Load the
+    matching scenario on the orchestrator first so detectors see its zones.
+    """
+
+    def __init__(self, orchestrator, recording: SessionRecording):
+        self.orchestrator = orchestrator
+        self.recording = recording
+        self.cursor = 0
+        self._loaded_table = None
+
+    def seek(self, timestamp: Optional[float] = None, frame_index: Optional[int] = None):
+        """Move the cursor to a time or a frame index."""
+        if frame_index is None:
+            frame_index = self.recording.seek(timestamp)
+        self.cursor = min(max(int(frame_index), 0), len(self.recording))
+
+    def step(self) -> Optional[Dict]:
+        """Replay the frame at the cursor. Returns the pipeline result, or None at the end."""
+        if self.cursor >= len(self.recording):
+            return None
+        recorded = self.recording.frame(self.cursor)
+        self.cursor += 1
+        self._load(recorded)
+        result = self.orchestrator.process_frame(recorded.time)
+        result['recorded'] = recorded
+        return result
+
+    def run(self, speed: Optional[float] = 1.0, end_time: Optional[float] = None,
+            callback: Optional[Callable[[Dict], None]] = None) -> int:
+        """
+        Replay from the cursor to ``end_time`` (or the end). ``speed`` is the
+        multiple of recorded time (2.0 = twice as fast); None or 0 replays as fast
+        as possible. Returns the number of frames replayed.
+        """
+        replayed = 0
+        wall_start = time.perf_counter()
+        sim_start = None
+        while self.cursor < len(self.recording):
+            frame_time = float(self.recording.times[self.cursor])
+            if end_time is not None and frame_time > end_time:
+                break
+            if speed:
+                if sim_start is None:
+                    sim_start = frame_time
+                delay = (frame_time - sim_start) / speed - (time.perf_counter() - wall_start)
+                if delay > 0:
+                    time.sleep(delay)
+            result = self.step()
+            replayed += 1
+            if callback is not None:
+                callback(result)
+        return replayed
+
+    def _load(self, recorded: RecordedFrame):
+        """Write a recorded frame's entity state into the orchestrator's store."""
+        store = self.orchestrator.entities
+        if recorded.table != self._loaded_table or len(store) != len(recorded.entities):
+            store.clear()
+            store.extend(dict(attrs) for attrs in recorded.entities)
+            self._loaded_table = recorded.table
+        store.positions[:] = recorded.positions
+        store.velocities[:] = recorded.velocities
+
+
+def _json_default(value):
+    # NumPy scalars and arrays inside anomaly payloads / attributes
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
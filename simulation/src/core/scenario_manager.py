@@ -2,8 +2,21 @@ from typing import List, Dict, Optional
 import numpy as np
 
 class Zone:
-    def __init__(self, name: str, bounds: tuple, area: float, type: str):
+    def __init__(self, name: str, bounds: Optional[tuple], area: Optional[float], type: str,
+                 polygon: Optional[List[tuple]] = None):
+        """
+        Axis-aligned zone from ``bounds``, or a polygonal zone from ``polygon``
+        vertices (bounds and area are derived from the polygon when omitted).
+        """
         self.name = name
+        self.polygon = polygon
+        if polygon is not None:
+            pts = np.asarray(polygon, dtype=float)
+            if bounds is None:
+                bounds = (pts[:, 0].min(), pts[:, 1].min(), pts[:, 0].max(), pts[:, 1].max())
+            if area is None:
+                # Shoelace formula
+                area = 0.5 * abs(np.dot(pts[:, 0], np.roll(pts[:, 1], 1)) - np.dot(pts[:, 1], np.roll(pts[:, 0], 1)))
         self.bounds = bounds # (x_min, y_min, x_max, y_max)
         self.area = area
         self.type = type
@@ -14,10 +27,16 @@ class Zone:
         }
 
 class Scenario:
-    def __init__(self):
+    def __init__(self, rng: Optional[np.random.Generator] = None):
         self.zones: List[Zone] = []
         self.entities: List[dict] = []
         self.sport = 'UNKNOWN'
+        # Optional ShardPool for crowd forces, attached by the orchestrator
+        self.shards = None
+        # Per-rule anomaly overrides by subtype, e.g. {'SPEED_VIOLATION': {'thresholds': {'PLAYER': 11.0}}}
+        self.anomaly_rules: Dict[str, dict] = {}
+        # Scenario randomness; the orchestrator passes its own seeded generator
+        self.rng = rng if rng is not None else np.random.default_rng()
 
     def initialize(self, entities: List[dict]):
         """Populate initial entities"""
@@ -29,9 +48,15 @@ class Scenario:
 
 class ScenarioManager:
     @staticmethod
-    def create_scenario(sport: str, config: dict) -> Scenario:
+    def create_scenario(sport: str, config: dict, rng: Optional[np.random.Generator] = None) -> Scenario:
         if sport == 'BASKETBALL':
             from ..sports.basketball import BasketballScenario
-            return BasketballScenario(config)
+            return BasketballScenario(config, rng)
+        elif sport == 'SOCCER':
+            from ..sports.soccer import SoccerScenario
+            return SoccerScenario(config, rng)
+        elif sport == 'COMBAT':
+            from ..sports.combat import CombatScenario
+            return CombatScenario(config, rng)
         else:
             raise ValueError(f"Unknown sport: {sport}")
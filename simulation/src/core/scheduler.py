@@ -0,0 +1,182 @@
+"""
+Deadline-aware scheduling for the real-time loop.
+
+Every frame and every stage has an absolute deadline on a monotonic clock
+(next = previous + period), so sleeping does not accumulate drift. When the
+loop falls more than a period behind, the missed frames/runs are skipped
+rather than replayed back to back, and optional stages are deferred while
+the frame has no budget left for them.
+"""
+import time
+from typing import Callable, Dict, Optional
+
+# Default stage rates in Hz. Sensor nodes default to their camera fps; physics
+# runs every frame through its fixed-step accumulator at PhysicsEngine.fixed_dt.
+DEFAULT_RATES = {
+    'anomalies': 5.0,
+    'publish': 10.0
+}
+
+
+class StageSchedule:
+    """Absolute-deadline schedule for one stage."""
+
+    def __init__(self, name: str, rate_hz: float, optional: bool = True, max_deferrals: int = 3):
+        self.name = name
+        self.optional = optional
+        self.max_deferrals = max_deferrals
+        self.period = 1.0 / rate_hz
+        self.next_due: Optional[float] = None
+        self.cost = 0.0  # Smoothed run time in seconds
+        self.deferrals = 0
+        self.runs = 0
+        self.skipped = 0
+        self.deferred = 0
+
+    @property
+    def rate(self) -> float:
+        return 1.0 / self.period
+
+    def set_rate(self, rate_hz: float):
+        if rate_hz <= 0:
+            raise ValueError(f"Rate for {self.name} must be positive")
+        self.period = 1.0 / rate_hz
+        self.next_due = None  # Re-anchor on the next frame
+
+    def due(self, now: float) -> bool:
+        if self.next_due is None:
+            self.next_due = now
+        return now >= self.next_due
+
+    def ran(self, now: float, seconds: float):
+        """Record a run at ``now`` that took ``seconds``."""
+        self.runs += 1
+        self.deferrals = 0
+        self.cost = seconds if self.runs == 1 else 0.8 * self.cost + 0.2 * seconds
+        if self.next_due is None:
+            # Rate changed (from another thread) since should_run: re-anchor here
+            self.next_due = now
+        self.next_due += self.period
+        if self.next_due <= now:
+            # More than a period behind: drop the missed runs
+            missed = int((now - self.next_due) / self.period) + 1
+            self.skipped += missed
+            self.next_due += missed * self.period
+
+
+class FrameScheduler:
+    """
+    Frame deadlines at ``target_fps`` plus per-stage schedules.
+
+    Each frame: ``begin_frame()``, then ``should_run(stage)`` / ``ran(stage,
+    seconds)`` for every stage, then ``wait()`` sleeps until the next frame
+    deadline. Rates may be changed from other threads at any time; changes
+    apply from the next frame.
+    """
+
+    def __init__(self, target_fps: float = 30.0, rates: Optional[Dict[str, float]] = None,
+                 clock: Callable[[], float] = time.perf_counter, sleep: Callable[[float], None] = time.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self.frame_period = 1.0 / target_fps
+        self.stages: Dict[str, StageSchedule] = {}
+        for name, rate in {**DEFAULT_RATES, **(rates or {})}.items():
+            self.add_stage(name, rate)
+        self.frame_start = 0.0
+        self.next_frame: Optional[float] = None
+        self.frames = 0
+        self.skipped_frames = 0
+
+    @property
+    def target_fps(self) -> float:
+        return 1.0 / self.frame_period
+
+    def set_target_fps(self, fps: float):
+        if fps <= 0:
+            raise ValueError("targetFps must be positive")
+        self.frame_period = 1.0 / fps
+        self.next_frame = None
+
+    def add_stage(self, name: str, rate_hz: float, optional: bool = True) -> StageSchedule:
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = StageSchedule(name, rate_hz, optional=optional)
+        else:
+            stage.set_rate(rate_hz)
+        return stage
+
+    def set_rate(self, name: str, rate_hz: float):
+        if name not in self.stages:
+            raise KeyError(f"Unknown stage: {name}")
+        self.stages[name].set_rate(rate_hz)
+
+    def reset(self):
+        """Re-anchor every deadline to now (after a pause)."""
+        self.next_frame = None
+        for stage in self.stages.values():
+            stage.next_due = None
+
+    def begin_frame(self) -> float:
+        now = self.clock()
+        if self.next_frame is None:
+            self.next_frame = now
+        self.frame_start = now
+        self.frames += 1
+        return now
+
+    def remaining(self, now: Optional[float] = None) -> float:
+        """Seconds left before this frame's budget runs out."""
+        return self.frame_start + self.frame_period - (self.clock() if now is None else now)
+
+    def should_run(self, name: str, now: Optional[float] = None) -> bool:
+        """
+        Whether a stage is due. An optional stage whose expected cost no longer
+        fits in the frame is deferred, at most ``max_deferrals`` frames in a row.
+        """
+        stage = self.stages[name]
+        now = self.clock() if now is None else now
+        if not stage.due(now):
+            return False
+        if stage.optional and stage.runs and stage.cost > self.remaining(now) \
+                and stage.deferrals < stage.max_deferrals:
+            stage.deferrals += 1
+            stage.deferred += 1
+            return False
+        return True
+
+    def ran(self, name: str, seconds: float, now: Optional[float] = None):
+        self.stages[name].ran(self.clock() if now is None else now, seconds)
+
+    def wait(self) -> float:
+        """Sleep until the next frame deadline; returns the time slept."""
+        if self.next_frame is None:
+            # Rate changed mid-frame: re-anchor on this frame's start
+            self.next_frame = self.frame_start
+        self.next_frame += self.frame_period
+        now = self.clock()
+        if self.next_frame <= now:
+            # Overran by a whole frame or more: start the next frame now and skip the rest
+            missed = int((now - self.next_frame) / self.frame_period)
+            self.skipped_frames += missed
+            self.next_frame += missed * self.frame_period
+            return 0.0
+        delay = self.next_frame - now
+        self.sleep(delay)
+        return delay
+
+    def get_stats(self) -> Dict:
+        return {
+            'targetFps': self.target_fps,
+            'frames': self.frames,
+            'skippedFrames': self.skipped_frames,
+            'stages': {
+                name: {
+                    'rate': stage.rate,
+                    'runs': stage.runs,
+                    'skipped': stage.skipped,
+                    'deferred': stage.deferred,
+                    'costMs': round(stage.cost * 1000, 3)
+                }
+                for name, stage in self.stages.items()
+            }
+        }
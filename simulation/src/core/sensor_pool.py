@@ -0,0 +1,364 @@
+"""
+Parallel sensor stage: EdgeNode.generate_frame sharded across worker processes.
+
+Each frame the entity positions/velocities are written once into a shared-memory
+block; workers mirror them into a local EntityStore (ids are only resent when the
+entity table changes) and run their nodes. JPEG frames and point clouds are
+written into per-node shared buffers owned by the worker, so only small
+descriptors travel over the pipes. Results are returned in node order and every
+node sees the same frame timestamp; with per-node seeds (see node_seed) the
+output matches the serial path exactly.
+"""
+import multiprocessing as mp
+import sys
+import threading
+import traceback
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .entity_store import EntityStore, ids_of, positions_of, velocities_of
+from ..nodes.edge_node import EdgeNode
+
+
+def node_seed(seed: Optional[int], index: int) -> Optional[int]:
+    """Deterministic per-node seed derived from the simulation seed."""
+    if seed is None:
+        return None
+    return int(np.random.SeedSequence([seed, index]).generate_state(1)[0])
+
+
+# Held while creating blocks or attaching untracked (see _attach_untracked)
+_TRACKER_LOCK = threading.Lock()
+
+
+def _attach_untracked(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to a block another process owns without registering it with this
+    process's resource_tracker (``track=False``, which Python < 3.13 lacks).
+    A registration would make a tracker of our own unlink the owner's block
+    when this process exits. Unregistering after the fact is no fix: spawned
+    workers share their parent's tracker, so it would drop the owner's entry.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    with _TRACKER_LOCK:
+        register = resource_tracker.register
+        resource_tracker.register = (
+            lambda resource, rtype: None if rtype == 'shared_memory' else register(resource, rtype)
+        )
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class _SharedBuffer:
+    """Growable shared-memory block, re-created (with a new name) when it must grow."""
+
+    def __init__(self, min_size: int = 1 << 16):
+        self.min_size = min_size
+        self.shm: Optional[shared_memory.SharedMemory] = None
+
+    @property
+    def name(self) -> Optional[str]:
+        return self.shm.name if self.shm else None
+
+    def ensure(self, nbytes: int) -> bool:
+        """Make room for ``nbytes``. Returns True if the block was re-created."""
+        if self.shm is not None and self.shm.size >= nbytes:
+            return False
+        size = max(nbytes, self.min_size, 2 * self.shm.size if self.shm else 0)
+        self.close(unlink=True)
+        with _TRACKER_LOCK:
+            # Not while an attach has registration patched out: owned blocks stay tracked
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        return True
+
+    def close(self, unlink: bool = False):
+        if self.shm is None:
+            return
+        self.shm.close()
+        if unlink:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+        self.shm = None
+
+
+class _Attached:
+    """
+    Read side of a _SharedBuffer, re-attached whenever the owner renames it.
+    Attachments are not tracked here; the owner unlinks the block. Blocks that
+    still back arrays handed out to callers cannot be unmapped yet; they are
+    retired and closed once those arrays are gone.
+    """
+
+    def __init__(self):
+        self.shm: Optional[shared_memory.SharedMemory] = None
+        self._retired: List[shared_memory.SharedMemory] = []
+
+    def attach(self, name: str) -> shared_memory.SharedMemory:
+        if self.shm is None or self.shm.name != name:
+            if self.shm is not None:
+                self._retired.append(self.shm)
+            self.shm = _attach_untracked(name)
+        if self._retired:
+            self._release_retired()
+        return self.shm
+
+    def close(self):
+        if self.shm is not None:
+            self._retired.append(self.shm)
+            self.shm = None
+        self._release_retired()
+
+    def _release_retired(self):
+        still_exported = []
+        for shm in self._retired:
+            try:
+                shm.close()
+            except BufferError:
+                still_exported.append(shm)
+        self._retired = still_exported
+
+
+def _state_arrays(buf, capacity: int):
+    """(positions, velocities) views over an entity state block of ``capacity`` rows."""
+    positions = np.ndarray((capacity, 3), dtype=np.float64, buffer=buf, offset=0)
+    velocities = np.ndarray((capacity, 3), dtype=np.float64, buffer=buf, offset=capacity * 24)
+    return positions, velocities
+
+
+def _worker_main(conn):
+    """Worker process: owns a subset of nodes and their output buffers."""
+    nodes: Dict[int, EdgeNode] = {}
+    outputs: Dict[int, Dict[str, _SharedBuffer]] = {}
+    state = _Attached()
+    mirror = EntityStore()
+
+    try:
+        while True:
+            message = conn.recv()
+            kind = message[0]
+            if kind == 'stop':
+                break
+            try:
+                if kind == 'add':
+                    _, index, node_config, seed = message
+                    nodes[index] = EdgeNode.from_config(node_config, seed=seed)
+                    outputs[index] = {'camera': _SharedBuffer(), 'lidar': _SharedBuffer()}
+                    conn.send(('ok', None))
+                elif kind == 'frame':
+                    _, timestamp, count, capacity, state_name, ids, due = message
+                    if ids is not None:
+                        mirror.clear()
+                        mirror.extend({'id': entity_id} for entity_id in ids)
+                    if count:
+                        positions, velocities = _state_arrays(state.attach(state_name).buf, capacity)
+                        mirror.positions[:] = positions[:count]
+                        mirror.velocities[:] = velocities[:count]
+                        del positions, velocities  # Release the mapping before it can be renamed
+                    conn.send(('ok', [
+                        _run_node(index, nodes[index], outputs[index], mirror, timestamp)
+                        for index in due
+                    ]))
+            except Exception:
+                conn.send(('error', traceback.format_exc()))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        state.close()
+        for buffers in outputs.values():
+            for buffer in buffers.values():
+                buffer.close(unlink=True)
+
+
+def _run_node(index: int, node: EdgeNode, buffers: Dict[str, _SharedBuffer],
+              entities: EntityStore, timestamp: float) -> Dict[str, Any]:
+    """Generate one node frame; bulky sensor outputs go into the node's shared buffers."""
+    frame = node.generate_frame(entities, timestamp)
+    sensors = frame['sensors']
+    result: Dict[str, Any] = {'index': index, 'imu': sensors.get('imu'), 'timings': frame['timings']}
+
+    jpeg = sensors.get('camera')
+    if jpeg is not None:
+        buffer = buffers['camera']
+        buffer.ensure(len(jpeg))
+        buffer.shm.buf[:len(jpeg)] = jpeg
+        result['camera'] = (buffer.name, len(jpeg))
+
+    cloud = sensors.get('lidar')
+    if cloud is not None:
+        buffer = buffers['lidar']
+        buffer.ensure(cloud.nbytes)
+        np.ndarray(cloud.shape, dtype=cloud.dtype, buffer=buffer.shm.buf)[:] = cloud
+        result['lidar'] = (buffer.name, cloud.shape, cloud.dtype.str)
+
+    return result
+
+
+class SensorPool:
+    """
+    Runs every node's sensors across ``workers`` processes (node i lives on
+    worker i % workers). ``generate`` returns one frame dict per node, in node
+    order, shaped like EdgeNode.generate_frame.
+
+    Point clouds are not copied: each one aliases its worker's output buffer,
+    which the next ``generate`` call overwrites in place. Copy a cloud to keep
+    it past the frame (run_headless and the LIDAR stream hub do).
+    """
+
+    def __init__(self, workers: Optional[int] = None, seed: Optional[int] = None,
+                 start_method: str = 'spawn'):
+        self.workers = max(int(workers or mp.cpu_count()), 1)
+        self.seed = seed
+        self._ctx = mp.get_context(start_method)
+        self._processes = []
+        self._conns = []
+        self._node_ids: List[str] = []
+        self._state = _SharedBuffer()
+        self._state_capacity = 0
+        self._ids_keys: List[Optional[tuple]] = []  # Entity table each worker last mirrored
+        self._attached: Dict[tuple, _Attached] = {}
+        # Nodes may be added from API threads while the loop is generating
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._processes)
+
+    def start(self) -> 'SensorPool':
+        if self.running:
+            return self
+        for _ in range(self.workers):
+            parent, child = self._ctx.Pipe()
+            process = self._ctx.Process(target=_worker_main, args=(child,), daemon=True)
+            process.start()
+            child.close()
+            self._processes.append(process)
+            self._conns.append(parent)
+            self._ids_keys.append(None)
+        return self
+
+    def add_node(self, node_config: dict):
+        """Create the node on its worker (seeded like the serial path would be)."""
+        with self._lock:
+            index = len(self._node_ids)
+            conn = self._conns[index % self.workers]
+            conn.send(('add', index, node_config, node_seed(self.seed, index)))
+            self._receive(conn)
+            self._node_ids.append(node_config['nodeId'])
+
+    def generate(self, entities, timestamp: float,
+                 node_indices: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """
+        Frames for the nodes in ``node_indices`` (None = every node), in node
+        order; their 'lidar' arrays are only valid until the next call.
+        """
+        with self._lock:
+            return self._generate(entities, timestamp, node_indices)
+
+    def _generate(self, entities, timestamp: float, node_indices: Optional[List[int]]) -> List[Dict[str, Any]]:
+        indices = range(len(self._node_ids)) if node_indices is None else sorted(node_indices)
+        if not indices:
+            return []
+        # Only workers with a due node get the frame
+        due: Dict[int, List[int]] = {}
+        for index in indices:
+            due.setdefault(index % self.workers, []).append(index)
+
+        count, key = self._publish_state(entities)
+        ids = None
+        for worker, worker_due in due.items():
+            # A worker skipped while the table changed catches up on its next frame
+            worker_ids = None
+            if key is None or key != self._ids_keys[worker]:
+                ids = list(ids_of(entities)) if ids is None else ids
+                worker_ids = ids
+                self._ids_keys[worker] = key
+            self._conns[worker].send(('frame', timestamp, count, self._state_capacity, self._state.name,
+                                      worker_ids, worker_due))
+
+        frames: Dict[int, Dict[str, Any]] = {}
+        for worker in due:
+            for result in self._receive(self._conns[worker]):
+                frames[result['index']] = self._frame(result, timestamp)
+        return [frames[index] for index in indices]
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        for conn in self._conns:
+            try:
+                conn.send(('stop',))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for conn in self._conns:
+            conn.close()
+        for attached in self._attached.values():
+            attached.close()
+        self._attached.clear()
+        self._state.close(unlink=True)
+        self._processes = []
+        self._conns = []
+        self._node_ids = []
+        self._ids_keys = []
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _publish_state(self, entities):
+        """
+        Copy positions/velocities into shared memory. Returns the entity count
+        and a key for the entity table (None when it cannot be tracked).
+        """
+        positions = positions_of(entities)
+        count = len(positions)
+        if count > self._state_capacity:
+            self._state_capacity = max(count, 2 * self._state_capacity, 64)
+            self._state.ensure(self._state_capacity * 48)
+        if count:
+            shared_pos, shared_vel = _state_arrays(self._state.shm.buf, self._state_capacity)
+            shared_pos[:count] = positions
+            shared_vel[:count] = velocities_of(entities)
+
+        key = (id(entities), entities.version) if isinstance(entities, EntityStore) else None
+        return count, key
+
+    def _frame(self, result: Dict[str, Any], timestamp: float) -> Dict[str, Any]:
+        sensors: Dict[str, Any] = {}
+        if 'camera' in result:
+            name, size = result['camera']
+            sensors['camera'] = bytes(self._attach(result['index'], 'camera', name).buf[:size])
+        if 'lidar' in result:
+            name, shape, dtype = result['lidar']
+            sensors['lidar'] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=self._attach(result['index'], 'lidar', name).buf)
+        if result.get('imu') is not None:
+            sensors['imu'] = result['imu']
+        return {'nodeId': self._node_ids[result['index']], 'timestamp': timestamp, 'sensors': sensors,
+                'timings': result.get('timings', {})}
+
+    def _attach(self, index: int, sensor: str, name: str) -> shared_memory.SharedMemory:
+        # Workers re-create output buffers under a new name when they grow
+        attached = self._attached.get((index, sensor))
+        if attached is None:
+            attached = self._attached[(index, sensor)] = _Attached()
+        return attached.attach(name)
+
+    def _receive(self, conn):
+        try:
+            status, payload = conn.recv()
+        except EOFError:
+            raise RuntimeError("Sensor worker exited unexpectedly")
+        if status == 'error':
+            raise RuntimeError(f"Sensor worker failed:\n{payload}")
+        return payload
@@ -0,0 +1,431 @@
+"""
+Many independent simulations behind one API.
+
+Each session is its own SimulationOrchestrator (own scenario, nodes, clock,
+publisher tagged with the session id). Sessions live on hosts:
+
+* LocalSessionHost runs them as threads in the API process.
+* ProcessSessionHost runs them inside a worker process. Commands go over a
+  pipe and camera frames come back on a queue, but only for nodes that
+  someone is watching.
+
+SessionManager places each new session on the least-loaded host and enforces
+the session count and per-session limits (nodes, entities, frame and stage
+rates, worker processes). A session may only set the orchestrator config keys
+in SESSION_CONFIG_KEYS; the publisher URL, start methods and the like stay
+with the operator, and recording paths are confined to RECORDINGS_DIR.
+"""
+import multiprocessing as mp
+import queue
+import threading
+import traceback
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_LIMITS = {
+    'maxNodes': 8,
+    'maxEntities': 20000,
+    'maxFps': 60,
+    'maxRate': 120,      # Hz, for any stage rate, node rate or physics step
+    'maxWorkers': 2,     # sensorWorkers and shardWorkers processes, each
+    'maxSubsteps': 8     # physics substeps / maxStepsPerFrame
+}
+
+# Orchestrator config a session may set
+SESSION_CONFIG_KEYS = frozenset({
+    'targetFps', 'rates', 'physics', 'seed', 'wireFormat', 'sensorWorkers', 'shardWorkers',
+    'shardMinAgents', 'anomalyCooldown', 'anomalyCloseAfter', 'record'
+})
+
+
+class SessionError(Exception):
+    """Base class for session manager errors."""
+
+
+class SessionNotFound(SessionError):
+    pass
+
+
+class SessionLimitExceeded(SessionError):
+    pass
+
+
+def orchestrator_status(orchestrator) -> Dict[str, Any]:
+    """Status document shared by /simulation/status and the session routes."""
+    return {
+        "running": orchestrator.running,
+        "paused": orchestrator.paused,
+        "active_scenario": orchestrator.scenario.sport if orchestrator.scenario else None,
+        "fps": getattr(orchestrator, 'actual_fps', 0),
+        "target_fps": getattr(orchestrator, 'target_fps', 30),
+        "entity_count": len(orchestrator.entities),
+        "frame": orchestrator.frame_count,
+        "nodes": [node.node_id for node in orchestrator.nodes],
+        "publisher": orchestrator.publisher.get_stats(),
+        "timings": orchestrator.metrics.summary(),
+        "scheduler": orchestrator.scheduler.get_stats(),
+        "rates": orchestrator.get_stage_rates(),
+        "shards": orchestrator.shard_pool.get_stats() if orchestrator.shard_pool else None,
+        "anomalies": orchestrator.anomaly_generator.lifecycle.get_stats()
+    }
+
+
+def apply_runtime_config(orchestrator, config: dict, limits: Optional[dict] = None):
+    """
+    Apply a live config change (targetFps, rates, anomalyCooldown). Raises
+    KeyError/ValueError for unknown stages or bad values and SessionLimitExceeded
+    for rates over ``limits``.
+    """
+    if 'anomalyRate' in config:
+        raise ValueError("anomalyRate is not supported; set rates.anomalies (Hz) instead")
+    if 'targetFps' in config:
+        fps = float(config['targetFps'])
+        _check_rate('targetFps', fps, limits['maxFps'] if limits else float('inf'))
+        orchestrator.target_fps = fps
+    # Per-stage rates in Hz: physics, anomalies, publish, sensors or a node id
+    for stage, rate in config.get('rates', {}).items():
+        _check_rate(stage, rate, limits['maxRate'] if limits else float('inf'))
+        orchestrator.set_stage_rate(stage, rate)
+    if 'anomalyCooldown' in config and hasattr(orchestrator, 'anomaly_generator'):
+        orchestrator.anomaly_generator.min_anomaly_interval = float(config['anomalyCooldown'])
+
+
+def check_session_config(config: dict, limits: dict) -> dict:
+    """
+    Validated copy of a session's orchestrator config. Raises ValueError for
+    keys a session may not set and SessionLimitExceeded for values over limits.
+    """
+    from .recorder import resolve_recording_path
+
+    unknown = set(config) - SESSION_CONFIG_KEYS
+    if unknown:
+        raise ValueError(f"Unsupported session config: {', '.join(sorted(unknown))}")
+    config = dict(config)
+    _check_rate('targetFps', config.get('targetFps', 30), limits['maxFps'])
+    for stage, rate in config.get('rates', {}).items():
+        _check_rate(stage, rate, limits['maxRate'])
+    physics = config.get('physics', {})
+    if 'hz' in physics:
+        _check_rate('physics', physics['hz'], limits['maxRate'])
+    for key in ('substeps', 'maxStepsPerFrame'):
+        if int(physics.get(key, 1)) > limits['maxSubsteps']:
+            raise SessionLimitExceeded(f"physics {key} exceeds limit {limits['maxSubsteps']}")
+    for key in ('sensorWorkers', 'shardWorkers'):
+        if int(config.get(key, 0) or 0) > limits['maxWorkers']:
+            raise SessionLimitExceeded(f"{key} exceeds limit {limits['maxWorkers']}")
+    if config.get('record'):
+        record = dict(config['record'])
+        record['path'] = resolve_recording_path(record.get('path'))
+        config['record'] = record
+    return config
+
+
+def _check_rate(name: str, rate, limit: float):
+    rate = float(rate)
+    if not rate > 0:
+        raise ValueError(f"Rate for {name} must be positive")
+    if not rate <= limit:
+        raise SessionLimitExceeded(f"{name} {rate} exceeds limit {limit}")
+
+
+def build_session(session_id: str, spec: dict, limits: dict):
+    """Create and load an orchestrator for a session spec, enforcing limits before building it."""
+    from .orchestrator import SimulationOrchestrator
+
+    nodes = spec.get('nodes', [])
+    if len(nodes) > limits['maxNodes']:
+        raise SessionLimitExceeded(f"{len(nodes)} nodes exceeds limit {limits['maxNodes']}")
+    for node_config in nodes:
+        if node_config.get('rate'):
+            _check_rate(node_config.get('nodeId', 'node'), node_config['rate'], limits['maxRate'])
+    config = dict(check_session_config(spec.get('config', {}), limits), sessionId=session_id)
+
+    # Agent crowds allocate one entity per spectator: refuse before building
+    scenario = spec.get('scenario', {})
+    crowd = int(scenario.get('crowdCount', 5000)) if scenario.get('crowdMode') == 'agents' else 0
+    if crowd > limits['maxEntities']:
+        raise SessionLimitExceeded(f"crowdCount {crowd} exceeds limit {limits['maxEntities']}")
+
+    orchestrator = SimulationOrchestrator(config)
+    for node_config in nodes:
+        orchestrator.add_node(node_config)
+    orchestrator.load_scenario(spec.get('sport', 'BASKETBALL'), scenario)
+    if len(orchestrator.entities) > limits['maxEntities']:
+        raise SessionLimitExceeded(
+            f"{len(orchestrator.entities)} entities exceeds limit {limits['maxEntities']}"
+        )
+    return orchestrator
+
+
+class _Sessions:
+    """Sessions of one host and the operations every host supports."""
+
+    def __init__(self, on_frame: Callable[[str, str, bytes], None]):
+        self.on_frame = on_frame
+        self.sessions: Dict[str, Any] = {}
+        self.limits: Dict[str, dict] = {}
+        self.watched = set()  # (session_id, node_id) with viewers
+
+    def create(self, session_id: str, spec: dict, limits: dict):
+        orchestrator = build_session(session_id, spec, limits)
+        self.limits[session_id] = limits
+        orchestrator.camera_frame_listeners.append(
+            lambda node_id, frame: self._frame(session_id, node_id, frame)
+        )
+        self.sessions[session_id] = orchestrator
+        return orchestrator_status(orchestrator)
+
+    def start(self, session_id: str):
+        self._get(session_id).start()
+        return orchestrator_status(self._get(session_id))
+
+    def stop(self, session_id: str):
+        self._get(session_id).stop()
+        return orchestrator_status(self._get(session_id))
+
+    def status(self, session_id: str):
+        return orchestrator_status(self._get(session_id))
+
+    def metrics(self, session_id: str):
+        return self._get(session_id).metrics.render_prometheus()
+
+    def update(self, session_id: str, config: dict):
+        orchestrator = self._get(session_id)
+        apply_runtime_config(orchestrator, config, self.limits[session_id])
+        return orchestrator_status(orchestrator)
+
+    def delete(self, session_id: str):
+        orchestrator = self.sessions.pop(session_id, None)
+        if orchestrator is None:
+            raise SessionNotFound(session_id)
+        self.limits.pop(session_id, None)
+        orchestrator.stop()
+        self.watched = {key for key in self.watched if key[0] != session_id}
+
+    def watch(self, session_id: str, node_id: str, watching: bool):
+        if watching:
+            self.watched.add((session_id, node_id))
+        else:
+            self.watched.discard((session_id, node_id))
+
+    def shutdown(self):
+        for session_id in list(self.sessions):
+            self.delete(session_id)
+
+    def _frame(self, session_id: str, node_id: str, frame: bytes):
+        if (session_id, node_id) in self.watched:
+            self.on_frame(session_id, node_id, frame)
+
+    def _get(self, session_id: str):
+        orchestrator = self.sessions.get(session_id)
+        if orchestrator is None:
+            raise SessionNotFound(session_id)
+        return orchestrator
+
+
+class LocalSessionHost:
+    """Sessions as threads of the API process."""
+
+    def __init__(self, on_frame: Callable[[str, str, bytes], None]):
+        self._sessions = _Sessions(on_frame)
+        self._lock = threading.Lock()
+        self.session_ids = set()
+
+    def call(self, command: str, *args):
+        with self._lock:
+            return getattr(self._sessions, command)(*args)
+
+    def close(self):
+        self.call('shutdown')
+
+
+def _host_main(conn, frames):
+    """Worker process: serve session commands until told to stop."""
+    def forward(session_id: str, node_id: str, frame: bytes):
+        # Never block a simulation loop on a slow reader; viewers only want the latest frame
+        try:
+            frames.put_nowait((session_id, node_id, frame))
+        except queue.Full:
+            pass
+
+    sessions = _Sessions(forward)
+    try:
+        while True:
+            message = conn.recv()
+            if message[0] == 'close':
+                break
+            command, args = message
+            try:
+                conn.send(('ok', getattr(sessions, command)(*args)))
+            except SessionError as e:
+                conn.send(('error', (type(e).__name__, str(e))))
+            except (KeyError, ValueError) as e:
+                conn.send(('error', ('ValueError', str(e))))
+            except Exception:
+                conn.send(('error', ('RuntimeError', traceback.format_exc())))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        sessions.shutdown()
+        frames.put(None)
+
+
+class ProcessSessionHost:
+    """Sessions inside a worker process, driven over a pipe."""
+
+    def __init__(self, on_frame: Callable[[str, str, bytes], None], start_method: str = 'spawn'):
+        ctx = mp.get_context(start_method)
+        self._conn, child = ctx.Pipe()
+        self._frames = ctx.Queue(maxsize=64)
+        self._process = ctx.Process(target=_host_main, args=(child, self._frames), daemon=True)
+        self._process.start()
+        child.close()
+        self._lock = threading.Lock()
+        self._on_frame = on_frame
+        self._reader = threading.Thread(target=self._read_frames, daemon=True)
+        self._reader.start()
+        self.session_ids = set()
+
+    def call(self, command: str, *args):
+        with self._lock:
+            self._conn.send((command, args))
+            try:
+                status, payload = self._conn.recv()
+            except EOFError:
+                raise SessionError("Session host exited unexpectedly")
+        if status == 'error':
+            kind, message = payload
+            raise {
+                'SessionNotFound': SessionNotFound,
+                'SessionLimitExceeded': SessionLimitExceeded,
+                'ValueError': ValueError
+            }.get(kind, SessionError)(message)
+        return payload
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.send(('close',))
+            except (BrokenPipeError, OSError):
+                pass
+        self._process.join(timeout=10)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._conn.close()
+
+    def _read_frames(self):
+        while True:
+            try:
+                item = self._frames.get()
+            except (EOFError, OSError):
+                return
+            if item is None:
+                return
+            self._on_frame(*item)
+
+
+class SessionManager:
+    """
+    Session registry and placement. ``workers`` > 0 hosts sessions in that
+    many worker processes; 0 keeps them in this process. Camera frames of
+    watched nodes are passed to ``on_frame(session_id, node_id, jpeg)``.
+    """
+
+    def __init__(self, workers: int = 0, max_sessions: int = 32, limits: Optional[dict] = None,
+                 on_frame: Optional[Callable[[str, str, bytes], None]] = None,
+                 start_method: str = 'spawn'):
+        self.max_sessions = max_sessions
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.on_frame = on_frame or (lambda session_id, node_id, frame: None)
+        if workers > 0:
+            self.hosts = [ProcessSessionHost(self._frame, start_method) for _ in range(workers)]
+        else:
+            self.hosts = [LocalSessionHost(self._frame)]
+        self._placement: Dict[str, Any] = {}
+        self._watchers: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def create(self, spec: dict, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Create (but do not start) a session. Returns its status."""
+        session_id = session_id or uuid.uuid4().hex[:12]
+        limits = dict(self.limits)
+        # Sessions may ask for tighter limits, never looser ones
+        for key, value in spec.get('limits', {}).items():
+            if key in limits:
+                limits[key] = min(limits[key], value)
+        with self._lock:
+            if session_id in self._placement:
+                raise ValueError(f"Session already exists: {session_id}")
+            if len(self._placement) >= self.max_sessions:
+                raise SessionLimitExceeded(f"Session limit reached ({self.max_sessions})")
+            host = min(self.hosts, key=lambda h: len(h.session_ids))
+            self._placement[session_id] = host
+            host.session_ids.add(session_id)
+        try:
+            status = host.call('create', session_id, spec, limits)
+        except Exception:
+            self._forget(session_id)
+            raise
+        return dict(status, sessionId=session_id)
+
+    def list(self) -> List[str]:
+        with self._lock:
+            return sorted(self._placement)
+
+    def start(self, session_id: str) -> Dict[str, Any]:
+        return self._host(session_id).call('start', session_id)
+
+    def stop(self, session_id: str) -> Dict[str, Any]:
+        return self._host(session_id).call('stop', session_id)
+
+    def status(self, session_id: str) -> Dict[str, Any]:
+        return self._host(session_id).call('status', session_id)
+
+    def metrics(self, session_id: str) -> str:
+        return self._host(session_id).call('metrics', session_id)
+
+    def update(self, session_id: str, config: dict) -> Dict[str, Any]:
+        return self._host(session_id).call('update', session_id, config)
+
+    def delete(self, session_id: str):
+        self._host(session_id).call('delete', session_id)
+        self._forget(session_id)
+
+    def watch(self, session_id: str, node_id: str, watching: bool = True):
+        """
+        Add/remove a viewer of a node. Frames are forwarded to ``on_frame``
+        while the node has at least one viewer.
+        """
+        key = (session_id, node_id)
+        with self._lock:
+            before = self._watchers.get(key, 0)
+            after = max(before + (1 if watching else -1), 0)
+            if after:
+                self._watchers[key] = after
+            else:
+                self._watchers.pop(key, None)
+        if bool(before) != bool(after):
+            self._host(session_id).call('watch', session_id, node_id, bool(after))
+
+    def close(self):
+        for host in self.hosts:
+            host.close()
+        with self._lock:
+            self._placement.clear()
+
+    def _host(self, session_id: str):
+        with self._lock:
+            host = self._placement.get(session_id)
+        if host is None:
+            raise SessionNotFound(session_id)
+        return host
+
+    def _forget(self, session_id: str):
+        with self._lock:
+            host = self._placement.pop(session_id, None)
+            self._watchers = {key: n for key, n in self._watchers.items() if key[0] != session_id}
+            if host is not None:
+                host.session_ids.discard(session_id)
+
+    def _frame(self, session_id: str, node_id: str, frame: bytes):
+        self.on_frame(session_id, node_id, frame)
@@ -0,0 +1,176 @@
+"""
+Spatial domain decomposition of crowd forces across worker processes.
+
+The neighbour search behind the social-force model is what grows with a
+crowd's size and density; driving forces and integration are a few passes
+over the arrays and stay in the simulation process. Each step the moving
+agents are sorted along the crowd's longer axis (x or y, by extent) and cut
+into one strip per worker with the same number of agents, so shards stay
+balanced however the crowd is spread over the venue, and strips cut across
+the long side keep the halos short.
+
+The sorted positions go into one shared-memory block. Shard k computes forces
+for the agents of its strip plus a halo of ghost agents within ``cutoff`` of
+either edge, which it reads straight from the neighbouring strips in the same
+block, and writes forces back for its own agents only. Every agent is owned by
+exactly one shard, so merging is a scatter back to the original order, and the
+result matches the single-process computation up to summation order. Anomaly
+detection and publishing keep seeing the one merged EntityStore.
+"""
+import multiprocessing as mp
+import threading
+import traceback
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .sensor_pool import _Attached, _SharedBuffer
+from ..sports.crowd import social_repulsion
+
+
+def _shard_arrays(buf, capacity: int):
+    """(sorted positions, forces) views over a block of ``capacity`` agents."""
+    positions = np.ndarray((capacity, 2), dtype=np.float64, buffer=buf, offset=0)
+    forces = np.ndarray((capacity, 2), dtype=np.float64, buffer=buf, offset=capacity * 16)
+    return positions, forces
+
+
+def _worker_main(conn):
+    """Worker process: forces for one strip (rows start:stop) with its halo (lo:hi)."""
+    block = _Attached()
+    try:
+        while True:
+            message = conn.recv()
+            if message[0] == 'stop':
+                break
+            try:
+                _, name, capacity, lo, start, stop, hi, params = message
+                positions, forces = _shard_arrays(block.attach(name).buf, capacity)
+                local = social_repulsion(positions[lo:hi], **params)
+                forces[start:stop] = local[start - lo:stop - lo]
+                del positions, forces  # Release the mapping before it can be renamed
+                conn.send(('ok', None))
+            except Exception:
+                conn.send(('error', traceback.format_exc()))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        block.close()
+
+
+class ShardPool:
+    """
+    Crowd repulsion split into ``workers`` spatial strips, one per process.
+    Below ``min_agents`` moving agents the pipes cost more than they save and
+    the forces are computed in-process.
+    """
+
+    def __init__(self, workers: Optional[int] = None, min_agents: int = 4000,
+                 start_method: str = 'spawn'):
+        self.workers = max(int(workers or mp.cpu_count()), 1)
+        self.min_agents = min_agents
+        self._ctx = mp.get_context(start_method)
+        self._processes = []
+        self._conns = []
+        self._block = _SharedBuffer()
+        self._capacity = 0
+        # Owned and halo agents per shard, and the axis cut, in the last sharded step
+        self.last_split: List[Dict[str, int]] = []
+        self.last_axis = 0
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._processes)
+
+    def start(self) -> 'ShardPool':
+        if self.running:
+            return self
+        for _ in range(self.workers):
+            parent, child = self._ctx.Pipe()
+            process = self._ctx.Process(target=_worker_main, args=(child,), daemon=True)
+            process.start()
+            child.close()
+            self._processes.append(process)
+            self._conns.append(parent)
+        return self
+
+    def repulsion(self, pos: np.ndarray, radius: float, strength: float, range_b: float,
+                  cutoff: float) -> np.ndarray:
+        """Same contract as crowd.social_repulsion, computed shard by shard."""
+        params = {'radius': radius, 'strength': strength, 'range_b': range_b, 'cutoff': cutoff}
+        count = len(pos)
+        if count < max(self.min_agents, 2) or not self.running:
+            return social_repulsion(pos, **params)
+        with self._lock:
+            return self._repulsion(pos, params)
+
+    def close(self):
+        with self._lock:
+            for conn in self._conns:
+                try:
+                    conn.send(('stop',))
+                except (BrokenPipeError, OSError):
+                    pass
+            for process in self._processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+            for conn in self._conns:
+                conn.close()
+            self._block.close(unlink=True)
+            self._capacity = 0
+            self._processes = []
+            self._conns = []
+
+    def get_stats(self) -> Dict:
+        return {'workers': self.workers, 'running': self.running, 'axis': 'xy'[self.last_axis],
+                'shards': self.last_split}
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _repulsion(self, pos: np.ndarray, params: Dict[str, float]) -> np.ndarray:
+        count = len(pos)
+        if count > self._capacity:
+            self._capacity = max(count, 2 * self._capacity)
+            self._block.ensure(self._capacity * 32)
+        shared_pos, shared_force = _shard_arrays(self._block.shm.buf, self._capacity)
+
+        # Strips across the longer side: a tall crowd cut along x would give each
+        # shard a thin sliver whose halo is most of its neighbours
+        extent = pos.max(axis=0) - pos.min(axis=0)
+        axis = self.last_axis = int(extent[1] > extent[0])
+        order = np.argsort(pos[:, axis], kind='stable')
+        np.take(pos, order, axis=0, out=shared_pos[:count])
+        coord = shared_pos[:count, axis]
+
+        # Equal-count strips; each halo reaches ``cutoff`` past the strip's edge agents
+        cuts = np.arange(self.workers + 1) * count // self.workers
+        active = []
+        self.last_split = []
+        for conn, start, stop in zip(self._conns, cuts[:-1], cuts[1:]):
+            if start == stop:
+                continue
+            lo = int(np.searchsorted(coord, coord[start] - params['cutoff'], side='left'))
+            hi = int(np.searchsorted(coord, coord[stop - 1] + params['cutoff'], side='right'))
+            conn.send(('step', self._block.name, self._capacity, lo, int(start), int(stop), hi, params))
+            active.append(conn)
+            self.last_split.append({'owned': int(stop - start), 'halo': int(hi - lo - (stop - start))})
+        # Drain every shard before raising so the pipes stay in step
+        errors = [error for error in (self._receive(conn) for conn in active) if error]
+        if errors:
+            raise RuntimeError(f"Shard worker failed:\n{errors[0]}")
+
+        force = np.empty((count, 2))
+        force[order] = shared_force[:count]
+        del shared_pos, shared_force, coord
+        return force
+
+    def _receive(self, conn) -> Optional[str]:
+        """Wait for one shard; returns its traceback if it failed."""
+        try:
+            status, payload = conn.recv()
+        except EOFError:
+            raise RuntimeError("Shard worker exited unexpectedly")
+        return payload if status == 'error' else None
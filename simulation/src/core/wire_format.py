@@ -0,0 +1,176 @@
+"""
+Compact binary wire format for /internal/entity-update.
+
+A JSON schema message (POSTed to /internal/entity-schema) carries the entity id
+table and static attributes once. Binary updates then reference entities by
+their index in that table and carry only dynamic fields:
+
+    header   '<4sBBHIIddfI'  magic, version, flags, reserved, schemaId, frame,
+                             simTime, sentAt, fps, count
+    indices  uint16[count]   (uint32 when FLAG_WIDE_INDEX is set)
+    position int16[count, 3] quantized to schema 'positionResolution' metres
+    velocity float16[count, 3]
+
+Delta frames include only entities whose quantized position or velocity changed
+beyond a threshold; keyframes (FLAG_KEYFRAME) include every entity.
+"""
+import struct
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .entity_store import EntitySnapshot
+
+WIRE_MAGIC = b'MIGE'
+WIRE_VERSION = 1
+FLAG_KEYFRAME = 0x01
+FLAG_WIDE_INDEX = 0x02
+
+HEADER = struct.Struct('<4sBBHIIddfI')
+
+_INT16_MIN = np.iinfo(np.int16).min
+_INT16_MAX = np.iinfo(np.int16).max
+
+
+class BinaryEntityEncoder:
+    """Stateful encoder: tracks what the receiver last saw to emit deltas."""
+
+    def __init__(self, position_resolution: float = 0.01, position_threshold: float = 0.02,
+                 velocity_threshold: float = 0.05, keyframe_interval: int = 30):
+        self.position_resolution = position_resolution
+        self.position_threshold = position_threshold
+        self.velocity_threshold = velocity_threshold
+        self.keyframe_interval = max(int(keyframe_interval), 1)
+
+        self.schema_id = 0
+        self._schema_key = None
+        self._last_pos: Optional[np.ndarray] = None
+        self._last_vel: Optional[np.ndarray] = None
+        self._updates_since_keyframe = 0
+        self._force_keyframe = True
+
+    def needs_schema(self, snapshot: EntitySnapshot) -> bool:
+        return snapshot.schema_key != self._schema_key
+
+    def build_schema(self, snapshot: EntitySnapshot) -> Dict:
+        """Start a new schema for this snapshot's entity table. Next frame is a keyframe."""
+        self.schema_id += 1
+        self._schema_key = snapshot.schema_key
+        self._last_pos = None
+        self._last_vel = None
+        self._force_keyframe = True
+
+        return {
+            'schemaId': self.schema_id,
+            'wireVersion': WIRE_VERSION,
+            'positionResolution': self.position_resolution,
+            'entities': [
+                dict(attrs, id=entity_id)
+                for entity_id, attrs in zip(snapshot.ids, snapshot.attributes)
+            ]
+        }
+
+    def reset(self):
+        """Forget receiver state (e.g. after a failed POST); next frame re-handshakes."""
+        self._schema_key = None
+        self._force_keyframe = True
+
+    def encode(self, snapshot: EntitySnapshot, stats: Dict, sent_at: float) -> bytes:
+        if self.needs_schema(snapshot):
+            raise ValueError("Schema handshake required before encoding this snapshot")
+
+        q_pos = np.clip(
+            np.rint(snapshot.positions / self.position_resolution), _INT16_MIN, _INT16_MAX
+        ).astype(np.int16)
+        vel = snapshot.velocities.astype(np.float16)
+
+        keyframe = (
+            self._force_keyframe
+            or self._last_pos is None
+            or self._updates_since_keyframe >= self.keyframe_interval
+        )
+
+        if keyframe:
+            indices = np.arange(len(snapshot), dtype=np.uint32)
+            self._last_pos = q_pos.copy()
+            self._last_vel = vel.copy()
+            self._updates_since_keyframe = 1
+            self._force_keyframe = False
+        else:
+            pos_step = max(self.position_threshold / self.position_resolution, 1.0)
+            moved = np.abs(q_pos.astype(np.int32) - self._last_pos).max(axis=1) >= pos_step
+            accelerated = np.abs(
+                vel.astype(np.float32) - self._last_vel.astype(np.float32)
+            ).max(axis=1) >= self.velocity_threshold
+            indices = np.flatnonzero(moved | accelerated).astype(np.uint32)
+            self._last_pos[indices] = q_pos[indices]
+            self._last_vel[indices] = vel[indices]
+            self._updates_since_keyframe += 1
+
+        wide = len(snapshot) > 0xFFFF
+        flags = (FLAG_KEYFRAME if keyframe else 0) | (FLAG_WIDE_INDEX if wide else 0)
+        header = HEADER.pack(
+            WIRE_MAGIC, WIRE_VERSION, flags, 0, self.schema_id,
+            int(stats.get('frame', 0)) & 0xFFFFFFFF,
+            float(stats.get('time', 0.0)),
+            float(sent_at),
+            float(stats.get('fps', 0.0)),
+            len(indices)
+        )
+
+        return b''.join((
+            header,
+            indices.astype('<u4' if wide else '<u2').tobytes(),
+            q_pos[indices].astype('<i2').tobytes(),
+            vel[indices].astype('<f2').tobytes()
+        ))
+
+
+class BinaryEntityDecoder:
+    """Reference decoder: rebuilds full entity records from schema + frames."""
+
+    def __init__(self):
+        self.schema: Optional[Dict] = None
+        self._positions: Optional[np.ndarray] = None
+        self._velocities: Optional[np.ndarray] = None
+
+    def apply_schema(self, schema: Dict):
+        self.schema = schema
+        count = len(schema['entities'])
+        self._positions = np.zeros((count, 3), dtype=np.float64)
+        self._velocities = np.zeros((count, 3), dtype=np.float64)
+
+    def decode(self, data: bytes) -> Dict:
+        magic, version, flags, _, schema_id, frame, sim_time, sent_at, fps, count = HEADER.unpack_from(data)
+        if magic != WIRE_MAGIC or version != WIRE_VERSION:
+            raise ValueError("Not an entity update frame")
+        if self.schema is None or schema_id != self.schema['schemaId']:
+            raise ValueError(f"Unknown schema {schema_id}")
+
+        offset = HEADER.size
+        index_dtype = np.dtype('<u4' if flags & FLAG_WIDE_INDEX else '<u2')
+        indices = np.frombuffer(data, dtype=index_dtype, count=count, offset=offset)
+        offset += indices.nbytes
+        q_pos = np.frombuffer(data, dtype='<i2', count=count * 3, offset=offset).reshape(count, 3)
+        offset += q_pos.nbytes
+        vel = np.frombuffer(data, dtype='<f2', count=count * 3, offset=offset).reshape(count, 3)
+
+        self._positions[indices] = q_pos * self.schema['positionResolution']
+        self._velocities[indices] = vel
+
+        return {
+            'stats': {'fps': fps, 'frame': frame, 'time': sim_time},
+            'sentAt': sent_at,
+            'keyframe': bool(flags & FLAG_KEYFRAME),
+            'changed': len(indices),
+            'entities': self._records()
+        }
+
+    def _records(self) -> List[Dict]:
+        records = []
+        for attrs, pos, vel in zip(self.schema['entities'], self._positions.tolist(), self._velocities.tolist()):
+            record = dict(attrs)
+            record['position'] = {'x': pos[0], 'y': pos[1], 'z': pos[2]}
+            record['velocity'] = {'x': vel[0], 'y': vel[1], 'z': vel[2]}
+            records.append(record)
+        return records
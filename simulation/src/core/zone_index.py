@@ -0,0 +1,235 @@
+import numpy as np
+from typing import List, Optional, Tuple
+
+class ZoneMembership:
+    """
+    Result of a ZoneIndex lookup: (entity row, zone id) pairs, sorted by row,
+    plus per-zone counts.
+    """
+
+    def __init__(self, rows: np.ndarray, zone_ids: np.ndarray, num_zones: int,
+                 counts: Optional[np.ndarray] = None):
+        self.rows = rows
+        self.zone_ids = zone_ids
+        self.counts = np.bincount(zone_ids, minlength=num_zones) if counts is None else counts
+
+    def rows_in(self, zone_id: int) -> np.ndarray:
+        """Entity rows inside a zone, in ascending row order."""
+        return self.rows[self.zone_ids == zone_id]
+
+
+class ZoneIndex:
+    """
+    Rasterized zone lookup grid.
+
+    Every grid cell stores the zones touching it, each flagged as *full* (the
+    whole cell lies inside the zone) or *partial* (the zone boundary crosses the
+    cell). Points in full cells are accepted by the lookup alone; only points in
+    partial cells get an exact point-in-zone test. Membership therefore matches
+    an exact per-entity test while costing one gather per entity, and overlapping
+    and polygonal zones are handled naturally.
+    """
+
+    def __init__(self, zones: List, cell_size: float = 0.5, max_cells: int = 4_000_000):
+        self.zones = list(zones)
+        self.num_zones = len(self.zones)
+        self._polygons = [_zone_polygon(z) for z in self.zones]
+        self._is_rect = np.array([getattr(z, 'polygon', None) is None for z in self.zones], dtype=bool)
+        self._bounds = np.array([z.bounds for z in self.zones], dtype=np.float64).reshape(-1, 4)
+
+        if self.num_zones == 0:
+            self._init_grid(0.0, 0.0, 1, 1, cell_size)
+            self._cell_ptr = np.zeros(2, dtype=np.int64)
+            self._cell_zones = np.zeros(0, dtype=np.int32)
+            self._cell_full = np.zeros(0, dtype=bool)
+            return
+
+        x_min, y_min = self._bounds[:, 0].min(), self._bounds[:, 1].min()
+        x_max, y_max = self._bounds[:, 2].max(), self._bounds[:, 3].max()
+
+        # Coarsen the grid if the venue would need too many cells
+        area = max((x_max - x_min) * (y_max - y_min), 1e-9)
+        cell_size = max(cell_size, np.sqrt(area / max_cells))
+        nx = int(np.ceil((x_max - x_min) / cell_size)) + 1
+        ny = int(np.ceil((y_max - y_min) / cell_size)) + 1
+        self._init_grid(x_min, y_min, nx, ny, cell_size)
+        self._compile()
+
+    def _init_grid(self, origin_x: float, origin_y: float, nx: int, ny: int, cell_size: float):
+        self.origin = (origin_x, origin_y)
+        self.nx = nx
+        self.ny = ny
+        self.cell_size = cell_size
+
+    def _compile(self):
+        cs = self.cell_size
+        ox, oy = self.origin
+        half_diag = cs * np.sqrt(0.5)
+        eps = 1e-9 * max(cs, 1.0)
+
+        cells, zone_ids, full_flags = [], [], []
+        for zone_id, polygon in enumerate(self._polygons):
+            x0, y0, x1, y1 = self._bounds[zone_id]
+            i0 = max(int(np.floor((x0 - ox) / cs)), 0)
+            i1 = min(int(np.floor((x1 - ox) / cs)), self.nx - 1)
+            j0 = max(int(np.floor((y0 - oy) / cs)), 0)
+            j1 = min(int(np.floor((y1 - oy) / cs)), self.ny - 1)
+            if i1 < i0 or j1 < j0:
+                continue
+
+            ii, jj = np.meshgrid(np.arange(i0, i1 + 1), np.arange(j0, j1 + 1), indexing='xy')
+            ii, jj = ii.ravel(), jj.ravel()
+            centers = np.stack([ox + (ii + 0.5) * cs, oy + (jj + 0.5) * cs], axis=1)
+
+            inside = _points_in_polygon(centers, polygon)
+            clearance = _distance_to_edges(centers, polygon)
+            far = clearance > half_diag + eps
+            full = inside & far
+            # Cells far outside the boundary never contain zone points
+            keep = ~(~inside & far)
+
+            cells.append((jj * self.nx + ii)[keep])
+            zone_ids.append(np.full(int(keep.sum()), zone_id, dtype=np.int32))
+            full_flags.append(full[keep])
+
+        cells = np.concatenate(cells) if cells else np.zeros(0, dtype=np.int64)
+        zone_ids = np.concatenate(zone_ids) if zone_ids else np.zeros(0, dtype=np.int32)
+        full_flags = np.concatenate(full_flags) if full_flags else np.zeros(0, dtype=bool)
+
+        # CSR layout: zones of cell c are _cell_zones[_cell_ptr[c]:_cell_ptr[c + 1]]
+        order = np.lexsort((zone_ids, cells))
+        self._cell_zones = zone_ids[order]
+        self._cell_full = full_flags[order]
+        per_cell = np.bincount(cells, minlength=self.nx * self.ny)
+        self._cell_ptr = np.zeros(self.nx * self.ny + 1, dtype=np.int64)
+        np.cumsum(per_cell, out=self._cell_ptr[1:])
+
+    def lookup(self, xy: np.ndarray) -> ZoneMembership:
+        """Zone membership for an (N, 2+) array of positions (only x, y are used)."""
+        xy = np.asarray(xy, dtype=np.float64)
+        n = len(xy)
+        if n == 0 or self.num_zones == 0:
+            return ZoneMembership(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32), self.num_zones)
+
+        ix = np.floor((xy[:, 0] - self.origin[0]) / self.cell_size)
+        iy = np.floor((xy[:, 1] - self.origin[1]) / self.cell_size)
+        on_grid = (ix >= 0) & (ix < self.nx) & (iy >= 0) & (iy < self.ny)
+        cell = np.where(on_grid, iy * self.nx + ix, 0).astype(np.int64)
+
+        starts = self._cell_ptr[cell]
+        lengths = np.where(on_grid, self._cell_ptr[cell + 1] - starts, 0)
+        total = int(lengths.sum())
+        if total == 0:
+            return ZoneMembership(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32), self.num_zones)
+
+        # Expand each entity into one candidate pair per zone listed in its cell
+        rows = np.repeat(np.arange(n), lengths)
+        first = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        slots = np.repeat(starts, lengths) + (np.arange(total) - first)
+        zone_ids = self._cell_zones[slots]
+        accept = self._cell_full[slots].copy()
+
+        partial = np.flatnonzero(~accept)
+        if len(partial):
+            accept[partial] = self._exact(xy[rows[partial], :2], zone_ids[partial])
+
+        return ZoneMembership(rows[accept], zone_ids[accept], self.num_zones)
+
+    def relookup(self, membership: ZoneMembership, xy: np.ndarray,
+                 moved: np.ndarray) -> Tuple[ZoneMembership, np.ndarray]:
+        """
+        Update a previous lookup of ``xy`` after only the rows in ``moved``
+        (ascending) changed position. Returns the new membership, identical to
+        ``lookup(xy)``, and a per-zone mask of zones whose member set changed.
+        Cost follows the number of moved rows plus one copy of the pair arrays.
+        """
+        affected = np.zeros(self.num_zones, dtype=bool)
+        if len(moved) == 0 or self.num_zones == 0:
+            return membership, affected
+
+        stale = np.isin(membership.rows, moved)
+        fresh = self.lookup(np.asarray(xy)[moved])
+        fresh_rows = moved[fresh.rows]
+
+        # Zones where a moved row entered or left; staying put changes nothing
+        old_keys = membership.rows[stale] * self.num_zones + membership.zone_ids[stale]
+        new_keys = fresh_rows * self.num_zones + fresh.zone_ids
+        affected[np.setxor1d(old_keys, new_keys) % self.num_zones] = True
+
+        counts = membership.counts - np.bincount(membership.zone_ids[stale], minlength=self.num_zones)
+        counts += fresh.counts
+        kept_rows = membership.rows[~stale]
+        # Moved rows have no pairs left in kept_rows, so inserting keeps row order
+        at = np.searchsorted(kept_rows, fresh_rows)
+        rows = np.insert(kept_rows, at, fresh_rows)
+        zone_ids = np.insert(membership.zone_ids[~stale], at, fresh.zone_ids)
+        return ZoneMembership(rows, zone_ids, self.num_zones, counts), affected
+
+    def _exact(self, points: np.ndarray, zone_ids: np.ndarray) -> np.ndarray:
+        """Exact containment for candidate (point, zone) pairs."""
+        result = np.zeros(len(points), dtype=bool)
+
+        rect = self._is_rect[zone_ids]
+        if rect.any():
+            b = self._bounds[zone_ids[rect]]
+            p = points[rect]
+            result[rect] = (
+                (b[:, 0] <= p[:, 0]) & (p[:, 0] <= b[:, 2]) &
+                (b[:, 1] <= p[:, 1]) & (p[:, 1] <= b[:, 3])
+            )
+
+        poly_pairs = np.flatnonzero(~rect)
+        if len(poly_pairs):
+            for zone_id in np.unique(zone_ids[poly_pairs]):
+                sel = poly_pairs[zone_ids[poly_pairs] == zone_id]
+                result[sel] = _points_in_polygon(points[sel], self._polygons[zone_id])
+
+        return result
+
+
+def _zone_polygon(zone) -> np.ndarray:
+    polygon = getattr(zone, 'polygon', None)
+    if polygon is not None:
+        return np.asarray(polygon, dtype=np.float64)
+    x0, y0, x1, y1 = zone.bounds
+    return np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], dtype=np.float64)
+
+
+def _points_in_polygon(points: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """Even-odd ray casting for many points against one polygon."""
+    x, y = points[:, 0], points[:, 1]
+    inside = np.zeros(len(points), dtype=bool)
+    x1, y1 = polygon[:, 0], polygon[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    for ax, ay, bx, by in zip(x1, y1, x2, y2):
+        crosses = (ay > y) != (by > y)
+        if not crosses.any():
+            continue
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_cross = ax + (y - ay) * (bx - ax) / (by - ay)
+        inside ^= crosses & (x < x_cross)
+    # Boundary points count as inside, matching the inclusive rectangle test
+    return inside | (_distance_to_edges(points, polygon) == 0.0)
+
+
+def _distance_to_edges(points: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """Distance from each point to the nearest polygon edge."""
+    best = np.full(len(points), np.inf)
+    starts = polygon
+    ends = np.roll(polygon, -1, axis=0)
+    for a, b in zip(starts, ends):
+        ab = b - a
+        denom = float(ab @ ab)
+        ap = points - a
+        t = np.clip((ap @ ab) / denom, 0.0, 1.0) if denom > 0 else np.zeros(len(points))
+        closest = a + t[:, None] * ab
+        np.minimum(best, np.hypot(points[:, 0] - closest[:, 0], points[:, 1] - closest[:, 1]), out=best)
+    return best
+
+
+def zone_index_key(zones: List) -> Optional[tuple]:
+    """Cache key that changes when a zone list is replaced or edited."""
+    return tuple(
+        (id(z), tuple(z.bounds), None if getattr(z, 'polygon', None) is None else id(z.polygon))
+        for z in zones
+    )
@@ -1,10 +1,60 @@
 import numpy as np
 import cv2
 import time
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
+
+from ..core.entity_store import ids_of, positions_of
+
+# Per-node resolution/quality presets (selected with the camera 'preset' config key)
+RESOLUTION_PRESETS = {
+    '1080p': {'width': 1920, 'height': 1080, 'jpegQuality': 80},
+    '720p': {'width': 1280, 'height': 720, 'jpegQuality': 75},
+    '480p': {'width': 854, 'height': 480, 'jpegQuality': 70},
+}
+
+RENDER_MODES = ('fast', 'legacy')
+
+_LABEL_FONT = cv2.FONT_HERSHEY_SIMPLEX
+_LABEL_SCALE = 0.5
+_MAX_LABEL_SPRITES = 4096
+
+
+class _NoiseBank:
+    """
+    Precomputed sensor noise shared by every camera with the same resolution.
+
+    Gaussian noise is generated once into an atlas slightly larger than the frame
+    and split into positive/negative uint8 parts (so it can be applied with
+    saturating cv2.add/cv2.subtract). Each bank entry is a frame-sized view at a
+    different offset into the atlas; frames cycle through the entries.
+    """
+
+    _shared: Dict[tuple, '_NoiseBank'] = {}
+
+    def __init__(self, height: int, width: int, sigma: float, size: int, seed: int):
+        rng = np.random.default_rng(seed)
+        pad = 64
+        noise = rng.normal(0, sigma, (height + pad, width + pad, 3))
+        self._positive = np.clip(np.rint(noise), 0, 255).astype(np.uint8)
+        self._negative = np.clip(np.rint(-noise), 0, 255).astype(np.uint8)
+        offsets = rng.integers(0, pad, size=(size, 2))
+        self.entries = [
+            (self._positive[dy:dy + height, dx:dx + width], self._negative[dy:dy + height, dx:dx + width])
+            for dy, dx in offsets
+        ]
+
+    @classmethod
+    def get(cls, height: int, width: int, sigma: float = 5.0, size: int = 16, seed: int = 0) -> '_NoiseBank':
+        key = (height, width, sigma, size, seed)
+        bank = cls._shared.get(key)
+        if bank is None:
+            bank = cls._shared[key] = cls(height, width, sigma, size, seed)
+        return bank
+
 
 class CameraSimulator:
-    def __init__(self, resolution: dict, fps: int, fov: float):
+    def __init__(self, resolution: dict, fps: int, fov: float, render_mode: str = 'fast',
+                 jpeg_quality: int = 80, noise_bank_size: int = 16):
         self.width = resolution['width']
         self.height = resolution['height']
         self.fps = fps
@@ -12,6 +62,36 @@ class CameraSimulator:
         self.last_frame_time = 0
         self.frame_interval = 1.0 / fps
 
+        if render_mode not in RENDER_MODES:
+            raise ValueError(f"Unknown render mode: {render_mode}")
+        self.render_mode = render_mode
+        self.jpeg_quality = jpeg_quality
+        self._encode_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+
+        # Fast-path caches (built lazily on first fast render)
+        self.noise_bank_size = noise_bank_size
+        self._background = None
+        self._frame = None
+        self._noise = None
+        self._noise_index = 0
+        self._label_sprites: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_config(cls, cam_config: dict) -> 'CameraSimulator':
+        """Build from a node 'camera' config, applying its 'preset' if any."""
+        preset = RESOLUTION_PRESETS.get(cam_config.get('preset'), {})
+        resolution = cam_config.get('resolution') or (
+            {'width': preset['width'], 'height': preset['height']} if preset
+            else {'width': 1920, 'height': 1080}
+        )
+        return cls(
+            resolution=resolution,
+            fps=cam_config.get('fps', 30),
+            fov=cam_config.get('fov', 90),
+            render_mode=cam_config.get('renderMode', 'fast'),
+            jpeg_quality=cam_config.get('jpegQuality', preset.get('jpegQuality', 80))
+        )
+
     def render(self, entities: List[dict], timestamp: float) -> Optional[bytes]:
         """
         Render a frame if enough time has passed.
@@ -20,31 +100,97 @@ class CameraSimulator:
         # Simple frame rate control
         if timestamp - self.last_frame_time < self.frame_interval:
             return None
-            
+
         self.last_frame_time = timestamp
-        
+
+        if self.render_mode == 'fast':
+            return self._render_fast(entities)
+        return self._render_legacy(entities)
+
+    def _render_legacy(self, entities: List[dict]) -> bytes:
+        """Original per-call allocation path, kept for comparison benchmarks."""
         # Create blank image (dark gray background)
         image = np.full((self.height, self.width, 3), 30, dtype=np.uint8)
-        
+
         # Draw entities (simplified 2D projection for now)
         for entity in entities:
              # Basic projection logic (placeholder)
              # In a real 3D sim, we'd use a projection matrix
              pos = entity.get('position', {'x':0, 'y':0, 'z':0})
-             
+
              # Map x/y to screen coordinates (very rough approx)
-             cx = int(self.width / 2 + pos['x'] * 50) 
+             cx = int(self.width / 2 + pos['x'] * 50)
              cy = int(self.height / 2 + pos['y'] * 50)
-             
+
              if 0 <= cx < self.width and 0 <= cy < self.height:
                  cv2.circle(image, (cx, cy), 10, (0, 255, 0), -1)
-                 cv2.putText(image, entity.get('id', '?'), (cx+15, cy), 
+                 cv2.putText(image, entity.get('id', '?'), (cx+15, cy),
                             cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
 
         # Add noise
         noise = np.random.normal(0, 5, image.shape).astype(np.uint8)
         image = cv2.add(image, noise)
-        
+
+        # Encode to JPEG
+        _, encoded = cv2.imencode('.jpg', image, self._encode_params)
+        return encoded.tobytes()
+
+    def _render_fast(self, entities: List[dict]) -> bytes:
+        """
+        Cached background, precomputed noise bank and label sprites, drawn into a
+        preallocated frame buffer.
+        """
+        if self._frame is None:
+            self._background = np.full((self.height, self.width, 3), 30, dtype=np.uint8)
+            self._frame = np.empty_like(self._background)
+            self._noise = _NoiseBank.get(self.height, self.width, size=self.noise_bank_size)
+
+        frame = self._frame
+        np.copyto(frame, self._background)
+
+        # Project every entity at once; draw only the visible ones
+        pos = positions_of(entities)
+        if len(pos):
+            cx = (self.width / 2 + pos[:, 0] * 50).astype(np.int64)
+            cy = (self.height / 2 + pos[:, 1] * 50).astype(np.int64)
+            visible = np.flatnonzero((cx >= 0) & (cx < self.width) & (cy >= 0) & (cy < self.height))
+            ids = ids_of(entities)
+            for i in visible.tolist():
+                cv2.circle(frame, (int(cx[i]), int(cy[i])), 10, (0, 255, 0), -1)
+            for i in visible.tolist():
+                self._blit_label(frame, ids[i] if ids[i] is not None else '?', int(cx[i]) + 15, int(cy[i]))
+
+        # Add noise (saturating, signed) from the next bank entry
+        positive, negative = self._noise.entries[self._noise_index]
+        self._noise_index = (self._noise_index + 1) % len(self._noise.entries)
+        cv2.add(frame, positive, dst=frame)
+        cv2.subtract(frame, negative, dst=frame)
+
         # Encode to JPEG
-        _, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 80])
+        _, encoded = cv2.imencode('.jpg', frame, self._encode_params)
         return encoded.tobytes()
+
+    def _label_sprite(self, text: str) -> Tuple[np.ndarray, int]:
+        """White-on-black text patch and its baseline offset, rendered once per label."""
+        sprite = self._label_sprites.get(text)
+        if sprite is None:
+            if len(self._label_sprites) >= _MAX_LABEL_SPRITES:
+                self._label_sprites.clear()
+            (w, h), baseline = cv2.getTextSize(text, _LABEL_FONT, _LABEL_SCALE, 1)
+            patch = np.zeros((h + baseline + 2, w + 2, 3), dtype=np.uint8)
+            cv2.putText(patch, text, (0, h), _LABEL_FONT, _LABEL_SCALE, (255, 255, 255), 1)
+            sprite = self._label_sprites[text] = (patch, h)
+        return sprite
+
+    def _blit_label(self, frame: np.ndarray, text: str, x: int, y: int):
+        """Composite a cached label so its baseline sits at (x, y), like cv2.putText."""
+        patch, ascent = self._label_sprite(text)
+        top = y - ascent
+        y0, x0 = max(top, 0), max(x, 0)
+        y1 = min(top + patch.shape[0], frame.shape[0])
+        x1 = min(x + patch.shape[1], frame.shape[1])
+        if y0 >= y1 or x0 >= x1:
+            return
+        region = frame[y0:y1, x0:x1]
+        # White text over a dark patch: per-pixel max composites it in one call
+        np.maximum(region, patch[y0 - top:y1 - top, x0 - x:x1 - x], out=region)
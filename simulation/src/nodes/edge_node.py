@@ -1,26 +1,27 @@
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Optional
 import numpy as np
 from .camera_simulator import CameraSimulator
 from .lidar_simulator import LidarSimulator
 from .imu_simulator import IMUSimulator
+from .preprocess import PointCloudFilter
 
 class EdgeNode:
-    def __init__(self, node_id: str, position: np.ndarray, orientation: np.ndarray, sensors: dict, calibration: dict):
+    def __init__(self, node_id: str, position: np.ndarray, orientation: np.ndarray, sensors: dict, calibration: dict,
+                 seed: Optional[int] = None):
         self.node_id = node_id
         self.position = position
         self.orientation = orientation
         self.calibration = calibration
         self.last_camera_frame = None
+        # Independent, reproducible noise streams per sensor when seeded
+        lidar_seed, imu_seed, filter_seed = np.random.SeedSequence(seed).spawn(3)
         
         # Initialize Sensors
         self.camera = None
         if sensors.get('camera', {}).get('enabled'):
-            cam_config = sensors['camera']
-            self.camera = CameraSimulator(
-                resolution=cam_config.get('resolution', {'width': 1920, 'height': 1080}),
-                fps=cam_config.get('fps', 30),
-                fov=cam_config.get('fov', 90)
-            )
+            # Supports 'preset' ('1080p', '720p', ...), 'renderMode' and 'jpegQuality'
+            self.camera = CameraSimulator.from_config(sensors['camera'])
             
         self.lidar = None
         if sensors.get('lidar', {}).get('enabled'):
@@ -28,36 +29,78 @@ class EdgeNode:
             self.lidar = LidarSimulator(
                 model=lid_config.get('model', 'VLP-16'),
                 channels=lid_config.get('channels', 16),
-                range_m=lid_config.get('range', 100)
+                range_m=lid_config.get('range', 100),
+                points_per_entity=lid_config.get('pointsPerEntity', 50),
+                pool_size=lid_config.get('bufferPool', 2),
+                return_views=lid_config.get('returnViews', True),
+                seed=lidar_seed
             )
+
+        # Optional cloud preprocessing before fusion ('preprocess': {'ground', 'roi', 'voxel', ...})
+        self.lidar_filter = None
+        preprocess = sensors.get('lidar', {}).get('preprocess')
+        if self.lidar and preprocess and preprocess.get('enabled', True):
+            self.lidar_filter = PointCloudFilter.from_config(preprocess, origin=position, seed=filter_seed)
             
         self.imu = None
         if sensors.get('imu', {}).get('enabled'):
-            self.imu = IMUSimulator(sample_rate=100)
+            self.imu = IMUSimulator(sample_rate=100, seed=imu_seed)
+
+    @classmethod
+    def from_config(cls, node_config: dict, seed: Optional[int] = None) -> 'EdgeNode':
+        """Build a node from its scenario/API config."""
+        return cls(
+            node_id=node_config['nodeId'],
+            position=np.array([
+                node_config['position']['x'],
+                node_config['position']['y'],
+                node_config['position']['z']
+            ]),
+            orientation=np.array([
+                node_config['orientation']['pitch'],
+                node_config['orientation']['yaw'],
+                node_config['orientation']['roll']
+            ]),
+            sensors=node_config['sensors'],
+            calibration=node_config.get('calibration', {}),
+            seed=seed
+        )
 
     def generate_frame(self, entities: List[dict], timestamp: float) -> Dict[str, Any]:
         """Generate a synchronized frame from all enabled sensors."""
+        timings = {}  # Seconds spent per sensor
         frame = {
             'nodeId': self.node_id,
             'timestamp': timestamp,
-            'sensors': {}
+            'sensors': {},
+            'timings': timings
         }
         
         # Transform entities to node-local coordinates if needed
         # For now, simulators handle global entities
         
         if self.camera:
+            started = time.perf_counter()
             image_data = self.camera.render(entities, timestamp)
             if image_data:
                 frame['sensors']['camera'] = image_data # In real app, this would be a path or heavy blob
                 self.last_camera_frame = image_data
+            timings['camera'] = time.perf_counter() - started
         
         if self.lidar:
+            started = time.perf_counter()
             point_cloud = self.lidar.scan(entities, timestamp)
+            timings['lidar'] = time.perf_counter() - started
+            if self.lidar_filter:
+                started = time.perf_counter()
+                point_cloud = self.lidar_filter.apply(point_cloud)
+                timings['preprocess'] = time.perf_counter() - started
             frame['sensors']['lidar'] = point_cloud # Numpy array
             
         if self.imu:
-            imu_data = self.imu.read(timestamp, self.position) # Simplified IMU read
+            started = time.perf_counter()
+            imu_data = self.imu.sample(timestamp, {}) # Simplified IMU read (static node)
             frame['sensors']['imu'] = imu_data
+            timings['imu'] = time.perf_counter() - started
             
         return frame
@@ -1,6 +1,8 @@
 import numpy as np
 from typing import List, Dict
 
+from ..core.entity_store import ids_of, positions_of
+
 class FusionEngine:
     """
     Fuses camera + LIDAR data at edge node.
@@ -11,6 +13,8 @@ class FusionEngine:
         # Defaults if not provided
         self.camera_matrix = camera_matrix if camera_matrix is not None else np.eye(3)
         self.transform = lidar_to_camera_transform if lidar_to_camera_transform is not None else np.eye(4)
+        # Max point-box pairs tested per association chunk
+        self.association_chunk = 1 << 20
         
     def _project_lidar_to_image(self, points):
         """Project 3D LIDAR points to 2D camera coordinates."""
@@ -45,69 +49,142 @@ class FusionEngine:
         x1, y1, x2, y2 = bbox
         return x1 <= x <= x2 and y1 <= y <= y2
 
+    def _points_in_boxes(self, projected, points, boxes):
+        """
+        Associate projected points with every box at once.
+        Returns per-box point counts and the sum of the (x, y, z) of their points.
+        Points inside several boxes count towards each of them.
+
+        Points are binned on a (u, v) grid of roughly box-sized cells and each
+        box is tested only against the points in the cells it overlaps, so the
+        cost follows the hits rather than points x boxes.
+        """
+        counts = np.zeros(len(boxes), dtype=np.int64)
+        sums = np.zeros((len(boxes), 3))
+        if len(projected) == 0 or len(boxes) == 0:
+            return counts, sums
+
+        # Entities at or behind the camera plane give inverted or non-finite
+        # boxes; they match nothing and must not reach the grid
+        valid = (np.isfinite(boxes).all(axis=1)
+                 & (boxes[:, 2] >= boxes[:, 0]) & (boxes[:, 3] >= boxes[:, 1]))
+        if not valid.all():
+            keep = np.flatnonzero(valid)
+            counts[keep], sums[keep] = self._points_in_boxes(projected, points, boxes[keep])
+            return counts, sums
+
+        # Only valid points inside the union of all boxes can match anything
+        u, v = projected[:, 0], projected[:, 1]
+        u0, v0 = boxes[:, 0].min(), boxes[:, 1].min()
+        u1, v1 = boxes[:, 2].max(), boxes[:, 3].max()
+        candidates = np.flatnonzero(
+            (projected[:, 2] > 0) & (u >= u0) & (u <= u1) & (v >= v0) & (v <= v1)
+        )
+        if len(candidates) == 0:
+            return counts, sums
+
+        # Grid: cells about the size of a typical box, at most a few per candidate point
+        size = np.median(np.maximum(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]))
+        cell = max(float(size), 1e-6)
+        while True:
+            nx, ny = int((u1 - u0) // cell) + 1, int((v1 - v0) // cell) + 1
+            if nx * ny <= 4 * len(candidates) + 16:
+                break
+            cell *= 2
+
+        def cell_of(values, origin, n):
+            return np.clip(((values - origin) // cell).astype(np.int64), 0, n - 1)
+
+        # Candidates sorted by cell; cell k holds ordered[bounds[k]:bounds[k + 1]]
+        keys = cell_of(v[candidates], v0, ny) * nx + cell_of(u[candidates], u0, nx)
+        order = np.argsort(keys, kind='stable')
+        ordered = candidates[order]
+        bounds = np.searchsorted(keys[order], np.arange(nx * ny + 1))
+
+        # One segment per (box, grid row): a contiguous run of cells, hence of ordered points
+        bx0, bx1 = cell_of(boxes[:, 0], u0, nx), cell_of(boxes[:, 2], u0, nx)
+        by0, by1 = cell_of(boxes[:, 1], v0, ny), cell_of(boxes[:, 3], v0, ny)
+        rows = by1 - by0 + 1
+        seg_box = np.repeat(np.arange(len(boxes)), rows)
+        seg_row = np.arange(len(seg_box)) - np.repeat(np.cumsum(rows) - rows, rows) + by0[seg_box]
+        seg_start = bounds[seg_row * nx + bx0[seg_box]]
+        seg_len = bounds[seg_row * nx + bx1[seg_box] + 1] - seg_start
+        seg_end = np.cumsum(seg_len)
+
+        # Expand segments into (box, point) pairs, about association_chunk pairs at a time
+        first = 0
+        while first < len(seg_len):
+            done = seg_end[first - 1] if first else 0
+            last = max(int(np.searchsorted(seg_end, done + self.association_chunk, side='right')), first + 1)
+            lengths = seg_len[first:last]
+            offsets = np.arange(int(lengths.sum())) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            pt = ordered[np.repeat(seg_start[first:last], lengths) + offsets]
+            box = np.repeat(seg_box[first:last], lengths)
+            inside = (
+                (boxes[box, 0] <= u[pt]) & (u[pt] <= boxes[box, 2])
+                & (boxes[box, 1] <= v[pt]) & (v[pt] <= boxes[box, 3])
+            )
+            pt, box = pt[inside], box[inside]
+            counts += np.bincount(box, minlength=len(boxes))
+            xyz = points[pt, :3].astype(np.float64)
+            for axis in range(3):
+                sums[:, axis] += np.bincount(box, weights=xyz[:, axis], minlength=len(boxes))
+            first = last
+        return counts, sums
+
     def fuse(self, camera_image, lidar_points, entities):
         """
         Perform fusion of camera and LIDAR data.
         Returns: List of detected entities with 3D positions derived from LIDAR clusters.
         """
-        detections = []
-        
         # 1. Project LIDAR points to camera image
         projected_points_2d = self._project_lidar_to_image(lidar_points[:, :3])
-        
+
         # 2. Run 2D object detection (Simulated)
-        bboxes = self._detect_objects_2d(camera_image, entities)
-        
-        # 3. Associate and Fuse
-        for bbox_data in bboxes:
-            bbox = bbox_data['bbox']
-            
-            # Find points inside this bbox
-            points_inside_indices = []
-            for i, pt in enumerate(projected_points_2d):
-                if pt[2] > 0 and self._iou(pt, bbox): # Check validity and bounds
-                    points_inside_indices.append(i)
-            
-            # Fuse: Compute centroid of associated LIDAR points
-            if points_inside_indices:
-                cluster = lidar_points[points_inside_indices]
-                fused_pos = np.mean(cluster[:, :3], axis=0)
-                confidence = 0.9 + (len(points_inside_indices) / 100.0) # More points = higher confidence
-            else:
-                # Fallback if no LIDAR hits (e.g. occlusion): use purely visual estimate or prior
-                # For simulaton, fallback to entity truth + large noise
-                target_entity = next((e for e in entities if e['id'] == bbox_data['entity_id']), None)
-                if target_entity:
-                    pos = target_entity['position']
-                    fused_pos = np.array([pos['x'], pos['y'], pos['z']]) + np.random.normal(0, 0.5, 3)
-                    confidence = 0.5
-                else:
-                    continue
-
-            detections.append({
-                'entityId': bbox_data['entity_id'],
-                'position3d': fused_pos.tolist(),
+        positions = positions_of(entities)
+        entity_ids = ids_of(entities)
+        boxes = self._detect_boxes(positions)
+
+        # 3. Associate and Fuse: centroid of the LIDAR points inside each box
+        counts, sums = self._points_in_boxes(projected_points_2d, lidar_points, boxes)
+        hit = counts > 0
+        fused = np.zeros((len(boxes), 3))
+        fused[hit] = sums[hit] / counts[hit, None]
+        confidence = np.where(hit, 0.9 + counts / 100.0, 0.5)  # More points = higher confidence
+
+        # Fallback if no LIDAR hits (e.g. occlusion): use purely visual estimate or prior
+        # For simulation, fallback to entity truth + large noise
+        missed = np.flatnonzero(~hit)
+        if len(missed):
+            fused[missed] = positions[missed] + np.random.normal(0, 0.5, (len(missed), 3))
+
+        return [
+            {
+                'entityId': entity_id,
+                'position3d': position,
                 'velocity': [0, 0, 0], # Kalman filter would determine this over time
-                'confidence': min(confidence, 1.0),
+                'confidence': min(conf, 1.0),
                 'bbox2d': bbox
-            })
-        
-        return detections
+            }
+            for entity_id, position, conf, bbox in zip(
+                entity_ids, fused.tolist(), confidence.tolist(), boxes.tolist()
+            )
+        ]
+
+    def _detect_boxes(self, pos):
+        """Simulated 2D detection for an (N, 3) position array: (N, 4) x1/y1/x2/y2 boxes."""
+        # Scale world coords to 'pixel' coords roughly
+        cx = 960 + pos[:, 0] * 50
+        cy = 540 - pos[:, 2] * 50
+        scale = pos[:, 1] * 0.1 + 1
+        w, h = 60 / scale, 120 / scale
+        boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1).reshape(-1, 4)
+        return boxes
 
     def _detect_objects_2d(self, image, entities):
         """Simulate YOLO detection."""
-        bboxes = []
-        for entity in entities:
-            # Simple manual projection for bounding box simulation
-            pos = entity['position']
-            # Scale world coords to 'pixel' coords roughly
-            cx = 960 + (pos['x'] * 50) 
-            cy = 540 - (pos['z'] * 50) 
-            w, h = 60 / (pos['y']*0.1 + 1), 120 / (pos['y']*0.1 + 1)
-            
-            bboxes.append({
-                'entity_id': entity['id'],
-                'bbox': [cx - w/2, cy - h/2, cx + w/2, cy + h/2],
-                'confidence': 0.95
-            })
-        return bboxes
+        boxes = self._detect_boxes(positions_of(entities))
+        return [
+            {'entity_id': entity_id, 'bbox': bbox, 'confidence': 0.95}
+            for entity_id, bbox in zip(ids_of(entities), boxes.tolist())
+        ]
@@ -1,10 +1,11 @@
 import numpy as np
 
 class IMUSimulator:
-    def __init__(self, sample_rate: int):
+    def __init__(self, sample_rate: int, seed=None):
         self.sample_rate = sample_rate
-        self.accel_bias = np.random.normal(0, 0.01, 3)
-        self.gyro_bias = np.random.normal(0, 0.001, 3)
+        self._rng = np.random.default_rng(seed)
+        self.accel_bias = self._rng.normal(0, 0.01, 3)
+        self.gyro_bias = self._rng.normal(0, 0.001, 3)
 
     def sample(self, timestamp: float, motion: dict) -> dict:
         """
@@ -14,8 +15,8 @@ class IMUSimulator:
         true_gyro = motion.get('angular_velocity', np.zeros(3))
         
         # Add noise and bias
-        accel_noise = np.random.normal(0, 0.01, 3)
-        gyro_noise = np.random.normal(0, 0.001, 3)
+        accel_noise = self._rng.normal(0, 0.01, 3)
+        gyro_noise = self._rng.normal(0, 0.001, 3)
         
         accel = true_accel + self.accel_bias + accel_noise
         gyro = true_gyro + self.gyro_bias + gyro_noise
@@ -26,5 +27,5 @@ class IMUSimulator:
         return {
             'acceleration': accel.tolist(),
             'gyroscope': gyro.tolist(),
-            'temperature': 45.0 + np.random.normal(0, 0.1)
+            'temperature': 45.0 + self._rng.normal(0, 0.1)
         }
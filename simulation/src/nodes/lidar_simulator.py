@@ -1,44 +1,87 @@
 import numpy as np
-from typing import List, Tuple
+from typing import List
+
+from ..core.entity_store import positions_of
 
 class LidarSimulator:
-    def __init__(self, model: str, channels: int, range_m: float):
+    """
+    Point cloud generator.
+
+    The ground grid is computed once per sensor and written once into each pooled
+    output buffer; a scan only refreshes the entity clusters (one batched RNG draw)
+    and intensities. By default (``return_views``) the scan returns a view into
+    the pool, overwritten ``pool_size`` scans later: consumers that keep a cloud
+    past the next frame copy it. ``return_views=False`` returns a copy instead.
+    """
+
+    def __init__(self, model: str, channels: int, range_m: float, points_per_entity: int = 50,
+                 pool_size: int = 2, return_views: bool = True, seed=None):
         self.model = model
         self.channels = channels
         self.range = range_m
         self.points_per_second = 300000
+        self.points_per_entity = points_per_entity
+        self.cluster_sigma = 0.2
+        self.return_views = return_views
+
+        # Background points (ground plane), simplified as a 100x100 grid at z=0
+        x = np.linspace(-20, 20, 100)
+        y = np.linspace(-20, 20, 100)
+        X, Y = np.meshgrid(x, y)
+        self._ground = np.stack([X.ravel(), Y.ravel(), np.zeros(X.size)], axis=1).astype(np.float32)
+
+        self._rng = np.random.default_rng(seed)
+        self._pool: List[np.ndarray] = [np.empty((0, 4), dtype=np.float32)] * max(int(pool_size), 1)
+        self._pool_index = 0
+        self._cluster = np.empty((0, 3), dtype=np.float32)
+        self._intensity = np.empty(0, dtype=np.float32)
 
     def scan(self, entities: List[dict], timestamp: float) -> np.ndarray:
         """
         Generate a point cloud.
-        Returns numpy array of (x, y, z, intensity).
+        Returns numpy array of (x, y, z, intensity), a pooled view unless
+        ``return_views`` is off.
         """
-        # Generate background points (ground plane)
-        # Simplified: Grid of points
-        x = np.linspace(-20, 20, 100)
-        y = np.linspace(-20, 20, 100)
-        X, Y = np.meshgrid(x, y)
-        Z = np.zeros_like(X) # Ground is at z=0
-        
-        # Flatten
-        ground_points = np.stack([X.flatten(), Y.flatten(), Z.flatten()], axis=1)
-        
-        entity_points = []
-        for entity in entities:
-            pos = entity.get('position', {'x':0, 'y':0, 'z':0})
-            # Generate a cluster of points for the entity
-            num_points = 50
-            # Gaussian distribution around entity position
-            ep = np.random.normal([pos['x'], pos['y'], pos['z']], 0.2, (num_points, 3))
-            entity_points.append(ep)
-            
-        if entity_points:
-            all_entity_points = np.vstack(entity_points)
-            points = np.vstack([ground_points, all_entity_points])
-        else:
-            points = ground_points
+        pos = positions_of(entities)
+        n_ground = len(self._ground)
+        n_cluster = len(pos) * self.points_per_entity
+        total = n_ground + n_cluster
+
+        out = self._next_buffer(total)[:total]
+
+        if n_cluster:
+            # Gaussian cluster around every entity from a single draw
+            cluster = self._scratch_cluster(n_cluster)
+            self._rng.standard_normal(dtype=np.float32, out=cluster)
+            cluster *= self.cluster_sigma
+            cluster.reshape(len(pos), self.points_per_entity, 3)[:] += pos[:, None, :].astype(np.float32)
+            out[n_ground:, :3] = cluster
 
         # Add intensity (random for now)
-        intensities = np.random.rand(len(points), 1)
-        
-        return np.hstack([points, intensities]).astype(np.float32)
+        intensity = self._scratch_intensity(total)
+        self._rng.random(dtype=np.float32, out=intensity)
+        out[:, 3] = intensity
+
+        return out if self.return_views else out.copy()
+
+    def _next_buffer(self, size: int) -> np.ndarray:
+        """Round-robin pooled output buffer holding at least ``size`` points."""
+        index = self._pool_index
+        self._pool_index = (index + 1) % len(self._pool)
+        buffer = self._pool[index]
+        if len(buffer) < size:
+            # Grow with headroom; ground rows are written once per buffer
+            buffer = np.empty((max(size, int(len(buffer) * 1.5)), 4), dtype=np.float32)
+            buffer[:len(self._ground), :3] = self._ground
+            self._pool[index] = buffer
+        return buffer
+
+    def _scratch_cluster(self, size: int) -> np.ndarray:
+        if len(self._cluster) < size:
+            self._cluster = np.empty((max(size, int(len(self._cluster) * 1.5)), 3), dtype=np.float32)
+        return self._cluster[:size]
+
+    def _scratch_intensity(self, size: int) -> np.ndarray:
+        if len(self._intensity) < size:
+            self._intensity = np.empty(max(size, int(len(self._intensity) * 1.5)), dtype=np.float32)
+        return self._intensity[:size]
@@ -0,0 +1,133 @@
+"""
+Compact binary encoding of LIDAR point clouds for streaming.
+
+Clouds are voxel-grid downsampled (one centroid per occupied voxel), quantized
+and compressed:
+
+    header     '<4sBBHIdfI'  magic, version, codec, reserved, seq, timestamp,
+                             resolution (metres per unit), count
+    payload    codec-compressed planar columns:
+               x, y, z       int16[count] each, coordinate / resolution,
+                             delta-coded (each value minus the previous one)
+               intensity     uint8[count], intensity * 255
+
+Points come out of the downsample in voxel order, so consecutive coordinates
+are close and the deltas compress well. The resolution is the finest that
+keeps every coordinate within int16 range (never finer than a quarter voxel).
+The codec is lz4 when the lz4 package is installed and zlib otherwise.
+"""
+import struct
+import zlib
+from typing import Dict, Optional
+
+import numpy as np
+
+try:
+    import lz4.frame as _lz4
+except ImportError:  # Optional; zlib is always available
+    _lz4 = None
+
+CLOUD_MAGIC = b'MIPC'
+CLOUD_VERSION = 1
+HEADER = struct.Struct('<4sBBHIdfI')
+
+CODEC_NONE, CODEC_ZLIB, CODEC_LZ4 = 0, 1, 2
+CODECS = {'none': CODEC_NONE, 'zlib': CODEC_ZLIB, 'lz4': CODEC_LZ4}
+DEFAULT_CODEC = 'lz4' if _lz4 is not None else 'zlib'
+
+# Level of detail -> voxel edge in metres (None keeps every point)
+LOD_VOXELS: Dict[str, Optional[float]] = {
+    'full': None,
+    'high': 0.05,
+    'medium': 0.2,
+    'low': 0.5
+}
+
+# Finest voxel a stream may ask for; smaller ones buy nothing at LIDAR accuracy
+MIN_VOXEL = 0.01
+
+_MIN_RESOLUTION = 0.001
+_INT16_MAX = np.iinfo(np.int16).max
+
+
+def voxel_downsample(points: np.ndarray, voxel: Optional[float]) -> np.ndarray:
+    """Centroid (x, y, z, intensity) of the points in each occupied voxel, in voxel order."""
+    if not voxel or len(points) == 0:
+        return points
+    cells = np.floor(points[:, :3] / voxel).astype(np.int64)
+    cells -= cells.min(axis=0)
+    dims = cells.max(axis=0) + 1
+    if np.prod(dims.astype(np.float64)) < 2 ** 62:
+        keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+        unique, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    else:
+        # The packed key would overflow int64: slower row-wise unique, same order
+        unique, inverse, counts = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+        inverse = inverse.reshape(-1)
+
+    out = np.empty((len(unique), 4), dtype=np.float32)
+    for column in range(4):
+        out[:, column] = np.bincount(inverse, points[:, column], len(unique)) / counts
+    return out
+
+
+def encode_cloud(points: np.ndarray, seq: int = 0, timestamp: float = 0.0,
+                 voxel: Optional[float] = None, codec: str = DEFAULT_CODEC) -> bytes:
+    """Downsample, quantize and compress an (N, 4) float32 cloud into one message."""
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec: {codec}")
+    if codec == 'lz4' and _lz4 is None:
+        raise ValueError("lz4 codec requires the lz4 package")
+
+    cloud = voxel_downsample(points, voxel)
+    count = len(cloud)
+    extent = float(np.abs(cloud[:, :3]).max()) if count else 0.0
+    resolution = max((voxel or 0.0) / 4, extent / _INT16_MAX, _MIN_RESOLUTION)
+
+    payload = np.empty(count * 7, dtype=np.uint8)
+    coords = np.rint(cloud[:, :3].T / resolution)
+    np.clip(coords, -_INT16_MAX, _INT16_MAX, out=coords)
+    coords = coords.astype(np.int16)
+    # Wrapping int16 deltas; the decoder's int16 cumsum wraps back
+    coords[:, 1:] -= coords[:, :-1].copy()
+    payload[:count * 6].view('<i2')[:] = coords.ravel()
+    payload[count * 6:] = np.clip(np.rint(cloud[:, 3] * 255), 0, 255)
+
+    header = HEADER.pack(CLOUD_MAGIC, CLOUD_VERSION, CODECS[codec], 0, int(seq) & 0xFFFFFFFF,
+                         float(timestamp), resolution, count)
+    return header + _compress(payload.tobytes(), codec)
+
+
+def decode_cloud(data: bytes) -> Dict:
+    """Reference decoder: {'seq', 'timestamp', 'resolution', 'points' (N, 4) float32}."""
+    magic, version, codec, _, seq, timestamp, resolution, count = HEADER.unpack_from(data)
+    if magic != CLOUD_MAGIC or version != CLOUD_VERSION:
+        raise ValueError("Not a point cloud frame")
+    payload = _decompress(data[HEADER.size:], codec)
+
+    points = np.empty((count, 4), dtype=np.float32)
+    deltas = np.frombuffer(payload, dtype='<i2', count=count * 3).reshape(3, count)
+    coords = np.cumsum(deltas, axis=1, dtype=np.int16)
+    points[:, :3] = coords.T * np.float32(resolution)
+    points[:, 3] = np.frombuffer(payload, dtype=np.uint8, count=count, offset=count * 6) / np.float32(255)
+    return {'seq': seq, 'timestamp': timestamp, 'resolution': resolution, 'points': points}
+
+
+def _compress(payload: bytes, codec: str) -> bytes:
+    if codec == 'lz4':
+        return _lz4.compress(payload)
+    if codec == 'zlib':
+        return zlib.compress(payload, 1)
+    return payload
+
+
+def _decompress(payload: bytes, codec: int) -> bytes:
+    if codec == CODEC_LZ4:
+        if _lz4 is None:
+            raise ValueError("lz4 codec requires the lz4 package")
+        return _lz4.decompress(payload)
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(payload)
+    if codec == CODEC_NONE:
+        return payload
+    raise ValueError(f"Unknown codec id: {codec}")
@@ -0,0 +1,126 @@
+"""
+LIDAR preprocessing between scan and fusion.
+
+PointCloudFilter builds one keep-mask over the whole cloud, then
+voxel-downsamples what survives. The mask covers:
+- the range band around the sensor
+- the region of interest in x/y
+- points off the ground, at a fixed height or on a fitted plane
+
+The flat ground grid makes up most of a scan and every ground point would
+otherwise be projected and tested against every detection box, so dropping it
+is what shrinks the fusion workload.
+
+Ground points are those within ``ground_tolerance`` of the ground surface
+(above or below); returns clustered around an entity's feet mostly lie
+outside that band, so clusters survive. In 'plane' mode the ground is fitted
+each scan with a batched RANSAC over a subsample (planes steeper than
+``max_slope`` degrees are rejected) and refined by least squares.
+"""
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from .pointcloud import voxel_downsample
+
+GROUND_MODES = (None, 'height', 'plane')
+
+
+class PointCloudFilter:
+    """Range/ROI crop, ground removal and voxel downsampling of (N, 4) clouds."""
+
+    def __init__(self, origin: Sequence[float] = (0.0, 0.0, 0.0), ground: Optional[str] = 'height',
+                 ground_height: float = 0.0, ground_tolerance: float = 0.05,
+                 min_range: float = 0.0, max_range: Optional[float] = None,
+                 roi: Optional[Sequence[float]] = None, voxel: Optional[float] = None,
+                 ransac_iterations: int = 32, ransac_sample: int = 2048, max_slope: float = 15.0,
+                 seed=None):
+        if ground not in GROUND_MODES:
+            raise ValueError(f"Unknown ground mode: {ground}")
+        self.origin = np.asarray(origin, dtype=np.float32)
+        self.ground = ground
+        self.ground_height = ground_height
+        self.ground_tolerance = ground_tolerance
+        self.min_range = min_range
+        self.max_range = max_range
+        self.roi = tuple(roi) if roi is not None else None
+        self.voxel = voxel
+        self.ransac_iterations = ransac_iterations
+        self.ransac_sample = ransac_sample
+        self.min_normal_z = np.cos(np.radians(max_slope))
+        self._rng = np.random.default_rng(seed)
+        # z = a*x + b*y + c of the last fitted ground plane
+        self.plane: Optional[Tuple[float, float, float]] = None
+
+    @classmethod
+    def from_config(cls, config: dict, origin: Sequence[float] = (0.0, 0.0, 0.0), seed=None) -> 'PointCloudFilter':
+        """Build from a node's sensors.lidar.preprocess config."""
+        return cls(
+            origin=origin,
+            ground=config.get('ground', 'height'),
+            ground_height=config.get('groundHeight', 0.0),
+            ground_tolerance=config.get('groundTolerance', 0.05),
+            min_range=config.get('minRange', 0.0),
+            max_range=config.get('maxRange'),
+            roi=config.get('roi'),
+            voxel=config.get('voxel'),
+            ransac_iterations=config.get('ransacIterations', 32),
+            max_slope=config.get('maxSlope', 15.0),
+            seed=seed
+        )
+
+    def apply(self, points: np.ndarray) -> np.ndarray:
+        """Filtered copy of ``points`` (x, y, z, intensity)."""
+        if len(points) == 0:
+            return points[:0].copy()
+        x, y, z = points[:, 0], points[:, 1], points[:, 2]
+        keep = np.ones(len(points), dtype=bool)
+
+        if self.min_range > 0 or self.max_range is not None:
+            d2 = ((points[:, :3] - self.origin) ** 2).sum(axis=1)
+            if self.min_range > 0:
+                keep &= d2 >= self.min_range ** 2
+            if self.max_range is not None:
+                keep &= d2 <= self.max_range ** 2
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            keep &= (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+
+        if self.ground == 'height':
+            keep &= np.abs(z - self.ground_height) > self.ground_tolerance
+        elif self.ground == 'plane':
+            self.plane = self.fit_ground_plane(points[keep])
+            if self.plane is not None:
+                a, b, c = self.plane
+                keep &= np.abs(z - (a * x + b * y + c)) > self.ground_tolerance
+
+        return voxel_downsample(points[keep], self.voxel) if self.voxel else points[keep]
+
+    def fit_ground_plane(self, points: np.ndarray) -> Optional[Tuple[float, float, float]]:
+        """Dominant near-horizontal plane as (a, b, c) with z = a*x + b*y + c, or None."""
+        if len(points) < 3:
+            return None
+        rng = self._rng
+        sample = points[rng.integers(0, len(points), min(self.ransac_sample, len(points))), :3]
+        sample = sample.astype(np.float64)
+
+        # One candidate plane per random triple, scored on the whole sample at once
+        triples = sample[rng.integers(0, len(sample), (self.ransac_iterations, 3))]
+        normals = np.cross(triples[:, 1] - triples[:, 0], triples[:, 2] - triples[:, 0])
+        norms = np.linalg.norm(normals, axis=1)
+        flat = norms > 1e-9
+        flat[flat] = np.abs(normals[flat, 2]) / norms[flat] >= self.min_normal_z
+        if not flat.any():
+            return None
+        normals = normals[flat] / norms[flat, None]
+        offsets = (triples[flat, 0] * normals).sum(axis=1)
+        inliers = np.abs(sample @ normals.T - offsets) <= self.ground_tolerance
+        best = inliers[:, np.argmax(inliers.sum(axis=0))]
+        if best.sum() < 3:
+            return None
+
+        # Least-squares refinement on the winning plane's inliers
+        ground = sample[best]
+        design = np.column_stack([ground[:, 0], ground[:, 1], np.ones(len(ground))])
+        (a, b, c), *_ = np.linalg.lstsq(design, ground[:, 2], rcond=None)
+        return float(a), float(b), float(c)
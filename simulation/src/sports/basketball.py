@@ -1,12 +1,14 @@
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Optional
 from ..core.scenario_manager import Scenario, Zone
+from .crowd import CrowdModel
+from .kernels import RowIndex, chase_target, commit_rows, follow_play, state_arrays
 
 class BasketballScenario(Scenario):
     """NBA-style basketball simulation."""
     
-    def __init__(self, config: dict = None):
-        super().__init__()
+    def __init__(self, config: dict = None, rng: Optional[np.random.Generator] = None):
+        super().__init__(rng)
         self.sport = 'BASKETBALL'
         
         # Court dimensions (NBA standard in meters)
@@ -41,7 +43,29 @@ class BasketballScenario(Scenario):
             )
         ]
         
-        self.crowd_count = config.get('crowdCount', 5000) if config else 5000
+        config = config or {}
+        self.crowd_count = config.get('crowdCount', 5000)
+        # 'sections' (8 static crowd blobs) or 'agents' (one simulated spectator each)
+        self.crowd_mode = config.get('crowdMode', 'sections')
+        self.crowd_flow = config.get('crowdFlow', 'seated')  # seated | ingress | egress
+        self.crowd_flow_duration = config.get('crowdFlowDuration')
+        self.crowd = None
+        self._exit_sweep = 0.0
+        if self.crowd_mode == 'agents':
+            crowd_seed = config.get('crowdSeed')
+            self.crowd = CrowdModel(self.crowd_count, self._court_bounds(),
+                                    seed=self.rng if crowd_seed is None else crowd_seed)
+            # Exit concourses, so egress crowding shows up as zone density
+            self.zones += [
+                Zone(name=name, bounds=b, area=(b[2] - b[0]) * (b[3] - b[1]), type='EXIT')
+                for name, b in self.crowd.exit_zones()
+            ]
+        elif self.crowd_mode != 'sections':
+            raise ValueError(f"Unknown crowd mode: {self.crowd_mode}")
+        self._rows = RowIndex(
+            groups={'players': {'role': 'PLAYER'}, 'officials': {'role': 'OFFICIAL'}},
+            named=('BALL',)
+        )
         
     def initialize(self, entities: List[Dict]):
         """Set up players, refs, ball, crowd."""
@@ -110,23 +134,41 @@ class BasketballScenario(Scenario):
         }
         entities.append(entity)
         
-        # Crowd (simplified - grouped entities)
-        self._generate_crowd(entities, self.crowd_count)
+        # Crowd: one entity per spectator, or simplified grouped entities
+        if self.crowd is not None:
+            entities.extend(self.crowd.entities(self.crowd_flow, self.crowd_flow_duration))
+        else:
+            self._generate_crowd(entities, self.crowd_count)
         
         print(f"Basketball scenario initialized: {len(entities)} entities")
         
     def update(self, entities: List[Dict], dt: float):
         """Update entity behaviors each frame."""
-        for entity in entities:
-            behavior = entity.get('behavior')
-            
-            if behavior == 'basketball_player':
-                self._update_player_behavior(entity, entities, dt)
-            elif behavior == 'referee':
-                self._update_referee_behavior(entity, entities, dt)
+        self._rows.refresh(entities)
+        ball = self._rows.ids['BALL']
+        if ball is None:
+            return
+        positions, velocities = state_arrays(entities)
+        players, officials = self._rows.rows['players'], self._rows.rows['officials']
+        
+        # Players chase the ball; referees follow play from a distance
+        chase_target(positions, velocities, players, positions[ball], speed=3.0, radius=0.5, arrive=0.5)
+        follow_play(positions, velocities, officials, positions[ball], speed=2.0, distance=3.0)
         
         # Update ball physics (bouncing, possession)
-        self._update_ball(entities, dt)
+        self._update_ball(positions, velocities, ball, dt)
+        commit_rows(entities, positions, velocities, np.concatenate([players, officials, [ball]]))
+        
+        if self.crowd is not None:
+            self._update_crowd(entities, dt)
+        
+    def _update_crowd(self, entities, dt: float):
+        """Step the spectator agents; those who have left are removed about once a second."""
+        self.crowd.step(entities, dt, shards=self.shards)
+        self._exit_sweep += dt
+        if self._exit_sweep >= 1.0:
+            self._exit_sweep = 0.0
+            self.crowd.remove_exited(entities)
         
     def _get_formation_position(self, team: str, index: int) -> tuple:
         """Get initial position for player in formation."""
@@ -141,55 +183,15 @@ class BasketballScenario(Scenario):
         
         return (x_base, y)
         
-    def _update_player_behavior(self, entity: Dict, all_entities: List[Dict], dt: float):
-        """Basic basketball player AI."""
-        # Find ball
-        ball = next((e for e in all_entities if e['id'] == 'BALL'), None)
-        if not ball:
-            return
-            
-        # Move towards ball (simplified)
-        dx = ball['position']['x'] - entity['position']['x']
-        dy = ball['position']['y'] - entity['position']['y']
-        dist = np.sqrt(dx**2 + dy**2)
-        
-        if dist > 0.5:  # Not at ball
-            # Move towards ball
-            speed = 3.0  # m/s
-            entity['velocity']['x'] = (dx / dist) * speed
-            entity['velocity']['y'] = (dy / dist) * speed
-        else:
-            # At ball - slow down
-            entity['velocity']['x'] *= 0.5
-            entity['velocity']['y'] *= 0.5
-            
-    def _update_referee_behavior(self, entity: Dict, all_entities: List[Dict], dt: float):
-        """Referee follows play."""
-        # Similar to player but slower
-        ball = next((e for e in all_entities if e['id'] == 'BALL'), None)
-        if ball:
-            dx = ball['position']['x'] - entity['position']['x']
-            dy = ball['position']['y'] - entity['position']['y']
-            dist = np.sqrt(dx**2 + dy**2)
-            
-            if dist > 3.0:
-                speed = 2.0
-                entity['velocity']['x'] = (dx / dist) * speed
-                entity['velocity']['y'] = (dy / dist) * speed
-                
-    def _update_ball(self, entities: List[Dict], dt: float):
+    def _update_ball(self, positions, velocities, ball: int, dt: float):
         """Update ball physics."""
-        ball = next((e for e in entities if e['id'] == 'BALL'), None)
-        if not ball:
-            return
-            
         # Gravity
-        ball['velocity']['z'] -= 9.81 * dt
+        velocities[ball, 2] -= 9.81 * dt
         
         # Bounce on floor
-        if ball['position']['z'] <= 0.12:  # Ball radius
-            ball['position']['z'] = 0.12
-            ball['velocity']['z'] = -ball['velocity']['z'] * 0.7  # Bounce with loss
+        if positions[ball, 2] <= 0.12:  # Ball radius
+            positions[ball, 2] = 0.12
+            velocities[ball, 2] = -velocities[ball, 2] * 0.7  # Bounce with loss
             
     def _court_bounds(self) -> tuple:
         """Return (x_min, y_min, x_max, y_max)."""
@@ -209,8 +211,8 @@ class BasketballScenario(Scenario):
                 'role': 'SPECTATOR',
                 'count': people_per_section,
                 'position': {
-                    'x': np.random.uniform(-5, self.court_length + 5),
-                    'y': np.random.uniform(-5, self.court_width + 5),
+                    'x': self.rng.uniform(-5, self.court_length + 5),
+                    'y': self.rng.uniform(-5, self.court_width + 5),
                     'z': 0.0
                 },
                 'velocity': {'x': 0.0, 'y': 0.0, 'z': 0.0},
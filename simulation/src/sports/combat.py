@@ -1,12 +1,13 @@
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Optional
 from ..core.scenario_manager import Scenario, Zone
+from .kernels import RowIndex, commit_rows, state_arrays
 
 class CombatScenario(Scenario):
     """MMA/Boxing style simulation."""
     
-    def __init__(self, config: dict = None):
-        super().__init__()
+    def __init__(self, config: dict = None, rng: Optional[np.random.Generator] = None):
+        super().__init__(rng)
         self.sport = 'COMBAT'
         self.ring_size = 9.0 # meters
         
@@ -14,6 +15,7 @@ class CombatScenario(Scenario):
             Zone(name='RING', bounds=(0,0,self.ring_size,self.ring_size), area=81, type='RING'),
             Zone(name='RINGSIDE', bounds=(-2,-2,self.ring_size+2,self.ring_size+2), area=150, type='RESTRICTED')
         ]
+        self._rows = RowIndex(groups={'fighters': {'role': 'FIGHTER'}})
 
     def initialize(self, entities: List[Dict]):
         # Fighter 1
@@ -41,25 +43,15 @@ class CombatScenario(Scenario):
         })
 
     def update(self, entities: List[Dict], dt: float):
-        f1 = next(e for e in entities if e['id'] == 'FIGHTER_1')
-        f2 = next(e for e in entities if e['id'] == 'FIGHTER_2')
+        self._rows.refresh(entities)
+        fighters = self._rows.rows['fighters']
+        positions, velocities = state_arrays(entities)
         
-        # Circle each other
-        center_x = (f1['position']['x'] + f2['position']['x']) / 2
-        center_y = (f1['position']['y'] + f2['position']['y']) / 2
+        # Jitter around (orbit logic simplified), one draw per fighter and axis
+        velocities[fighters, :2] += (self.rng.random((len(fighters), 2)) - 0.5) * 2.0
         
-        for f in [f1, f2]:
-            dx = center_x - f['position']['x']
-            dy = center_y - f['position']['y']
-            # Add orbit logic here... simplified
-            f['velocity']['x'] += (np.random.rand()-0.5) * 2.0
-            f['velocity']['y'] += (np.random.rand()-0.5) * 2.0
-            
-            # Keep in ring
-            next_x = f['position']['x'] + f['velocity']['x'] * dt
-            next_y = f['position']['y'] + f['velocity']['y'] * dt
-            
-            if next_x < 0 or next_x > self.ring_size:
-                f['velocity']['x'] *= -1
-            if next_y < 0 or next_y > self.ring_size:
-                f['velocity']['y'] *= -1
+        # Keep in ring
+        next_xy = positions[fighters, :2] + velocities[fighters, :2] * dt
+        outside = (next_xy < 0) | (next_xy > self.ring_size)
+        velocities[fighters, :2] = np.where(outside, -velocities[fighters, :2], velocities[fighters, :2])
+        commit_rows(entities, positions, velocities, fighters)
@@ -0,0 +1,342 @@
+"""
+Agent-level spectator crowd.
+
+Every spectator is an entity with a seat in stands laid out in rings around
+the playing area, and a state: QUEUED (outside, waiting to come in), ENTERING
+(walking from a gate to their seat), SEATED, EXITING (walking to the nearest
+exit) or EXITED. Arrivals and departures are spread over time (gates admit
+``gate_rate`` people per second each), so flows build up the way they do at a
+real venue instead of everyone moving on the same frame. Moving agents follow a
+social-force model (Helbing & Molnar): a driving term relaxes velocity towards
+the desired walking velocity, and neighbours within ``cutoff`` push back with
+A * exp((r_ij - d_ij) / B). Neighbours are found through a uniform grid
+(cell = cutoff) over the moving agents; only half of the neighbour cells are
+visited and each pair's force is applied to both agents.
+
+Seated agents do not move and are left out of the force computation (the
+stands are assumed to have aisles), so the per-frame cost scales with the
+number of people on the move. With a ShardPool (see core.shard_pool) the
+repulsion is split into spatial strips computed by worker processes.
+"""
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ..core.entity_store import EntityStore
+
+SEATED, ENTERING, EXITING, EXITED, QUEUED = 0, 1, 2, 3, 4
+STATE_NAMES = ('SEATED', 'ENTERING', 'EXITING', 'EXITED', 'QUEUED')
+
+# Half of the 3x3 neighbourhood; with (0, 0) this covers every pair once
+_HALF_NEIGHBOURHOOD = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+
+class CrowdModel:
+    """Social-force crowd with seating and exit flows."""
+
+    def __init__(self, count: int, field_bounds: tuple, seed: Union[int, np.random.Generator, None] = None,
+                 margin: float = 3.0, seat_pitch: float = 0.5, row_depth: float = 0.8,
+                 radius: float = 0.25, tau: float = 0.5, strength: float = 2.1,
+                 range_b: float = 0.3, cutoff: float = 1.0, arrive_radius: float = 0.4,
+                 exit_radius: float = 1.5, gate_rate: float = 5.0, id_prefix: str = 'SPECTATOR'):
+        self.count = int(count)
+        self.field_bounds = field_bounds
+        self.radius = radius
+        self.tau = tau
+        self.strength = strength
+        self.range_b = range_b
+        self.cutoff = cutoff
+        self.arrive_radius = arrive_radius
+        self.exit_radius = exit_radius
+        self.gate_rate = gate_rate
+        self.time = 0.0
+        self.rng = np.random.default_rng(seed)
+
+        self.seats, self.outer_bounds = _layout_seats(self.count, field_bounds, margin, seat_pitch, row_depth)
+        self.exits = _exit_points(self.outer_bounds)
+        self.ids = [f'{id_prefix}_{i+1}' for i in range(self.count)]
+        self.state = np.full(self.count, SEATED, dtype=np.int8)
+        self.goals = self.seats.copy()
+        # Desired walking speed per agent (m/s)
+        self.desired_speed = np.clip(self.rng.normal(1.34, 0.26, self.count), 0.8, 1.8)
+        # Scheduled transitions (QUEUED -> ENTERING, SEATED -> EXITING)
+        self.start_at = np.full(self.count, np.inf)
+
+        self.rows = np.zeros(self.count, dtype=np.int64)
+        self._rows_key = None
+
+    # ------------------------------------------------------------------
+    # Setup
+    # ------------------------------------------------------------------
+    def entities(self, flow: str = 'seated', duration: Optional[float] = None) -> List[Dict]:
+        """
+        Entity dicts for every agent. ``flow`` is 'seated' (everyone in their
+        seat), 'ingress' (everyone queues outside the gate nearest their seat
+        and is admitted at ``gate_rate``) or 'egress' (seated, leaving over
+        ``duration`` seconds, default 10 minutes).
+        """
+        positions = self.seats.copy()
+        if flow == 'ingress':
+            positions = self.begin_ingress(duration)
+        elif flow == 'egress':
+            self.begin_egress(duration=600.0 if duration is None else duration)
+        elif flow != 'seated':
+            raise ValueError(f"Unknown crowd flow: {flow}")
+
+        return [
+            {
+                'id': self.ids[i],
+                'type': 'PERSON',
+                'role': 'SPECTATOR',
+                'position': {'x': positions[i, 0], 'y': positions[i, 1], 'z': 0.0},
+                'velocity': {'x': 0.0, 'y': 0.0, 'z': 0.0},
+                'radius': self.radius,
+                'height': 1.7,
+                'color': (100, 100, 200),
+                'reflectance': 0.3
+            }
+            for i in range(self.count)
+        ]
+
+    def begin_ingress(self, duration: Optional[float] = None) -> np.ndarray:
+        """
+        Queue every agent outside the gate nearest their seat, admitted in
+        random order over ``duration`` seconds (by default as fast as the
+        gates allow). Returns the queue positions.
+        """
+        if duration is None:
+            duration = self.count / (self.gate_rate * len(self.exits))
+        self.state[:] = QUEUED
+        self.goals[:] = self.seats
+        self.start_at[:] = self.time + self.rng.uniform(0.0, duration, self.count)
+        return self._queue_positions(self._nearest_exit(self.seats))
+
+    def begin_egress(self, fraction: float = 1.0, duration: float = 0.0):
+        """Send ``fraction`` of the seated agents to their nearest exit, leaving over ``duration`` seconds."""
+        seated = np.flatnonzero(self.state == SEATED)
+        if fraction < 1.0:
+            seated = self.rng.choice(seated, size=int(len(seated) * fraction), replace=False)
+        self.goals[seated] = self.exits[self._nearest_exit(self.seats[seated])]
+        self.start_at[seated] = self.time + self.rng.uniform(0.0, duration, len(seated))
+
+    # ------------------------------------------------------------------
+    # Simulation
+    # ------------------------------------------------------------------
+    def step(self, entities, dt: float, shards=None) -> np.ndarray:
+        """
+        Advance every moving agent's velocity by one step (physics integrates
+        positions). Returns the indices of agents that reached an exit this step.
+        ``shards`` (a ShardPool) computes the repulsion across processes.
+        """
+        self._bind(entities)
+        self.time += dt
+        self._start_due(entities)
+        moving = np.flatnonzero((self.state == ENTERING) | (self.state == EXITING))
+        if not len(moving):
+            return np.zeros(0, dtype=np.int64)
+
+        positions = entities.positions
+        velocities = entities.velocities
+        rows = self.rows[moving]
+        pos = positions[rows, :2]
+        vel = velocities[rows, :2]
+
+        to_goal = self.goals[moving] - pos
+        dist = np.sqrt(to_goal[:, 0] ** 2 + to_goal[:, 1] ** 2)
+        direction = to_goal / np.maximum(dist, 1e-9)[:, None]
+
+        # Driving force towards the goal plus pairwise repulsion
+        force = (self.desired_speed[moving, None] * direction - vel) / self.tau
+        force += self.repulsion(pos) if shards is None else shards.repulsion(pos, **self.force_params())
+        vel = vel + force * dt
+
+        # Cap at 1.3x the desired speed
+        speed = np.sqrt(vel[:, 0] ** 2 + vel[:, 1] ** 2)
+        limit = 1.3 * self.desired_speed[moving]
+        too_fast = speed > limit
+        vel[too_fast] *= (limit[too_fast] / speed[too_fast])[:, None]
+
+        arrived = dist < np.where(self.state[moving] == EXITING, self.exit_radius, self.arrive_radius)
+        vel[arrived] = 0.0
+        velocities[rows, :2] = vel
+
+        arrived_agents = moving[arrived]
+        seated = arrived_agents[self.state[arrived_agents] == ENTERING]
+        positions[self.rows[seated], :2] = self.seats[seated]
+        self.state[seated] = SEATED
+        exited = arrived_agents[self.state[arrived_agents] == EXITING]
+        self.state[exited] = EXITED
+        return exited
+
+    def repulsion(self, pos: np.ndarray) -> np.ndarray:
+        """Social repulsion on each of ``pos`` (M, 2) from its neighbours within ``cutoff``."""
+        return social_repulsion(pos, **self.force_params())
+
+    def force_params(self) -> Dict[str, float]:
+        return {'radius': self.radius, 'strength': self.strength, 'range_b': self.range_b, 'cutoff': self.cutoff}
+
+    def remove_exited(self, entities):
+        """Take agents that have left the venue out of the entity table."""
+        gone = np.flatnonzero(self.state == EXITED)
+        if not len(gone):
+            return 0
+        for agent in gone:
+            entities.remove(self.ids[agent])
+        keep = self.state != EXITED
+        self.ids = [agent_id for agent_id, k in zip(self.ids, keep) if k]
+        self.state = self.state[keep]
+        self.goals = self.goals[keep]
+        self.seats = self.seats[keep]
+        self.desired_speed = self.desired_speed[keep]
+        self.start_at = self.start_at[keep]
+        self.count = len(self.ids)
+        self._rows_key = None
+        return len(gone)
+
+    def state_counts(self) -> Dict[str, int]:
+        counts = np.bincount(self.state, minlength=len(STATE_NAMES))
+        return {name: int(c) for name, c in zip(STATE_NAMES, counts)}
+
+    def exit_zones(self, size: float = 8.0) -> List[Tuple[str, tuple]]:
+        """(name, bounds) of the concourse square around each exit."""
+        half = size / 2
+        return [
+            (f'EXIT_{k+1}', (x - half, y - half, x + half, y + half))
+            for k, (x, y) in enumerate(self.exits)
+        ]
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _bind(self, entities):
+        """Agent -> row mapping, rebuilt only when the entity table changes."""
+        if not isinstance(entities, EntityStore):
+            raise TypeError("CrowdModel requires an EntityStore")
+        key = (id(entities), entities.version)
+        if key == self._rows_key:
+            return
+        self.rows = np.fromiter((entities.row_of(agent_id) for agent_id in self.ids),
+                                dtype=np.int64, count=len(self.ids))
+        self._rows_key = key
+
+    def _start_due(self, entities):
+        """Admit queued agents and release departing ones whose start time has come."""
+        due = np.flatnonzero(self.start_at <= self.time)
+        if not len(due):
+            return
+        self.start_at[due] = np.inf
+        queued = due[self.state[due] == QUEUED]
+        if len(queued):
+            gates = self.exits[self._nearest_exit(self.seats[queued])]
+            entities.positions[self.rows[queued], :2] = gates + self.rng.normal(0.0, 0.5, gates.shape)
+            self.state[queued] = ENTERING
+        self.state[due[self.state[due] == SEATED]] = EXITING
+
+    def _queue_positions(self, gate: np.ndarray) -> np.ndarray:
+        """Waiting spots 10-30 m outside each agent's gate."""
+        x0, y0, x1, y1 = self.outer_bounds
+        center = np.array([(x0 + x1) / 2, (y0 + y1) / 2])
+        outward = self.exits[gate] - center
+        outward /= np.linalg.norm(outward, axis=1, keepdims=True)
+        distance = self.rng.uniform(10.0, 30.0, len(gate))
+        return self.exits[gate] + outward * distance[:, None] + self.rng.normal(0.0, 3.0, (len(gate), 2))
+
+    def _nearest_exit(self, points: np.ndarray) -> np.ndarray:
+        d2 = ((points[:, None, :] - self.exits[None, :, :]) ** 2).sum(axis=2)
+        return np.argmin(d2, axis=1)
+
+
+def social_repulsion(pos: np.ndarray, radius: float, strength: float, range_b: float,
+                     cutoff: float) -> np.ndarray:
+    """Social repulsion on each of ``pos`` (M, 2) from its neighbours within ``cutoff``."""
+    count = len(pos)
+    force = np.zeros((count, 2))
+    if count < 2:
+        return force
+
+    cs = cutoff
+    cells = np.floor((pos - pos.min(axis=0)) / cs).astype(np.int64)
+    nx, ny = cells[:, 0].max() + 1, cells[:, 1].max() + 1
+    cell_id = cells[:, 0] * ny + cells[:, 1]
+    order = np.argsort(cell_id, kind='stable')
+    counts = np.bincount(cell_id, minlength=nx * ny)
+    starts = np.cumsum(counts) - counts
+
+    reach = 2 * radius
+    x, y = np.ascontiguousarray(pos[:, 0]), np.ascontiguousarray(pos[:, 1])
+    for ox, oy in _HALF_NEIGHBOURHOOD:
+        cx, cy = cells[:, 0] + ox, cells[:, 1] + oy
+        src = np.flatnonzero((cx >= 0) & (cx < nx) & (cy >= 0) & (cy < ny))
+        neighbour = cx[src] * ny + cy[src]
+        per_src = counts[neighbour]
+        total = int(per_src.sum())
+        if not total:
+            continue
+
+        # Expand (agent, agent-in-neighbour-cell) pairs
+        i = np.repeat(src, per_src)
+        offsets = np.arange(total) - np.repeat(np.cumsum(per_src) - per_src, per_src)
+        j = order[np.repeat(starts[neighbour], per_src) + offsets]
+        if ox == 0 and oy == 0:
+            keep = i < j
+            i, j = i[keep], j[keep]
+
+        dx = x[i] - x[j]
+        dy = y[i] - y[j]
+        d2 = dx * dx + dy * dy
+        close = np.flatnonzero((d2 < cs * cs) & (d2 > 1e-18))
+        i, j, dx, dy = i[close], j[close], dx[close], dy[close]
+
+        d = np.sqrt(d2[close])
+        magnitude = strength * np.exp((reach - d) / range_b) / d
+        fx, fy = dx * magnitude, dy * magnitude
+        force[:, 0] += np.bincount(i, fx, count) - np.bincount(j, fx, count)
+        force[:, 1] += np.bincount(i, fy, count) - np.bincount(j, fy, count)
+    return force
+
+
+def _layout_seats(count: int, field_bounds: tuple, margin: float, seat_pitch: float,
+                  row_depth: float) -> Tuple[np.ndarray, tuple]:
+    """
+    Seats in rectangular rings around the field, ``margin`` metres out, one
+    ring per ``row_depth``. Returns (seats (count, 2), outer stand bounds).
+    """
+    x0, y0, x1, y1 = field_bounds
+    rings = []
+    placed = 0
+    offset = margin
+    while placed < count:
+        ring = _ring_points(x0 - offset, y0 - offset, x1 + offset, y1 + offset, seat_pitch)
+        rings.append(ring[:count - placed])
+        placed += len(rings[-1])
+        offset += row_depth
+    seats = np.concatenate(rings) if rings else np.zeros((0, 2))
+    outer = offset - row_depth + margin if rings else margin
+    return seats, (x0 - outer, y0 - outer, x1 + outer, y1 + outer)
+
+
+def _ring_points(x0: float, y0: float, x1: float, y1: float, spacing: float) -> np.ndarray:
+    """Points every ``spacing`` metres around a rectangle's perimeter."""
+    width, height = x1 - x0, y1 - y0
+    perimeter = 2 * (width + height)
+    s = np.arange(0.0, perimeter, spacing)
+    points = np.empty((len(s), 2))
+    bottom = s < width
+    right = (s >= width) & (s < width + height)
+    top = (s >= width + height) & (s < 2 * width + height)
+    left = s >= 2 * width + height
+    points[bottom] = np.stack([x0 + s[bottom], np.full(bottom.sum(), y0)], axis=1)
+    points[right] = np.stack([np.full(right.sum(), x1), y0 + s[right] - width], axis=1)
+    points[top] = np.stack([x1 - (s[top] - width - height), np.full(top.sum(), y1)], axis=1)
+    points[left] = np.stack([np.full(left.sum(), x0), y1 - (s[left] - 2 * width - height)], axis=1)
+    return points
+
+
+def _exit_points(bounds: tuple) -> np.ndarray:
+    """Exits at the corners and side midpoints of the outer stand boundary."""
+    x0, y0, x1, y1 = bounds
+    xm, ym = (x0 + x1) / 2, (y0 + y1) / 2
+    return np.array([
+        (x0, y0), (xm, y0), (x1, y0), (x1, ym),
+        (x1, y1), (xm, y1), (x0, y1), (x0, ym)
+    ], dtype=np.float64)
@@ -0,0 +1,98 @@
+"""
+Batched behavior kernels shared by the sport scenarios.
+
+Scenarios resolve the rows of each behavior group (players, officials, ...)
+and of named entities (the ball) through a RowIndex, which only rescans when
+the store's rows change. Behaviors are then applied to every row of a group at
+once on the (N, 3) position/velocity arrays:
+
+    chase_target    head for a target at full speed, damp on arrival
+    hold_formation  jog back to precomputed per-row formation spots
+    follow_play     trail a target, holding position once within range
+
+All kernels steer in the x/y plane and leave z velocity alone.
+"""
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+
+from ..core.entity_store import EntityStore, ids_of, mask_of, positions_of, velocities_of
+
+
+class RowIndex:
+    """
+    Row numbers of behavior groups (by type/role/team criteria) and of named
+    entity ids. ``refresh`` is O(1) while an EntityStore's rows are unchanged;
+    plain lists of dicts are rescanned on every call.
+    """
+
+    def __init__(self, groups: Dict[str, Dict[str, str]], named: Sequence[str] = ()):
+        self.groups = groups
+        self.named = tuple(named)
+        self.rows: Dict[str, np.ndarray] = {}
+        self.ids: Dict[str, Optional[int]] = {}
+        self._key = None
+
+    def refresh(self, entities) -> bool:
+        """Recompute rows if the entity table changed. Returns True if it did."""
+        key = (id(entities), entities.version) if isinstance(entities, EntityStore) else None
+        if key is not None and key == self._key:
+            return False
+        self._key = key
+        self.rows = {
+            name: np.flatnonzero(mask_of(entities, **criteria))
+            for name, criteria in self.groups.items()
+        }
+        if isinstance(entities, EntityStore):
+            self.ids = {name: entities.row_of(name) if name in entities else None for name in self.named}
+        else:
+            rows = {entity_id: row for row, entity_id in enumerate(ids_of(entities))}
+            self.ids = {name: rows.get(name) for name in self.named}
+        return True
+
+
+def state_arrays(entities):
+    """(positions, velocities) arrays; in-place views for an EntityStore, copies otherwise."""
+    return positions_of(entities), velocities_of(entities)
+
+
+def commit_rows(entities, positions: np.ndarray, velocities: np.ndarray, rows: np.ndarray):
+    """Write kernel output back for list-of-dict entities (stores are updated in place)."""
+    if isinstance(entities, EntityStore):
+        return
+    for row in rows:
+        entity = entities[row]
+        for field, values in (('position', positions[row]), ('velocity', velocities[row])):
+            entity[field]['x'], entity[field]['y'], entity[field]['z'] = (float(v) for v in values)
+
+
+def steer(positions: np.ndarray, velocities: np.ndarray, rows: np.ndarray, targets: np.ndarray,
+          speed: Union[float, np.ndarray], radius: float, arrive: Optional[float] = None):
+    """
+    Point rows at ``targets`` ((2,) or (len(rows), 2)) with ``speed`` when
+    farther than ``radius``. Rows already within ``radius`` have their x/y
+    velocity scaled by ``arrive`` (0 stops them) or kept when it is None.
+    """
+    if not len(rows):
+        return
+    delta = np.asarray(targets, dtype=np.float64)[..., :2] - positions[rows, :2]
+    dist = np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+    moving = dist > radius
+
+    speed = np.broadcast_to(np.asarray(speed, dtype=np.float64), dist.shape)
+    velocities[rows[moving], :2] = delta[moving] / dist[moving, None] * speed[moving, None]
+    if arrive is not None:
+        velocities[rows[~moving], :2] *= arrive
+
+
+def chase_target(positions, velocities, rows, target, speed: float, radius: float = 0.5,
+                 arrive: float = 0.5):
+    steer(positions, velocities, rows, target, speed, radius, arrive)
+
+
+def hold_formation(positions, velocities, rows, spots: np.ndarray, speed: float, radius: float = 0.5):
+    steer(positions, velocities, rows, spots, speed, radius, arrive=0.0)
+
+
+def follow_play(positions, velocities, rows, target, speed: float, distance: float):
+    steer(positions, velocities, rows, target, speed, distance, arrive=None)
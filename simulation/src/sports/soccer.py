@@ -1,12 +1,13 @@
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Optional
 from ..core.scenario_manager import Scenario, Zone
+from .kernels import RowIndex, chase_target, commit_rows, hold_formation, state_arrays
 
 class SoccerScenario(Scenario):
     """FIFA-style soccer simulation."""
     
-    def __init__(self, config: dict = None):
-        super().__init__()
+    def __init__(self, config: dict = None, rng: Optional[np.random.Generator] = None):
+        super().__init__(rng)
         self.sport = 'SOCCER'
         
         # Field dimensions (Standard 105m x 68m)
@@ -35,6 +36,14 @@ class SoccerScenario(Scenario):
             )
         ]
         
+        # Formation spots are fixed: compute them once per player id
+        self._formation = {
+            f'{team}_{i+1}': self._get_formation_position(team, i)
+            for team in ('HOME', 'AWAY') for i in range(11)
+        }
+        self._rows = RowIndex(groups={'players': {'role': 'PLAYER'}}, named=('BALL',))
+        self._spots = np.zeros((0, 2))
+        
     def initialize(self, entities: List[Dict]):
         # Home Team (11 players)
         for i in range(11):
@@ -55,13 +64,30 @@ class SoccerScenario(Scenario):
         })
 
     def update(self, entities: List[Dict], dt: float):
-        # Very simple AI: chase ball
-        ball = next((e for e in entities if e['id'] == 'BALL'), None)
-        if not ball: return
+        # Very simple AI: chase the ball when within 15m, otherwise hold formation
+        if self._rows.refresh(entities):
+            self._spots = self._formation_spots(entities, self._rows.rows['players'])
+        ball = self._rows.ids['BALL']
+        if ball is None: return
+        
+        positions, velocities = state_arrays(entities)
+        players = self._rows.rows['players']
+        to_ball = positions[ball, :2] - positions[players, :2]
+        near_ball = np.sqrt(to_ball[:, 0]**2 + to_ball[:, 1]**2) < 15.0
         
-        for e in entities:
-            if e.get('role') == 'PLAYER':
-                self._update_player(e, ball, dt)
+        # Sprint to the ball / jog back to formation
+        chase_target(positions, velocities, players[near_ball], positions[ball, :2], speed=5.0, arrive=0.0)
+        hold_formation(positions, velocities, players[~near_ball], self._spots[~near_ball], speed=2.0)
+        commit_rows(entities, positions, velocities, players)
+
+    def _formation_spots(self, entities, rows: np.ndarray) -> np.ndarray:
+        """Formation target per player row (unknown ids take their team's keeper spot)."""
+        spots = np.zeros((len(rows), 2))
+        for i, row in enumerate(rows):
+            entity = entities[row]
+            spot = self._formation.get(entity['id'])
+            spots[i] = spot if spot is not None else self._get_formation_position(entity.get('team'), 0)
+        return spots
 
     def _create_player(self, pid, team, pos, color):
         return {
@@ -84,37 +110,3 @@ class SoccerScenario(Scenario):
             return (base_x + 35*direction, self.field_width * ((index-4)/5))
         else: # Forwards
             return (base_x + 55*direction, self.field_width * ((index-8)/3))
-
-    def _update_player(self, player, ball, dt):
-        # Determine if this player is closest to ball for their team
-        # In a full sim, we'd check all teammates.
-        # For efficiency here, we'll just check distance vs fixed threshold
-        
-        dx_ball = ball['position']['x'] - player['position']['x']
-        dy_ball = ball['position']['y'] - player['position']['y']
-        dist_ball = np.sqrt(dx_ball**2 + dy_ball**2)
-        
-        # Calculate formation target
-        pid_parts = player['id'].split('_')
-        idx = int(pid_parts[1]) - 1 if len(pid_parts) > 1 else 0
-        form_pos = self._get_formation_position(player['team'], idx)
-        
-        # Formation force
-        dx_form = form_pos[0] - player['position']['x']
-        dy_form = form_pos[1] - player['position']['y']
-        dist_form = np.sqrt(dx_form**2 + dy_form**2)
-        
-        # Logic: If close to ball (within 15m), chase ball. Else, hold formation.
-        if dist_ball < 15.0:
-            target_dx, target_dy, target_dist = dx_ball, dy_ball, dist_ball
-            speed = 5.0 # Sprint
-        else:
-            target_dx, target_dy, target_dist = dx_form, dy_form, dist_form
-            speed = 2.0 # Jog
-            
-        if target_dist > 0.5:
-            player['velocity']['x'] = (target_dx / target_dist) * speed
-            player['velocity']['y'] = (target_dy / target_dist) * speed
-        else:
-            player['velocity']['x'] = 0
-            player['velocity']['y'] = 0
@@ -0,0 +1,179 @@
+"""
+Low-overhead runtime metrics for the simulation loop.
+
+Timers keep cumulative histogram buckets (for Prometheus) and a fixed-size
+ring of recent samples (for p50/p95/p99). Recording a sample is a bisect and
+two list writes; percentiles and text exposition are only computed when
+someone asks for them, from another thread if need be.
+"""
+import bisect
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Seconds; covers sub-millisecond stages up to multi-second stalls
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5
+)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Timer:
+    """Duration histogram plus a window of recent samples."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, window: int = 1024):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._window = [0.0] * window
+        self._next = 0
+
+    def observe(self, seconds: float):
+        self.bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self._window[self._next] = seconds
+        self._next = (self._next + 1) % len(self._window)
+
+    def recent(self) -> np.ndarray:
+        return np.array(self._window[:min(self.count, len(self._window))])
+
+    def quantiles(self, quantiles=QUANTILES) -> Dict[float, float]:
+        """Quantiles over the recent window (0.0 before the first sample)."""
+        samples = self.recent()
+        if not len(samples):
+            return {q: 0.0 for q in quantiles}
+        values = np.quantile(samples, quantiles)
+        return {q: float(v) for q, v in zip(quantiles, values)}
+
+    def summary(self) -> Dict[str, float]:
+        q = self.quantiles()
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': round(q[0.5] * 1000, 3),
+            'p95_ms': round(q[0.95] * 1000, 3),
+            'p99_ms': round(q[0.99] * 1000, 3),
+            'max_ms': round(self.max * 1000, 3)
+        }
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+
+class Gauge:
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+
+class MetricsRegistry:
+    """
+    Named metric families with labels. ``timer``/``counter``/``gauge`` return
+    the same object for the same name and labels, so hot paths can look a
+    metric up once and keep the reference.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, window: int = 1024):
+        self.buckets = buckets
+        self.window = window
+        self._lock = threading.Lock()
+        # name -> (kind, help, {labels: metric})
+        self._families: Dict[str, Tuple[str, str, Dict[Tuple, object]]] = {}
+
+    def timer(self, name: str, help: str = '', **labels) -> Timer:
+        return self._get('histogram', name, help, labels, lambda: Timer(self.buckets, self.window))
+
+    def counter(self, name: str, help: str = '', **labels) -> Counter:
+        return self._get('counter', name, help, labels, Counter)
+
+    def gauge(self, name: str, help: str = '', **labels) -> Gauge:
+        return self._get('gauge', name, help, labels, Gauge)
+
+    def _get(self, kind: str, name: str, help: str, labels: Dict[str, str], factory):
+        key = tuple(sorted(labels.items()))
+        family = self._families.get(name)
+        metric = family[2].get(key) if family else None
+        if metric is not None:
+            return metric
+        with self._lock:
+            family = self._families.setdefault(name, (kind, help, {}))
+            if family[0] != kind:
+                raise ValueError(f"Metric {name} already registered as a {family[0]}")
+            return family[2].setdefault(key, factory())
+
+    def summary(self) -> Dict[str, Dict]:
+        """JSON-friendly view: timer summaries and counter/gauge values by family."""
+        result = {}
+        for name, (kind, _, metrics) in self._items():
+            result[name] = {
+                _label_key(key): metric.summary() if kind == 'histogram' else metric.value
+                for key, metric in metrics
+            }
+        return result
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        for name, (kind, help, metrics) in self._items():
+            if help:
+                lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, metric in metrics:
+                if kind != 'histogram':
+                    lines.append(f"{name}{_labels(key)} {_number(metric.value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float('inf'),), list(metric.bucket_counts)):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(key + (('le', _number(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(key)} {_number(metric.total)}")
+                lines.append(f"{name}_count{_labels(key)} {cumulative}")
+
+            if kind == 'histogram':
+                # Recent-window percentiles alongside the histogram
+                lines.append(f"# TYPE {name}_quantile gauge")
+                for key, metric in metrics:
+                    for q, value in metric.quantiles().items():
+                        lines.append(f"{name}_quantile{_labels(key + (('quantile', str(q)),))} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def _items(self):
+        with self._lock:
+            return [
+                (name, (kind, help, list(metrics.items())))
+                for name, (kind, help, metrics) in sorted(self._families.items())
+            ]
+
+
+def _labels(key: Tuple) -> str:
+    if not key:
+        return ''
+    body = ','.join(f'{k}="{_escape(v)}"' for k, v in key)
+    return '{' + body + '}'
+
+
+def _label_key(key: Tuple) -> str:
+    return ','.join(f'{k}={v}' for k, v in key) or 'value'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value: Optional[float]) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
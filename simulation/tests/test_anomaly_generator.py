@@ -0,0 +1,139 @@
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.anomalies.generator import AnomalyGenerator
+from src.anomalies.rules import Rule
+from src.core.entity_store import EntityStore
+from src.core.scenario_manager import Zone
+from src.core.zone_index import ZoneIndex
+
+
+def _strip(anomalies):
+    """Anomalies without their random ids, for comparing two generators."""
+    return [{k: v for k, v in a.items() if k not in ('anomalyId', 'relatedAnomalies')} for a in anomalies]
+
+
+class TestIncrementalDetection(unittest.TestCase):
+    def setUp(self):
+        self.scenario = SimpleNamespace(zones=[
+            Zone('COURT', (0, 0, 28.65, 15.24), 436.6, 'FIELD'),
+            Zone('PAINT_HOME', (0, 5.18, 5.8, 10.06), 28.3, 'RESTRICTED'),
+            Zone('BENCH', (10, -3, 12, -1), 4.0, 'SEATING'),
+            Zone('TRIANGLE', None, None, 'RESTRICTED', polygon=[(14, 2), (20, 2), (17, 8)]),
+        ])
+        rng = np.random.default_rng(3)
+        self.store = EntityStore()
+        for i in range(300):
+            role = ['PLAYER', 'OFFICIAL', 'SPECTATOR'][i % 3]
+            x, y = rng.uniform(-2, 30), rng.uniform(-4, 16)
+            if i < 40:
+                x, y = rng.uniform(10, 12), rng.uniform(-3, -1)  # Packed bench
+            self.store.append({'id': f'e{i}', 'type': 'PERSON' if i % 7 else 'BALL', 'role': role,
+                               'position': {'x': x, 'y': y, 'z': 0.0},
+                               'velocity': {'x': 0.0, 'y': 0.0, 'z': 0.0}})
+        self.rng = rng
+
+    def test_matches_full_evaluation(self):
+        incremental = AnomalyGenerator()
+        full = AnomalyGenerator(incremental=False)
+        subtypes = set()
+        for frame in range(60):
+            # A few entities move each frame; some sprint or cross zone edges
+            rows = self.rng.choice(len(self.store), size=8, replace=False)
+            self.store.velocities[rows, :2] = self.rng.normal(0, 6, (8, 2))
+            self.store.positions[rows, :2] += self.rng.normal(0, 2, (8, 2))
+            if frame == 30:
+                self.store[5]['role'] = 'SPECTATOR'
+            if frame == 40:
+                self.store.remove('e7')
+            t = 1000.0 + frame / 2
+            got = incremental.detect(self.store, self.scenario, t)
+            expected = full.detect(self.store, self.scenario, t)
+            self.assertEqual(_strip(got), _strip(expected))
+            subtypes.update(a['subtype'] for a in expected)
+        self.assertTrue({'CROWD_COMPRESSION', 'SPEED_VIOLATION', 'RESTRICTED_ZONE_ENTRY'} <= subtypes)
+
+    def test_zone_edits_fall_back_to_full_evaluation(self):
+        incremental = AnomalyGenerator()
+        full = AnomalyGenerator(incremental=False)
+        incremental.detect(self.store, self.scenario, 1000.0)
+        full.detect(self.store, self.scenario, 1000.0)
+
+        self.scenario.zones.append(Zone('TUNNEL', (-2, -4, 30, 0), 128.0, 'RESTRICTED'))
+        got = incremental.detect(self.store, self.scenario, 1000.5)
+        expected = full.detect(self.store, self.scenario, 1000.5)
+        self.assertEqual(_strip(got), _strip(expected))
+        self.assertIn('TUNNEL', {a['zone'] for a in got})
+
+        del self.scenario.zones[2]
+        self.assertEqual(_strip(incremental.detect(self.store, self.scenario, 1001.0)),
+                         _strip(full.detect(self.store, self.scenario, 1001.0)))
+
+    def test_relookup_matches_lookup(self):
+        index = ZoneIndex(self.scenario.zones)
+        xy = self.store.positions[:, :2].copy()
+        membership = index.lookup(xy)
+        moved = np.array([1, 50, 51, 299])
+        xy[moved] = [(2.0, 7.0), (11, -2), (40, 40), (17, 4)]
+
+        updated, affected = index.relookup(membership, xy, moved)
+        expected = index.lookup(xy)
+        np.testing.assert_array_equal(updated.rows, expected.rows)
+        np.testing.assert_array_equal(updated.zone_ids, expected.zone_ids)
+        np.testing.assert_array_equal(updated.counts, expected.counts)
+        changed = [z for z in range(4) if not np.array_equal(membership.rows_in(z), expected.rows_in(z))]
+        self.assertEqual(np.flatnonzero(affected).tolist(), changed)
+
+
+class _BallOutRule(Rule):
+    """Test rule: anything more than ``margin`` metres below y = 0."""
+    type = 'KINETICS'
+    subtype = 'OUT_OF_BOUNDS'
+    depends = 'position'
+    thresholds = {'default': 1.0}
+
+    def evaluate(self, frame, rows):
+        depth = -frame.positions[rows, 1]
+        return depth > frame.by_role(self.thresholds, rows), depth
+
+    def record(self, frame, row, depth, occurred_at):
+        return {'anomalyId': f'OOB_{row}', 'type': self.type, 'subtype': self.subtype, 'severity': 'LOW',
+                'entityIds': [frame.ids[row]], 'location': {'x': 0.0, 'y': 0.0, 'z': 0.0},
+                'occurredAt': occurred_at, 'ruleOfThreeHit': False, 'zone': 'UNKNOWN'}
+
+
+class TestRuleRegistry(unittest.TestCase):
+    def setUp(self):
+        self.scenario = SimpleNamespace(zones=[Zone('COURT', (0, 0, 28.65, 15.24), 436.6, 'FIELD')])
+        self.store = EntityStore()
+        for i, (role, vx, y) in enumerate([('PLAYER', 12.0, 1.0), ('PLAYER', 16.0, 1.0),
+                                           ('SPECTATOR', 3.5, -3.0), (None, 1.0, -0.5)]):
+            self.store.append({'id': f'e{i}', 'type': 'PERSON', 'role': role,
+                               'position': {'x': 5.0, 'y': y, 'z': 0.0},
+                               'velocity': {'x': vx, 'y': 0.0, 'z': 0.0}})
+
+    def _hits(self, generator, subtype, t=10.0):
+        return [a['entityIds'][0] for a in generator.detect(self.store, self.scenario, t) if a['subtype'] == subtype]
+
+    def test_per_role_and_scenario_thresholds(self):
+        # Limit is 1.5x the role's expected max: 15 m/s for players, 3 m/s otherwise
+        self.assertEqual(self._hits(AnomalyGenerator(), 'SPEED_VIOLATION'), ['e1', 'e2'])
+
+        self.scenario.anomaly_rules = {'SPEED_VIOLATION': {'thresholds': {'PLAYER': 7.0, 'SPECTATOR': 3.0}}}
+        self.assertEqual(self._hits(AnomalyGenerator(), 'SPEED_VIOLATION'), ['e0', 'e1'])
+
+    def test_registered_rule_runs_incrementally(self):
+        generator = AnomalyGenerator()
+        generator.register(_BallOutRule())
+        self.assertEqual(self._hits(generator, 'OUT_OF_BOUNDS'), ['e2'])
+
+        # Only moved rows are re-evaluated; hits of unmoved rows are kept
+        self.store.positions[3, 1] = -4.0
+        self.store.positions[2, 1] = 2.0
+        self.assertEqual(self._hits(generator, 'OUT_OF_BOUNDS', 10.5), ['e3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
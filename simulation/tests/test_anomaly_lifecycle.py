@@ -0,0 +1,82 @@
+import unittest
+
+from src.anomalies.generator import AnomalyGenerator
+from src.anomalies.lifecycle import AnomalyLifecycle
+from src.core.orchestrator import SimulationOrchestrator
+
+
+def _detection(n, subtype='RESTRICTED_ZONE_ENTRY', zone='PAINT_HOME', entity='REF_1', severity='HIGH'):
+    return {'anomalyId': f'ANOM_{n}', 'type': 'GEOGRAPHICS', 'subtype': subtype, 'severity': severity,
+            'zone': zone, 'entityIds': [entity], 'location': {'x': 1.0, 'y': 7.0, 'z': 0.0},
+            'occurredAt': '2026-01-01T00:00:00', 'ruleOfThreeHit': False}
+
+
+class TestAnomalyLifecycle(unittest.TestCase):
+    def setUp(self):
+        self.lifecycle = AnomalyLifecycle(close_after=1.0, update_interval=5.0)
+
+    def _run(self, start, stop, cooldown=3.0, **kwargs):
+        """Events from one detection every 0.1 s over [start, stop)."""
+        events = []
+        for tick in range(round(start * 10), round(stop * 10)):
+            t = tick / 10
+            events += self.lifecycle.update([_detection(f'{t:.1f}', **kwargs)], t, cooldown)
+        return events
+
+    def test_persistent_detection_opens_once_and_throttles_updates(self):
+        events = self._run(0.0, 12.0)
+        self.assertEqual([e['event'] for e in events], ['OPEN', 'UPDATE', 'UPDATE'])
+        # The incident keeps the id of its first detection
+        self.assertEqual({e['anomalyId'] for e in events}, {'ANOM_0.0'})
+        self.assertEqual(events[-1]['detections'], 101)
+
+    def test_severity_change_updates_immediately(self):
+        self._run(0.0, 1.0)
+        events = self.lifecycle.update([_detection('x', severity='CRITICAL')], 1.0)
+        self.assertEqual([(e['event'], e['severity']) for e in events], [('UPDATE', 'CRITICAL')])
+
+    def test_close_then_cooldown_then_reopen(self):
+        self._run(0.0, 1.0)
+        # Other incidents keep detection going while this one is absent
+        events = self._run(1.0, 3.0, entity='OTHER')
+        closed = [e for e in events if e['event'] == 'CLOSE']
+        self.assertEqual(len(closed), 1)
+        self.assertEqual((closed[0]['anomalyId'], closed[0]['status']), ('ANOM_0.0', 'CLOSED'))
+
+        # Back within the cooldown: suppressed; after it: a new incident
+        self.assertEqual(self.lifecycle.update([_detection('a')], 3.5, 3.0), [])
+        self.assertEqual(self.lifecycle.counters['suppressed'], 1)
+        events = self.lifecycle.update([_detection('b')], 5.5, 3.0)
+        self.assertEqual([(e['event'], e['anomalyId']) for e in events if e['entityIds'] == ['REF_1']],
+                         [('OPEN', 'ANOM_b')])
+
+    def test_generator_emit_uses_min_anomaly_interval(self):
+        generator = AnomalyGenerator()
+        generator.min_anomaly_interval = 10.0
+        generator.lifecycle.close_after = 0.5
+        generator.emit([_detection(1)], 100.0)
+        self.assertEqual(generator.last_anomaly_time, 100.0)
+        self.assertEqual([e['event'] for e in generator.emit([], 101.0)], ['CLOSE'])
+        self.assertEqual(generator.emit([_detection(2)], 105.0), [])
+        self.assertEqual([e['event'] for e in generator.emit([_detection(3)], 111.0)], ['OPEN'])
+
+    def test_new_scenario_closes_open_incidents(self):
+        orch = SimulationOrchestrator({})
+        orch.load_scenario('BASKETBALL', {})
+        lifecycle = orch.anomaly_generator.lifecycle
+        lifecycle.update([_detection(1)], 0.0, 3.0)
+        lifecycle.update([_detection(2, entity='OTHER')], 0.5, 3.0)
+        closed = []
+        orch.publisher.publish_anomalies = closed.extend
+        orch.reseed(7)
+        self.assertEqual([(e['event'], e['anomalyId']) for e in closed], [('CLOSE', 'ANOM_1'), ('CLOSE', 'ANOM_2')])
+        self.assertEqual(lifecycle.get_stats()['active'], 0)
+        # Nothing carries over into the next scenario, cooldowns included
+        lifecycle.update([_detection(3)], 1.0, 3.0)
+        orch.load_scenario('BASKETBALL', {})
+        self.assertEqual(lifecycle.get_stats()['coolingDown'], 0)
+        self.assertEqual([e['event'] for e in lifecycle.update([_detection(4)], 1.5, 3.0)], ['OPEN'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+import cv2
 import numpy as np
 from src.nodes.camera_simulator import CameraSimulator
 
@@ -29,5 +30,26 @@ class TestCameraSimulator(unittest.TestCase):
         frame3 = self.camera.render(entities, timestamp=1.04)
         self.assertIsNotNone(frame3)
 
+    def test_fast_and_legacy_modes_render_same_size(self):
+        entities = [{'id': 'E1', 'position': {'x': 1, 'y': 1, 'z': 0}}]
+        for mode in ('fast', 'legacy'):
+            camera = CameraSimulator({'width': 640, 'height': 360}, fps=30, fov=90, render_mode=mode)
+            image = cv2.imdecode(np.frombuffer(camera.render(entities, 1.0), np.uint8), cv2.IMREAD_COLOR)
+            self.assertEqual(image.shape, (360, 640, 3))
+
+    def test_fast_mode_draws_entities_over_noisy_background(self):
+        camera = CameraSimulator({'width': 640, 'height': 360}, fps=30, fov=90)
+        entities = [{'id': 'E1', 'position': {'x': 1, 'y': 1, 'z': 0}}]
+        image = cv2.imdecode(np.frombuffer(camera.render(entities, 1.0), np.uint8), cv2.IMREAD_COLOR)
+
+        # Background stays dark gray with zero-mean noise; entity disc is green
+        self.assertAlmostEqual(float(image[:100, :100].mean()), 30.0, delta=2.0)
+        self.assertGreater(image[230, 370, 1], 200)
+
+    def test_preset_config(self):
+        camera = CameraSimulator.from_config({'enabled': True, 'preset': '720p', 'fps': 15})
+        self.assertEqual((camera.width, camera.height, camera.jpeg_quality), (1280, 720, 75))
+        self.assertEqual(camera.fps, 15)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import numpy as np
+from src.core.entity_store import EntityStore
+from src.sports.basketball import BasketballScenario
+from src.sports.crowd import CrowdModel
+
+FIELD = (0.0, 0.0, 28.65, 15.24)
+
+def brute_force_repulsion(crowd, pos):
+    delta = pos[:, None, :] - pos[None, :, :]
+    d = np.sqrt((delta ** 2).sum(axis=2))
+    np.fill_diagonal(d, np.inf)
+    magnitude = np.where(d < crowd.cutoff, crowd.strength * np.exp((2 * crowd.radius - d) / crowd.range_b) / d, 0.0)
+    return (delta * magnitude[:, :, None]).sum(axis=1)
+
+def run(crowd, store, frames, dt=0.1):
+    for _ in range(frames):
+        crowd.step(store, dt)
+        store.positions[:] += store.velocities * dt
+
+class TestCrowdModel(unittest.TestCase):
+    def test_seats_surround_the_field(self):
+        crowd = CrowdModel(5000, FIELD, seed=0)
+        self.assertEqual(len(crowd.seats), 5000)
+        x, y = crowd.seats[:, 0], crowd.seats[:, 1]
+        off_field = (x < FIELD[0] - 2.9) | (x > FIELD[2] + 2.9) | (y < FIELD[1] - 2.9) | (y > FIELD[3] + 2.9)
+        self.assertTrue(off_field.all())
+        self.assertEqual(len(np.unique(np.round(crowd.seats, 3), axis=0)), 5000)
+
+    def test_grid_repulsion_matches_brute_force(self):
+        crowd = CrowdModel(10, FIELD, seed=0)
+        pos = np.random.default_rng(1).uniform(0, 6, size=(400, 2))
+        np.testing.assert_allclose(crowd.repulsion(pos), brute_force_repulsion(crowd, pos), atol=1e-9)
+
+    def test_ingress_fills_seats(self):
+        crowd = CrowdModel(200, FIELD, seed=0)
+        store = EntityStore()
+        store.extend(crowd.entities('ingress', duration=5.0))
+        run(crowd, store, 900)
+        self.assertEqual(crowd.state_counts()['SEATED'], 200)
+        rows = [store.row_of(agent_id) for agent_id in crowd.ids]
+        np.testing.assert_allclose(store.positions[rows, :2], crowd.seats)
+
+    def test_egress_empties_the_venue(self):
+        scenario = BasketballScenario({
+            'crowdMode': 'agents', 'crowdCount': 300, 'crowdFlow': 'egress',
+            'crowdFlowDuration': 5.0, 'crowdSeed': 0
+        })
+        store = EntityStore()
+        scenario.initialize(store)
+        self.assertEqual(len(store.mask(role='SPECTATOR').nonzero()[0]), 300)
+        self.assertEqual(len([z for z in scenario.zones if z.type == 'EXIT']), 8)
+
+        for _ in range(900):
+            scenario.update(store, 0.1)
+            store.positions[:] += store.velocities * 0.1
+        self.assertEqual(scenario.crowd.count, 0)
+        self.assertFalse(store.mask(role='SPECTATOR').any())
+        self.assertIsNotNone(store.get('BALL'))
+
+    def test_sections_mode_unchanged(self):
+        store = EntityStore()
+        scenario = BasketballScenario({'crowdCount': 800})
+        scenario.initialize(store)
+        self.assertIsNone(scenario.crowd)
+        self.assertEqual(len(store.mask(type='GROUP')), 22)
+        self.assertEqual(int(store.mask(type='GROUP').sum()), 8)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import numpy as np
+from src.core.entity_store import EntityStore, positions_of
+
+
+class TestEntityStore(unittest.TestCase):
+    def setUp(self):
+        self.store = EntityStore(capacity=2)
+        self.store.append({
+            'id': 'P1', 'type': 'PERSON', 'role': 'PLAYER', 'team': 'HOME',
+            'position': {'x': 1.0, 'y': 2.0, 'z': 0.0},
+            'velocity': {'x': 0.5, 'y': 0.0, 'z': 0.0},
+            'radius': 0.3, 'color': (255, 0, 0)
+        })
+        self.store.append({
+            'id': 'BALL', 'type': 'OBJECT',
+            'position': {'x': 5.0, 'y': 5.0, 'z': 1.5},
+            'velocity': {'x': 0.0, 'y': 0.0, 'z': 0.0},
+            'radius': 0.12
+        })
+
+    def test_dict_view_reads_and_writes_arrays(self):
+        player = self.store.get('P1')
+        self.assertEqual(player['role'], 'PLAYER')
+        self.assertEqual(player['color'], (255, 0, 0))
+
+        player['velocity']['x'] *= 2
+        player['position'] = {'x': 3.0, 'y': 4.0, 'z': 0.0}
+
+        np.testing.assert_allclose(self.store.velocities[0], [1.0, 0.0, 0.0])
+        np.testing.assert_allclose(self.store.positions[0], [3.0, 4.0, 0.0])
+
+        # Array writes are visible through the view
+        self.store.positions[1, 2] = 0.5
+        self.assertEqual(self.store.get('BALL')['position']['z'], 0.5)
+
+    def test_missing_fields_behave_like_dict(self):
+        ball = self.store.get('BALL')
+        self.assertIsNone(ball.get('role'))
+        self.assertNotIn('team', ball)
+        with self.assertRaises(KeyError):
+            ball['role']
+
+    def test_growth_and_masks(self):
+        for i in range(10):
+            self.store.append({'id': f'S{i}', 'type': 'PERSON', 'role': 'SPECTATOR'})
+
+        self.assertEqual(len(self.store), 12)
+        self.assertEqual(int(self.store.mask(type='PERSON').sum()), 11)
+        self.assertEqual(int(self.store.mask(role='PLAYER').sum()), 1)
+        self.assertFalse(self.store.mask(role='UNKNOWN_ROLE').any())
+        np.testing.assert_allclose(self.store.get('P1')['position']['x'], 1.0)
+
+    def test_remove_keeps_index_and_views_consistent(self):
+        self.store.append({'id': 'S1', 'position': {'x': 9.0, 'y': 9.0, 'z': 0.0}})
+        ball = self.store.get('BALL')
+        last = self.store.get('S1')
+
+        self.store.remove('P1')
+
+        self.assertEqual(len(self.store), 2)
+        self.assertNotIn('P1', self.store)
+        self.assertEqual(self.store.row_of('S1'), 0)
+        self.assertEqual(last['position']['x'], 9.0)
+        self.assertEqual(ball['id'], 'BALL')
+        self.assertEqual([e['id'] for e in self.store], ['S1', 'BALL'])
+
+    def test_snapshots_are_detached(self):
+        snapshot = self.store.to_dicts()
+        self.store.positions[:] = 0.0
+        self.assertEqual(snapshot[0]['position'], {'x': 1.0, 'y': 2.0, 'z': 0.0})
+        self.assertIsInstance(snapshot[0]['position'], dict)
+        np.testing.assert_allclose(positions_of(snapshot)[1], [5.0, 5.0, 1.5])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import numpy as np
+from src.nodes.fusion_engine import FusionEngine
+from src.nodes.lidar_simulator import LidarSimulator
+
+def reference_association(engine, lidar_points, bboxes):
+    """Per-point loop the vectorized association replaced."""
+    projected = engine._project_lidar_to_image(lidar_points[:, :3])
+    result = []
+    for bbox in bboxes:
+        inside = [i for i, pt in enumerate(projected) if pt[2] > 0 and engine._iou(pt, bbox)]
+        result.append(inside)
+    return result
+
+class TestFusionEngine(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.entities = [
+            {'id': f'E{i}', 'position': {'x': float(x), 'y': float(y), 'z': float(z)}}
+            for i, (x, y, z) in enumerate(rng.uniform([-10, 1, 0], [10, 15, 2], size=(20, 3)))
+        ]
+        self.lidar = LidarSimulator('VLP-16', 16, 100, seed=5).scan(self.entities, 0.0)
+        self.engine = FusionEngine()
+
+    def test_matches_per_point_reference(self):
+        bboxes = [b['bbox'] for b in self.engine._detect_objects_2d(None, self.entities)]
+        expected = reference_association(self.engine, self.lidar, bboxes)
+
+        detections = self.engine.fuse(None, self.lidar, self.entities)
+
+        self.assertEqual([d['entityId'] for d in detections], [e['id'] for e in self.entities])
+        for detection, inside, bbox in zip(detections, expected, bboxes):
+            np.testing.assert_allclose(detection['bbox2d'], bbox)
+            if inside:
+                centroid = self.lidar[inside, :3].astype(np.float64).mean(axis=0)
+                np.testing.assert_allclose(detection['position3d'], centroid, rtol=1e-6, atol=1e-6)
+                self.assertAlmostEqual(detection['confidence'], min(0.9 + len(inside) / 100.0, 1.0))
+            else:
+                self.assertEqual(detection['confidence'], 0.5)
+
+    def test_small_chunks_give_same_result(self):
+        full = self.engine.fuse(None, self.lidar, self.entities)
+        self.engine.association_chunk = 7
+        chunked = self.engine.fuse(None, self.lidar, self.entities)
+        for a, b in zip(full, chunked):
+            if a['confidence'] > 0.5:
+                np.testing.assert_allclose(a['position3d'], b['position3d'])
+                self.assertEqual(a['confidence'], b['confidence'])
+
+    def test_entities_at_or_behind_the_camera_plane(self):
+        # y <= -10 gives inverted (or, at -10, non-finite) simulated boxes
+        entities = self.entities + [
+            {'id': f'B{i}', 'position': {'x': 0.0, 'y': y, 'z': 1.0}}
+            for i, y in enumerate((-10.0, -25.0, -40.0))
+        ]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            detections = self.engine.fuse(None, self.lidar, entities)
+            expected = self.engine.fuse(None, self.lidar, self.entities)
+        self.assertEqual(len(detections), len(entities))
+        self.assertTrue(all(d['confidence'] == 0.5 for d in detections[-3:]))
+        self.assertEqual([d['confidence'] for d in detections[:-3]], [d['confidence'] for d in expected])
+
+    def test_no_points_falls_back_to_prior(self):
+        detections = self.engine.fuse(None, np.zeros((0, 4), dtype=np.float32), self.entities[:2])
+        self.assertEqual(len(detections), 2)
+        self.assertTrue(all(d['confidence'] == 0.5 for d in detections))
+        self.assertEqual(self.engine.fuse(None, self.lidar, []), [])
+
+if __name__ == '__main__':
+    unittest.main()
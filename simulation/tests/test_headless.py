@@ -0,0 +1,77 @@
+import unittest
+import numpy as np
+from src.core.orchestrator import SimulationOrchestrator
+
+NODE = {
+    'nodeId': 'node-1',
+    'position': {'x': 0, 'y': 0, 'z': 5},
+    'orientation': {'pitch': 0, 'yaw': 0, 'roll': 0},
+    'sensors': {'lidar': {'enabled': True}}
+}
+
+def run(seed, **kwargs):
+    orch = SimulationOrchestrator({})
+    orch.add_node(NODE)
+    return orch, orch.run_headless(seed=seed, sport='BASKETBALL', **kwargs)
+
+class TestHeadless(unittest.TestCase):
+    def test_duration_advances_simulated_time(self):
+        orch, summary = run(1, duration=2.0, dt=0.05)
+        self.assertEqual(summary['frames'], 40)
+        self.assertAlmostEqual(summary['simTime'], 2.0)
+        times = [r['time'] for r in summary['results']]
+        np.testing.assert_allclose(np.diff(times), 0.05)
+        # No physics time is dropped even with large steps
+        self.assertEqual(orch.physics_engine.dropped_time, 0.0)
+        # Frames of this call, not the orchestrator's running total
+        self.assertEqual(orch.run_headless(frames=5, callback=lambda result: None)['frames'], 5)
+
+    def test_seeded_runs_are_reproducible(self):
+        _, a = run(7, frames=30)
+        _, b = run(7, frames=30)
+        for ra, rb in zip(a['results'], b['results']):
+            np.testing.assert_array_equal(ra['entities'].positions, rb['entities'].positions)
+            np.testing.assert_array_equal(ra['sensors'][0]['sensors']['lidar'], rb['sensors'][0]['sensors']['lidar'])
+        # Collected clouds are detached from the scan buffer pool
+        clouds = [r['sensors'][0]['sensors']['lidar'] for r in a['results'][:3]]
+        self.assertFalse(np.shares_memory(clouds[0], clouds[2]))
+        self.assertFalse(np.array_equal(clouds[0][:, 3], clouds[2][:, 3]))
+
+    def test_orchestrators_have_independent_rngs(self):
+        state = np.random.get_state()[1].copy()
+        a, b = SimulationOrchestrator({'seed': 5}), SimulationOrchestrator({'seed': 5})
+        for orch in (a, b):
+            orch.load_scenario('COMBAT', {})
+        # Interleaved, as sessions sharing a host process are
+        for i in range(20):
+            a.step((i + 1) / 30, 1 / 30)
+            a.rng.random()  # Extra draws on one must not shift the other
+            b.step((i + 1) / 30, 1 / 30)
+        np.testing.assert_array_equal(np.random.get_state()[1], state)
+        c = SimulationOrchestrator({'seed': 5})
+        c.load_scenario('COMBAT', {})
+        for i in range(20):
+            c.step((i + 1) / 30, 1 / 30)
+        np.testing.assert_array_equal(b.entities.positions, c.entities.positions)
+        self.assertFalse(np.array_equal(a.entities.positions, c.entities.positions))
+
+    def test_callback_streams_results(self):
+        seen, clouds = [], []
+        orch = SimulationOrchestrator({})
+        orch.add_node(NODE)
+        orch.lidar_frame_listeners.append(lambda node_id, cloud, timestamp: clouds.append((node_id, timestamp)))
+        summary = orch.run_headless(seed=2, sport='BASKETBALL', frames=5, callback=seen.append)
+        self.assertEqual(clouds, [('node-1', r['time']) for r in seen])
+        self.assertEqual([r['frame'] for r in seen], [1, 2, 3, 4, 5])
+        self.assertNotIn('results', summary)
+
+    def test_refuses_without_length_or_while_running(self):
+        orch = SimulationOrchestrator({})
+        with self.assertRaises(ValueError):
+            next(orch.iter_headless())
+        orch.running = True
+        with self.assertRaises(RuntimeError):
+            next(orch.iter_headless(frames=1))
+
+if __name__ == '__main__':
+    unittest.main()
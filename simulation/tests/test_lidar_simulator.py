@@ -0,0 +1,46 @@
+import unittest
+import numpy as np
+from src.nodes.lidar_simulator import LidarSimulator
+
+class TestLidarSimulator(unittest.TestCase):
+    def setUp(self):
+        self.entities = [
+            {'id': 'E1', 'position': {'x': 1.0, 'y': 2.0, 'z': 0.5}},
+            {'id': 'E2', 'position': {'x': -5.0, 'y': 3.0, 'z': 1.0}},
+        ]
+
+    def test_scan_shape_and_clusters(self):
+        lidar = LidarSimulator('VLP-16', 16, 100, seed=1)
+        cloud = lidar.scan(self.entities, 0.0)
+
+        self.assertEqual(cloud.dtype, np.float32)
+        self.assertEqual(cloud.shape, (10000 + 2 * 50, 4))
+        np.testing.assert_array_equal(cloud[:10000, 2], 0.0)
+        cluster = cloud[10000:10050, :3]
+        np.testing.assert_allclose(cluster.mean(axis=0), [1.0, 2.0, 0.5], atol=0.15)
+        self.assertTrue(((cloud[:, 3] >= 0) & (cloud[:, 3] < 1)).all())
+
+    def test_copies_are_independent_and_views_are_pooled(self):
+        lidar = LidarSimulator('VLP-16', 16, 100, pool_size=1, return_views=False, seed=1)
+        first = lidar.scan(self.entities, 0.0)
+        second = lidar.scan(self.entities, 0.1)
+        self.assertFalse(np.shares_memory(first, second))
+
+        pooled = LidarSimulator('VLP-16', 16, 100, pool_size=2)
+        a = pooled.scan(self.entities, 0.0)
+        pooled.scan(self.entities, 0.1)
+        c = pooled.scan(self.entities, 0.2)
+        self.assertTrue(np.shares_memory(a, c))
+
+    def test_growing_and_shrinking_entity_count(self):
+        lidar = LidarSimulator('VLP-16', 16, 100, pool_size=1, return_views=True)
+        self.assertEqual(len(lidar.scan(self.entities, 0.0)), 10100)
+        self.assertEqual(len(lidar.scan([], 0.1)), 10000)
+        many = self.entities * 10
+        cloud = lidar.scan(many, 0.2)
+        self.assertEqual(len(cloud), 10000 + 20 * 50)
+        # Ground rows survive buffer growth
+        np.testing.assert_array_equal(cloud[:10000, 2], 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from src.core.orchestrator import SimulationOrchestrator, STAGES
+from src.utils.metrics import MetricsRegistry, Timer
+
+class TestMetrics(unittest.TestCase):
+    def test_timer_quantiles_and_buckets(self):
+        timer = Timer(buckets=(0.01, 0.1), window=100)
+        for i in range(1, 101):
+            timer.observe(i / 1000.0)
+        self.assertEqual(timer.count, 100)
+        self.assertEqual(timer.bucket_counts, [10, 90, 0])
+        q = timer.quantiles()
+        self.assertAlmostEqual(q[0.5], 0.0505, places=4)
+        self.assertAlmostEqual(q[0.99], 0.09901, places=4)
+
+    def test_window_keeps_recent_samples(self):
+        timer = Timer(window=4)
+        for value in (1.0, 1.0, 1.0, 1.0, 0.1, 0.1, 0.1, 0.1):
+            timer.observe(value)
+        self.assertEqual(timer.quantiles()[0.99], 0.1)
+        self.assertEqual(timer.max, 1.0)
+
+    def test_prometheus_text(self):
+        registry = MetricsRegistry(buckets=(0.5,))
+        registry.timer('stage_seconds', 'Stage time', stage='physics').observe(0.25)
+        registry.counter('overruns_total', 'Overruns').inc(3)
+        text = registry.render_prometheus()
+        self.assertIn('# TYPE stage_seconds histogram', text)
+        self.assertIn('stage_seconds_bucket{stage="physics",le="0.5"} 1', text)
+        self.assertIn('stage_seconds_bucket{stage="physics",le="+Inf"} 1', text)
+        self.assertIn('stage_seconds_count{stage="physics"} 1', text)
+        self.assertIn('stage_seconds_quantile{stage="physics",quantile="0.95"} 0.25', text)
+        self.assertIn('overruns_total 3', text)
+        self.assertIs(registry.counter('overruns_total'), registry.counter('overruns_total'))
+
+    def test_orchestrator_records_stage_and_node_timings(self):
+        orch = SimulationOrchestrator({})
+        orch.add_node({
+            'nodeId': 'node-1',
+            'position': {'x': 0, 'y': 0, 'z': 5},
+            'orientation': {'pitch': 0, 'yaw': 0, 'roll': 0},
+            'sensors': {'camera': {'enabled': True, 'preset': '480p'}, 'lidar': {'enabled': True}}
+        })
+        orch.run_headless(frames=5, seed=0, sport='BASKETBALL', callback=lambda result: None)
+
+        stages = orch.metrics.summary()['simulation_stage_seconds']
+        for stage in ('scenario', 'physics', 'sensors', 'anomalies'):
+            self.assertEqual(stages[f'stage={stage}']['count'], 5)
+        self.assertTrue(set(stages) <= {f'stage={stage}' for stage in STAGES})
+        nodes = orch.metrics.summary()['simulation_node_sensor_seconds']
+        self.assertEqual(nodes['node=node-1,sensor=camera']['count'], 5)
+        self.assertEqual(nodes['node=node-1,sensor=lidar']['count'], 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import numpy as np
+from src.core.entity_store import EntityStore
+from src.core.physics_engine import PhysicsEngine
+
+
+class TestPhysicsEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = PhysicsEngine(fixed_dt=0.01)
+        self.store = EntityStore()
+        self.store.append({
+            'id': 'A',
+            'position': {'x': 0.0, 'y': 0.0, 'z': 0.05},
+            'velocity': {'x': 1.0, 'y': 0.0, 'z': -10.0}
+        })
+
+    def test_step_updates_store_in_place(self):
+        positions = self.store.positions
+        self.engine.step(self.store, 0.01)
+
+        damped = 1.0 - self.engine.friction_coeff * 0.01
+        self.assertAlmostEqual(positions[0, 0], damped * 0.01)
+        # Floor constraint clamps z and kills vertical velocity
+        self.assertEqual(positions[0, 2], 0.0)
+        self.assertEqual(self.store.velocities[0, 2], 0.0)
+
+    def test_step_accepts_entity_dicts(self):
+        entities = [{
+            'id': 'A',
+            'position': {'x': 0.0, 'y': 0.0, 'z': 0.0},
+            'velocity': {'x': 2.0, 'y': 0.0, 'z': 0.0}
+        }]
+        self.engine.step(entities, 0.5)
+        self.assertIsInstance(entities[0]['position'], dict)
+        self.assertGreater(entities[0]['position']['x'], 0.0)
+
+    def test_advance_runs_fixed_steps_and_keeps_remainder(self):
+        steps = self.engine.advance(self.store, 0.035)
+        self.assertEqual(steps, 3)
+        self.assertAlmostEqual(self.engine.accumulator, 0.005)
+
+    def test_advance_drops_time_beyond_step_budget(self):
+        self.engine.max_steps_per_frame = 2
+        steps = self.engine.advance(self.store, 0.055)
+        self.assertEqual(steps, 2)
+        self.assertLess(self.engine.accumulator, self.engine.fixed_dt)
+        self.assertAlmostEqual(self.engine.dropped_time, 0.03)
+
+    def test_substeps_match_smaller_fixed_steps(self):
+        reference = PhysicsEngine(fixed_dt=0.0025)
+        ref_store = EntityStore()
+        ref_store.append(self.store[0].to_dict())
+
+        self.engine.substeps = 4
+        self.engine.step(self.store, 0.01)
+        for _ in range(4):
+            reference.step(ref_store, 0.0025)
+
+        np.testing.assert_allclose(self.store.positions, ref_store.positions)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import asyncio
+import unittest
+import numpy as np
+from src.api.stream_hub import PointCloudHub
+from src.nodes.lidar_simulator import LidarSimulator
+from src.nodes.pointcloud import LOD_VOXELS, decode_cloud, encode_cloud, voxel_downsample
+
+def scan():
+    entities = [
+        {'id': f'P{i}', 'position': {'x': float(i), 'y': float(i % 5), 'z': 1.0}}
+        for i in range(20)
+    ]
+    return LidarSimulator('VLP-16', 16, 100, seed=0).scan(entities, 0.0)
+
+class TestPointCloudEncoding(unittest.TestCase):
+    def test_voxel_downsample_keeps_centroids(self):
+        points = np.array([
+            [0.01, 0.01, 0.01, 0.2],
+            [0.09, 0.05, 0.03, 0.4],
+            [1.05, 0.0, 0.0, 1.0]
+        ], dtype=np.float32)
+        out = voxel_downsample(points, 0.1)
+        np.testing.assert_allclose(out, [[0.05, 0.03, 0.02, 0.3], [1.05, 0.0, 0.0, 1.0]], atol=1e-6)
+        self.assertIs(voxel_downsample(points, None), points)
+
+    def test_round_trip_within_quantization(self):
+        points = scan()
+        for lod, voxel in LOD_VOXELS.items():
+            for codec in ('none', 'zlib'):
+                message = encode_cloud(points, seq=7, timestamp=1.5, voxel=voxel, codec=codec)
+                decoded = decode_cloud(message)
+                expected = voxel_downsample(points, voxel)
+                self.assertEqual((decoded['seq'], decoded['timestamp']), (7, 1.5))
+                self.assertEqual(len(decoded['points']), len(expected))
+                error = np.abs(decoded['points'][:, :3] - expected[:, :3]).max()
+                self.assertLessEqual(error, decoded['resolution'] * 0.51)
+                np.testing.assert_allclose(decoded['points'][:, 3], expected[:, 3], atol=1 / 255)
+
+        raw = points.nbytes
+        self.assertLess(len(encode_cloud(points, voxel=LOD_VOXELS['medium'], codec='zlib')), raw / 5)
+        self.assertLess(len(encode_cloud(points, voxel=LOD_VOXELS['low'], codec='zlib')),
+                        len(encode_cloud(points, voxel=LOD_VOXELS['high'], codec='zlib')))
+
+    def test_empty_cloud_and_bad_codec(self):
+        empty = decode_cloud(encode_cloud(np.empty((0, 4), dtype=np.float32), voxel=0.2))
+        self.assertEqual(empty['points'].shape, (0, 4))
+        with self.assertRaises(ValueError):
+            encode_cloud(scan(), codec='brotli')
+
+class TestPointCloudHub(unittest.TestCase):
+    def test_viewers_share_encodings_per_level(self):
+        async def scenario():
+            hub = PointCloudHub(asyncio.get_running_loop())
+            medium_a = hub.subscribe_clouds('n1', voxel=0.2, codec='zlib')
+            medium_b = hub.subscribe_clouds('n1', voxel=0.2, codec='zlib')
+            low = hub.subscribe_clouds('n1', voxel=0.5, codec='zlib')
+            pending = [asyncio.ensure_future(viewer.__anext__()) for viewer in (medium_a, medium_b, low)]
+            await asyncio.sleep(0)
+            hub.publish('n1', scan())
+            a, b, c = await asyncio.wait_for(asyncio.gather(*pending), 5)
+
+            self.assertIs(a, b)
+            self.assertLess(len(decode_cloud(c)['points']), len(decode_cloud(a)['points']))
+            self.assertEqual(decode_cloud(a)['seq'], 1)
+            for viewer in (medium_a, medium_b, low):
+                await viewer.aclose()
+            self.assertEqual(hub.get_stats()['n1']['viewers'], 0)
+
+        asyncio.run(scenario())
+
+    def test_rate_limit_skips_to_latest(self):
+        async def scenario():
+            hub = PointCloudHub(asyncio.get_running_loop())
+            viewer = hub.subscribe_clouds('n1', voxel=0.5, codec='zlib', rate=20)
+            first = asyncio.ensure_future(viewer.__anext__())
+            await asyncio.sleep(0)
+            hub.publish('n1', scan())
+            self.assertEqual(decode_cloud(await asyncio.wait_for(first, 1))['seq'], 1)
+            for _ in range(3):
+                hub.publish('n1', scan())
+            self.assertEqual(decode_cloud(await asyncio.wait_for(viewer.__anext__(), 1))['seq'], 4)
+            await viewer.aclose()
+
+        asyncio.run(scenario())
+
+    def test_only_watched_clouds_are_copied(self):
+        async def scenario():
+            hub = PointCloudHub(asyncio.get_running_loop())
+            pooled = scan()
+            hub.publish('n1', pooled)
+            self.assertIsNone(hub._channels['n1'].frame)
+
+            viewer = hub.subscribe_clouds('n1', voxel=None, codec='none')
+            pending = asyncio.ensure_future(viewer.__anext__())
+            await asyncio.sleep(0)
+            hub.publish('n1', pooled, 12.5)
+            expected = pooled.copy()
+            pooled[:] = 0  # The simulation reuses its buffer before the viewer encodes
+            decoded = decode_cloud(await asyncio.wait_for(pending, 5))
+            self.assertEqual((decoded['seq'], decoded['timestamp']), (2, 12.5))
+            np.testing.assert_allclose(decoded['points'][:, :3], expected[:, :3], atol=decoded['resolution'])
+            await viewer.aclose()
+
+        asyncio.run(scenario())
+
+    def test_tiny_voxels_do_not_overflow_keys(self):
+        points = np.array([[-1e6, -1e6, -1e6, 0.5], [1e6, 1e6, 1e6, 0.5], [1e6, 1e6, 1e6, 0.7]], dtype=np.float32)
+        out = voxel_downsample(points, 1e-3)
+        np.testing.assert_allclose(out, [[-1e6, -1e6, -1e6, 0.5], [1e6, 1e6, 1e6, 0.6]], rtol=1e-6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import numpy as np
+from src.nodes.edge_node import EdgeNode
+from src.nodes.lidar_simulator import LidarSimulator
+from src.nodes.preprocess import PointCloudFilter
+
+ENTITIES = [
+    {'id': f'P{i}', 'position': {'x': float(i - 10), 'y': float(i % 4) * 3 + 2, 'z': 0.0}}
+    for i in range(20)
+]
+
+def scan():
+    return LidarSimulator('VLP-16', 16, 100, seed=0).scan(ENTITIES, 0.0)
+
+def entities_with_points(points, radius=0.5):
+    centres = np.array([[e['position']['x'], e['position']['y']] for e in ENTITIES])
+    d2 = ((centres[:, None, :] - points[None, :, :2]) ** 2).sum(axis=2)
+    return int((d2.min(axis=1) < radius ** 2).sum())
+
+class TestPointCloudFilter(unittest.TestCase):
+    def test_ground_removal_keeps_clusters(self):
+        points = scan()
+        filtered = PointCloudFilter(ground='height').apply(points)
+        self.assertLess(len(filtered) * 10, len(points))
+        self.assertFalse(np.any(np.abs(filtered[:, 2]) <= 0.05))
+        self.assertEqual(entities_with_points(filtered), len(ENTITIES))
+
+        coarse = PointCloudFilter(ground='height', voxel=0.4).apply(points)
+        self.assertLess(len(coarse), len(filtered))
+        self.assertEqual(entities_with_points(coarse), len(ENTITIES))
+
+    def test_plane_fit_on_sloped_ground(self):
+        rng = np.random.default_rng(1)
+        xy = rng.uniform(-20, 20, size=(5000, 2))
+        ground = np.column_stack([xy, 0.05 * xy[:, 0] - 0.02 * xy[:, 1] + 1.0, rng.random(5000)])
+        objects = np.column_stack([rng.normal(0, 0.3, (300, 2)), rng.uniform(1.5, 3.0, 300), rng.random(300)])
+        points = np.concatenate([ground, objects]).astype(np.float32)
+
+        cloud_filter = PointCloudFilter(ground='plane', seed=0)
+        filtered = cloud_filter.apply(points)
+        np.testing.assert_allclose(cloud_filter.plane, (0.05, -0.02, 1.0), atol=1e-3)
+        self.assertEqual(len(filtered), 300)
+        # A fixed height would have kept the slope
+        self.assertGreater(len(PointCloudFilter(ground='height', ground_height=1.0).apply(points)), 4000)
+
+    def test_range_and_roi_crop(self):
+        points = np.array([[1, 0, 1, 0.5], [5, 0, 1, 0.5], [30, 0, 1, 0.5], [5, 9, 1, 0.5]], dtype=np.float32)
+        cropped = PointCloudFilter(ground=None, min_range=2, max_range=20, roi=(0, -5, 10, 5)).apply(points)
+        np.testing.assert_array_equal(cropped, points[[1]])
+        self.assertEqual(len(PointCloudFilter().apply(points[:0])), 0)
+        with self.assertRaises(ValueError):
+            PointCloudFilter(ground='ransac')
+
+    def test_edge_node_applies_filter_before_output(self):
+        def node(lidar_config):
+            return EdgeNode.from_config({
+                'nodeId': 'n1',
+                'position': {'x': 0, 'y': 0, 'z': 5},
+                'orientation': {'pitch': 0, 'yaw': 0, 'roll': 0},
+                'sensors': {'lidar': dict(lidar_config, enabled=True), 'imu': {'enabled': True}}
+            }, seed=3)
+
+        raw = node({}).generate_frame(ENTITIES, 0.0)
+        passthrough = node({'preprocess': {'ground': None}}).generate_frame(ENTITIES, 0.0)
+        # Adding a filter does not disturb the other sensors' seeded streams
+        np.testing.assert_array_equal(raw['sensors']['lidar'], passthrough['sensors']['lidar'])
+        self.assertEqual(raw['sensors']['imu'], passthrough['sensors']['imu'])
+
+        frame = node({'preprocess': {'ground': 'height', 'maxRange': 50}}).generate_frame(ENTITIES, 0.0)
+        self.assertIn('preprocess', frame['timings'])
+        self.assertLess(len(frame['sensors']['lidar']) * 10, len(raw['sensors']['lidar']))
+        self.assertIsNone(node({'preprocess': {'enabled': False}}).lidar_filter)
+
+if __name__ == '__main__':
+    unittest.main()
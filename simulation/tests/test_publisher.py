@@ -0,0 +1,108 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.core.entity_store import EntityStore
+from src.core.publisher import ApiPublisher
+
+
+class _RecordingHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        time.sleep(self.server.delay)
+        self.server.requests.append((self.path, json.loads(body)))
+        self.server.clients.add(self.client_address)
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+class TestApiPublisher(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _RecordingHandler)
+        self.server.requests = []
+        self.server.clients = set()
+        self.server.delay = 0.0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.publisher = ApiPublisher(api_url=f'http://127.0.0.1:{self.server.server_port}', session_id='S1')
+
+        self.store = EntityStore()
+        self.store.append({'id': 'E1', 'type': 'PERSON', 'position': {'x': 1.0, 'y': 2.0, 'z': 0.0}})
+
+    def tearDown(self):
+        self.publisher.stop()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _wait_for(self, predicate, timeout=2.0):
+        deadline = time.time() + timeout
+        while time.time() < deadline and not predicate():
+            time.sleep(0.01)
+        self.assertTrue(predicate())
+
+    def test_entity_snapshots_are_coalesced(self):
+        # Queue three snapshots before the worker starts: only the newest is sent
+        for frame in range(3):
+            self.store.positions[0, 0] = frame
+            self.publisher.publish_entities(self.store.snapshot(), {'frame': frame})
+        self.publisher.start()
+
+        self._wait_for(lambda: self.publisher.get_stats()['entity_updates_sent'] == 1)
+        path, payload = self.server.requests[0]
+        self.assertEqual(path, '/internal/entity-update')
+        self.assertEqual(payload['sessionId'], 'S1')
+        self.assertEqual(payload['stats']['frame'], 2)
+        self.assertEqual(payload['entities'][0]['position']['x'], 2.0)
+        self.assertEqual(self.publisher.get_stats()['entity_updates_coalesced'], 2)
+
+    def test_anomalies_batched_and_bounded(self):
+        self.publisher.max_queue = 5
+        self.publisher.publish_anomalies([{'anomalyId': f'A{i}'} for i in range(7)])
+        self.publisher.start()
+
+        self._wait_for(lambda: self.publisher.get_stats()['anomalies_sent'] == 5)
+        stats = self.publisher.get_stats()
+        self.assertEqual(stats['anomalies_dropped'], 2)
+        path, payload = self.server.requests[0]
+        self.assertEqual(path, '/internal/anomalies')
+        self.assertEqual(len(payload['anomalies']), 5)
+
+    def test_connection_is_reused(self):
+        self.publisher.start()
+        for frame in range(3):
+            self.publisher.publish_entities(self.store.snapshot(), {'frame': frame})
+            self._wait_for(lambda: self.publisher.get_stats()['entity_updates_sent'] == frame + 1)
+        self.assertEqual(len(self.server.clients), 1)
+
+    def test_stop_leaves_a_busy_worker_to_close_its_connection(self):
+        self.server.delay = 0.5
+        self.publisher.start()
+        self.publisher.publish_anomalies([{'anomalyId': 'A1'}])
+        self._wait_for(lambda: self.publisher._conn is not None)
+        worker = self.publisher._thread
+        self.publisher.publish_anomalies([{'anomalyId': 'A2'}])
+        self.publisher.stop(flush_timeout=0.05)
+        # The in-flight request is not cut short; the worker then exits without draining
+        self.assertIsNotNone(self.publisher._conn)
+        worker.join(timeout=2.0)
+        self.assertFalse(worker.is_alive())
+        self.assertIsNone(self.publisher._conn)
+        stats = self.publisher.get_stats()
+        self.assertEqual((stats['anomalies_sent'], stats['requests_failed']), (1, 0))
+
+        # Restarting sends what was left
+        self.server.delay = 0.0
+        self.publisher.start()
+        self._wait_for(lambda: self.publisher.get_stats()['anomalies_sent'] == 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
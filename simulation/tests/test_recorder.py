@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.core.orchestrator import SimulationOrchestrator
+from src.core.recorder import ReplayEngine, SessionRecorder, SessionRecording, resolve_recording_path
+
+NODE = {
+    'nodeId': 'node-1',
+    'position': {'x': 0, 'y': 0, 'z': 5},
+    'orientation': {'pitch': 0, 'yaw': 0, 'roll': 0},
+    'sensors': {'lidar': {'enabled': True}}
+}
+
+def summarize(anomalies):
+    return [(a['subtype'], tuple(a['entityIds'])) for a in anomalies]
+
+class TestRecorder(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'session')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def record_run(self, frames=60):
+        orch = SimulationOrchestrator({})
+        orch.add_node(NODE)
+        orch.start_recording(self.path, record_lidar=True)
+        summary = orch.run_headless(frames=frames, seed=4, sport='BASKETBALL')
+        orch.stop_recording()
+        return summary['results']
+
+    def test_round_trip_and_seek(self):
+        results = self.record_run()
+        recording = SessionRecording(self.path)
+        self.assertEqual(len(recording), len(results))
+
+        for index in (0, 17, len(results) - 1):
+            frame = recording.frame(index)
+            expected = results[index]
+            self.assertEqual(frame.frame, expected['frame'])
+            self.assertEqual(frame.time, expected['time'])
+            self.assertEqual(frame.ids, list(expected['entities'].ids))
+            np.testing.assert_array_equal(frame.positions, expected['entities'].positions)
+            np.testing.assert_array_equal(frame.velocities, expected['entities'].velocities)
+            np.testing.assert_array_equal(frame.lidar['node-1'], expected['sensors'][0]['sensors']['lidar'])
+            self.assertEqual(summarize(frame.anomalies), summarize(expected['anomalies']))
+
+        self.assertEqual(recording.seek(results[30]['time']), 30)
+        self.assertEqual(recording.seek(results[30]['time'] - 1e-6), 30)
+
+    def test_replay_reproduces_detections(self):
+        results = self.record_run()
+        replay_orch = SimulationOrchestrator({})
+        replay_orch.load_scenario('BASKETBALL', {})
+        engine = ReplayEngine(replay_orch, SessionRecording(self.path))
+
+        replayed = []
+        self.assertEqual(engine.run(speed=None, callback=replayed.append), len(results))
+        for original, again in zip(results, replayed):
+            self.assertEqual(again['time'], original['time'])
+            np.testing.assert_array_equal(replay_orch.entities.positions.shape, original['entities'].positions.shape)
+            self.assertEqual(summarize(again['anomalies']), summarize(original['anomalies']))
+
+        engine.seek(timestamp=results[50]['time'])
+        result = engine.step()
+        self.assertEqual(result['time'], results[50]['time'])
+        np.testing.assert_array_equal(replay_orch.entities.positions, results[50]['entities'].positions)
+
+    def test_refuses_to_overwrite_and_ignores_partial_frames(self):
+        self.record_run(frames=5)
+        with self.assertRaises(FileExistsError):
+            SessionRecorder(self.path)
+        with open(os.path.join(self.path, 'index.bin'), 'ab') as handle:
+            handle.write(b'\x00' * 7)  # Torn write
+        self.assertEqual(len(SessionRecording(self.path)), 5)
+
+    def test_client_paths_stay_under_the_recordings_root(self):
+        root = os.path.realpath(self.tmp.name)
+        self.assertEqual(resolve_recording_path('games/final', root), os.path.join(root, 'games', 'final'))
+        for bad in ('', '/etc/cron.d', '../outside', 'a/../../b', '.'):
+            with self.assertRaises(ValueError):
+                resolve_recording_path(bad, root)
+        os.symlink('/tmp', os.path.join(root, 'escape'))
+        with self.assertRaises(ValueError):
+            resolve_recording_path('escape/x', root)
+
+    def test_mapped_columns_are_trimmed_on_close(self):
+        self.record_run(frames=5)
+        recording = SessionRecording(self.path)
+        rows = int(recording.index['row'][-1] + recording.index['count'][-1])
+        self.assertEqual(os.path.getsize(os.path.join(self.path, 'positions.f64')), rows * 24)
+
+if __name__ == '__main__':
+    unittest.main()
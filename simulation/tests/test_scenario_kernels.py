@@ -0,0 +1,124 @@
+import copy
+import unittest
+import numpy as np
+from src.core.entity_store import EntityStore
+from src.core.scenario_manager import ScenarioManager
+from src.sports.basketball import BasketballScenario
+from src.sports.combat import CombatScenario
+from src.sports.kernels import RowIndex
+from src.sports.soccer import SoccerScenario
+
+def reference_basketball(scenario, entities, dt):
+    # Per-entity update as it was before the batched kernels
+    ball = next(e for e in entities if e['id'] == 'BALL')
+    for e in entities:
+        dx = ball['position']['x'] - e['position']['x']
+        dy = ball['position']['y'] - e['position']['y']
+        dist = np.sqrt(dx**2 + dy**2)
+        if e.get('behavior') == 'basketball_player':
+            if dist > 0.5:
+                e['velocity']['x'] = (dx / dist) * 3.0
+                e['velocity']['y'] = (dy / dist) * 3.0
+            else:
+                e['velocity']['x'] *= 0.5
+                e['velocity']['y'] *= 0.5
+        elif e.get('behavior') == 'referee' and dist > 3.0:
+            e['velocity']['x'] = (dx / dist) * 2.0
+            e['velocity']['y'] = (dy / dist) * 2.0
+    ball['velocity']['z'] -= 9.81 * dt
+    if ball['position']['z'] <= 0.12:
+        ball['position']['z'] = 0.12
+        ball['velocity']['z'] = -ball['velocity']['z'] * 0.7
+
+def reference_soccer(scenario, entities, dt):
+    ball = next(e for e in entities if e['id'] == 'BALL')
+    for p in entities:
+        if p.get('role') != 'PLAYER':
+            continue
+        dx_ball = ball['position']['x'] - p['position']['x']
+        dy_ball = ball['position']['y'] - p['position']['y']
+        dist_ball = np.sqrt(dx_ball**2 + dy_ball**2)
+        form = scenario._get_formation_position(p['team'], int(p['id'].split('_')[1]) - 1)
+        dx_form = form[0] - p['position']['x']
+        dy_form = form[1] - p['position']['y']
+        dist_form = np.sqrt(dx_form**2 + dy_form**2)
+        if dist_ball < 15.0:
+            tdx, tdy, tdist, speed = dx_ball, dy_ball, dist_ball, 5.0
+        else:
+            tdx, tdy, tdist, speed = dx_form, dy_form, dist_form, 2.0
+        if tdist > 0.5:
+            p['velocity']['x'] = (tdx / tdist) * speed
+            p['velocity']['y'] = (tdy / tdist) * speed
+        else:
+            p['velocity']['x'] = 0
+            p['velocity']['y'] = 0
+
+def integrate(entities, dt):
+    for e in entities:
+        for axis in 'xyz':
+            e['position'][axis] += e['velocity'][axis] * dt
+
+class TestScenarioKernels(unittest.TestCase):
+    def _compare(self, scenario, reference, frames=60):
+        np.random.seed(3)
+        entities = []
+        scenario.initialize(entities)
+        # Scatter so some players start near the ball and some far away
+        for e in entities:
+            e['position']['x'] += np.random.uniform(-20, 20)
+            e['position']['y'] += np.random.uniform(-10, 10)
+        expected = copy.deepcopy(entities)
+        store = EntityStore()
+        store.extend(copy.deepcopy(entities))
+
+        dt = 1.0 / 30.0
+        for _ in range(frames):
+            reference(scenario, expected, dt)
+            integrate(expected, dt)
+            scenario.update(store, dt)
+            store.positions[:] += store.velocities * dt
+        np.testing.assert_allclose(store.positions, [[e['position'][a] for a in 'xyz'] for e in expected], atol=1e-9)
+        np.testing.assert_allclose(store.velocities, [[e['velocity'][a] for a in 'xyz'] for e in expected], atol=1e-9)
+
+    def test_basketball_matches_per_entity_update(self):
+        self._compare(BasketballScenario({'crowdCount': 800}), reference_basketball)
+
+    def test_soccer_matches_per_entity_update(self):
+        self._compare(SoccerScenario({}), reference_soccer)
+
+    def test_list_of_dicts_still_supported(self):
+        scenario = SoccerScenario({})
+        entities = []
+        scenario.initialize(entities)
+        entities[-1]['position']['x'] = 12.0  # Ball near the home keeper
+        scenario.update(entities, 1.0 / 30.0)
+        keeper = entities[0]
+        self.assertAlmostEqual(np.hypot(keeper['velocity']['x'], keeper['velocity']['y']), 5.0)
+
+    def test_combat_stays_in_ring(self):
+        scenario = CombatScenario({}, rng=np.random.default_rng(0))
+        store = EntityStore()
+        scenario.initialize(store)
+        for _ in range(300):
+            scenario.update(store, 1.0 / 30.0)
+            store.positions[:] += store.velocities / 30.0
+        fighters = store.positions[store.mask(role='FIGHTER')]
+        self.assertTrue(np.all((fighters[:, :2] >= -1) & (fighters[:, :2] <= scenario.ring_size + 1)))
+
+    def test_row_index_refreshes_only_on_row_changes(self):
+        store = EntityStore()
+        BasketballScenario({'crowdCount': 0}).initialize(store)
+        index = RowIndex({'players': {'role': 'PLAYER'}}, named=('BALL',))
+        self.assertTrue(index.refresh(store))
+        self.assertFalse(index.refresh(store))
+        store.remove('HOME_PLAYER_1')
+        self.assertTrue(index.refresh(store))
+        self.assertEqual(len(index.rows['players']), 9)
+        self.assertEqual(store.ids[index.ids['BALL']], 'BALL')
+
+    def test_manager_creates_every_sport(self):
+        for sport in ('BASKETBALL', 'SOCCER', 'COMBAT'):
+            self.assertEqual(ScenarioManager.create_scenario(sport, {}).sport, sport)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import time
+import unittest
+from src.core.orchestrator import SimulationOrchestrator
+from src.core.scheduler import FrameScheduler
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+class TestFrameScheduler(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = FrameScheduler(10, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_absolute_deadlines_do_not_drift(self):
+        start = self.clock.now
+        for busy in (0.03, 0.07, 0.01, 0.05):
+            self.scheduler.begin_frame()
+            self.clock.now += busy
+            self.scheduler.wait()
+        self.assertAlmostEqual(self.clock.now, start + 0.4)
+
+    def test_overrun_skips_missed_frames(self):
+        self.scheduler.begin_frame()
+        self.clock.now += 0.35
+        self.assertEqual(self.scheduler.wait(), 0.0)
+        self.assertEqual(self.scheduler.skipped_frames, 2)
+        # Back on the original grid
+        self.scheduler.begin_frame()
+        self.scheduler.wait()
+        self.assertAlmostEqual(self.clock.now, 100.4)
+
+    def test_target_fps_change_mid_frame(self):
+        self.scheduler.begin_frame()
+        self.clock.now += 0.01
+        self.scheduler.set_target_fps(20)
+        self.scheduler.wait()
+        self.assertAlmostEqual(self.clock.now, 100.05)
+
+    def test_stage_rate_change_mid_frame(self):
+        self.scheduler.begin_frame()
+        self.assertTrue(self.scheduler.should_run('anomalies'))
+        # A live config change lands between should_run and ran
+        self.scheduler.set_rate('anomalies', 2.0)
+        self.clock.now += 0.01
+        self.scheduler.ran('anomalies', 0.01)
+        self.assertFalse(self.scheduler.should_run('anomalies'))
+        self.clock.now += 0.25
+        self.scheduler.begin_frame()
+        self.assertFalse(self.scheduler.should_run('anomalies'))
+        self.clock.now += 0.3
+        self.scheduler.begin_frame()
+        self.assertTrue(self.scheduler.should_run('anomalies'))
+
+    def test_stage_rates(self):
+        runs = 0
+        for _ in range(20):
+            now = self.scheduler.begin_frame()
+            if self.scheduler.should_run('anomalies', now):
+                self.scheduler.ran('anomalies', 0.0, now)
+                runs += 1
+            self.scheduler.wait()
+        self.assertEqual(runs, 10)  # 5 Hz over 2 s at 10 FPS
+
+        self.scheduler.set_rate('anomalies', 10)
+        runs = 0
+        for _ in range(10):
+            now = self.scheduler.begin_frame()
+            if self.scheduler.should_run('anomalies', now):
+                self.scheduler.ran('anomalies', 0.0, now)
+                runs += 1
+            self.scheduler.wait()
+        self.assertEqual(runs, 10)
+
+    def test_expensive_optional_stage_is_deferred_but_not_starved(self):
+        self.scheduler.add_stage('sensors:a', 10)
+        self.scheduler.add_stage('sensors:a', 10).cost = 0.5
+        self.scheduler.stages['sensors:a'].runs = 1
+        decisions = []
+        for _ in range(4):
+            now = self.scheduler.begin_frame()
+            run = self.scheduler.should_run('sensors:a', now)
+            decisions.append(run)
+            if run:
+                self.scheduler.ran('sensors:a', 0.5, now)
+            self.scheduler.wait()
+        self.assertEqual(decisions, [False, False, False, True])
+        self.assertEqual(self.scheduler.stages['sensors:a'].deferred, 3)
+
+class TestOrchestratorScheduling(unittest.TestCase):
+    def test_live_rate_changes(self):
+        orch = SimulationOrchestrator({'targetFps': 20, 'rates': {'anomalies': 2}})
+        orch.load_scenario('BASKETBALL', {})
+        orch.add_node({
+            'nodeId': 'node-1',
+            'position': {'x': 0, 'y': 0, 'z': 5},
+            'orientation': {'pitch': 0, 'yaw': 0, 'roll': 0},
+            'sensors': {'lidar': {'enabled': True}}
+        })
+        self.assertEqual(orch.get_stage_rates()['sensors:node-1'], 10.0)
+        orch.start()
+        try:
+            time.sleep(0.5)
+            orch.target_fps = 50
+            orch.set_stage_rate('physics', 120)
+            frames = orch.scheduler.frames
+            time.sleep(0.5)
+            self.assertGreater(orch.scheduler.frames - frames, 15)
+        finally:
+            orch.stop()
+        stats = orch.scheduler.get_stats()['stages']
+        self.assertLessEqual(stats['anomalies']['runs'], 4)
+        self.assertLessEqual(stats['sensors:node-1']['runs'], 12)
+        self.assertAlmostEqual(orch.physics_engine.fixed_dt, 1 / 120)
+        with self.assertRaises(KeyError):
+            orch.set_stage_rate('nope', 1)
+
+    def test_sensor_pool_runs_only_due_nodes(self):
+        orch = SimulationOrchestrator({'sensorWorkers': 1, 'seed': 1})
+        orch.load_scenario('COMBAT', {})
+        for index in range(2):
+            orch.add_node({
+                'nodeId': f'node-{index}',
+                'position': {'x': 0, 'y': 0, 'z': 5},
+                'orientation': {'pitch': 0, 'yaw': 0, 'roll': 0},
+                'sensors': {'lidar': {'enabled': True}}
+            })
+        orch._start_sensor_pool()
+        try:
+            result = orch.process_frame(1.0, sensor_nodes=[1], detect=False)
+            self.assertEqual([frame['nodeId'] for frame in result['sensors']], ['node-1'])
+            self.assertEqual(orch.process_frame(1.1, sensor_nodes=[], detect=False)['sensors'], [])
+        finally:
+            orch.sensor_pool.close()
+            orch.sensor_pool = None
+
+if __name__ == '__main__':
+    unittest.main()
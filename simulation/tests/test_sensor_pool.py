@@ -0,0 +1,97 @@
+import unittest
+from unittest import mock
+import numpy as np
+from multiprocessing import resource_tracker
+from src.core.entity_store import EntityStore
+from src.core.sensor_pool import SensorPool, node_seed
+from src.nodes.edge_node import EdgeNode
+
+def make_node_config(index):
+    return {
+        'nodeId': f'node-{index}',
+        'position': {'x': 0, 'y': 0, 'z': 5},
+        'orientation': {'pitch': 0, 'yaw': 0, 'roll': 0},
+        'sensors': {
+            'camera': {'enabled': True, 'preset': '480p'},
+            'lidar': {'enabled': True},
+            'imu': {'enabled': True}
+        }
+    }
+
+class TestSensorPool(unittest.TestCase):
+    def setUp(self):
+        self.configs = [make_node_config(i) for i in range(3)]
+        self.pool = SensorPool(workers=2, seed=7).start()
+        for config in self.configs:
+            self.pool.add_node(config)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def make_store(self, count):
+        store = EntityStore()
+        rng = np.random.default_rng(count)
+        for i, (x, y) in enumerate(rng.uniform(-5, 5, size=(count, 2))):
+            store.append({'id': f'E{i}', 'position': {'x': x, 'y': y, 'z': 0.0}, 'velocity': {'x': 1.0}})
+        return store
+
+    def test_matches_serial_nodes_in_order(self):
+        serial = [EdgeNode.from_config(c, seed=node_seed(7, i)) for i, c in enumerate(self.configs)]
+        store = self.make_store(20)
+
+        for step in range(3):
+            store.positions[:, 0] += 0.1
+            timestamp = 10.0 + step / 30.0 * 1.01
+            frames = self.pool.generate(store, timestamp)
+            expected = [node.generate_frame(store, timestamp) for node in serial]
+
+            self.assertEqual([f['nodeId'] for f in frames], [c['nodeId'] for c in self.configs])
+            for frame, reference in zip(frames, expected):
+                self.assertEqual(frame['timestamp'], timestamp)
+                self.assertEqual(frame['sensors']['camera'], reference['sensors']['camera'])
+                np.testing.assert_array_equal(frame['sensors']['lidar'], reference['sensors']['lidar'])
+                self.assertEqual(frame['sensors']['imu'], reference['sensors']['imu'])
+
+    def test_entity_table_changes_and_growth(self):
+        store = self.make_store(5)
+        frames = self.pool.generate(store, 20.0)
+        self.assertEqual(len(frames[0]['sensors']['lidar']), 10000 + 5 * 50)
+
+        # Growing past the shared buffers re-creates them
+        big = self.make_store(2000)
+        frames = self.pool.generate(big, 21.0)
+        self.assertEqual(len(frames[2]['sensors']['lidar']), 10000 + 2000 * 50)
+
+        big.remove('E0')
+        frames = self.pool.generate(big, 22.0)
+        self.assertEqual(len(frames[1]['sensors']['lidar']), 10000 + 1999 * 50)
+
+    def test_only_due_nodes_run(self):
+        serial = [EdgeNode.from_config(c, seed=node_seed(7, i)) for i, c in enumerate(self.configs)]
+        store = self.make_store(20)
+        # Node 1 alone (worker 1); worker 0 misses a table change and must catch up
+        for due, change in (([1], False), ([1], True), ([2, 0], False), ([0, 1, 2], True)):
+            if change:
+                store.remove(store.ids[0])
+            frames = self.pool.generate(store, 30.0, node_indices=due)
+            self.assertEqual([f['nodeId'] for f in frames], [self.configs[i]['nodeId'] for i in sorted(due)])
+            for frame, index in zip(frames, sorted(due)):
+                reference = serial[index].generate_frame(store, 30.0)
+                np.testing.assert_array_equal(frame['sensors']['lidar'], reference['sensors']['lidar'])
+        self.assertEqual(self.pool.generate(store, 31.0, node_indices=[]), [])
+
+    def test_attachments_are_not_tracked_by_the_parent(self):
+        registered = []
+        register = resource_tracker.register
+        with mock.patch.object(resource_tracker, 'register',
+                               side_effect=lambda name, rtype: (registered.append(name), register(name, rtype))):
+            frames = self.pool.generate(self.make_store(20), 0.0)
+        self.assertEqual(len(frames), 3)
+        # Only the state block the parent owns; the workers' output blocks stay theirs
+        attached = {attached.shm._name for attached in self.pool._attached.values()}
+        self.assertTrue(attached)
+        self.assertFalse(attached & set(registered))
+        self.assertIn(self.pool._state.shm._name, registered)
+
+if __name__ == '__main__':
+    unittest.main()
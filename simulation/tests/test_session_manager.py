@@ -0,0 +1,138 @@
+import threading
+import time
+import unittest
+from src.core.session_manager import SessionManager, SessionNotFound, SessionLimitExceeded
+
+def node(node_id, camera=False):
+    sensors = {'lidar': {'enabled': True}}
+    if camera:
+        sensors['camera'] = {'enabled': True, 'preset': '480p', 'fps': 10}
+    return {
+        'nodeId': node_id,
+        'position': {'x': 0, 'y': 0, 'z': 5},
+        'orientation': {'pitch': 0, 'yaw': 0, 'roll': 0},
+        'sensors': sensors
+    }
+
+def wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+class TestLocalSessions(unittest.TestCase):
+    def setUp(self):
+        self.manager = SessionManager(max_sessions=2, limits={'maxNodes': 2})
+
+    def tearDown(self):
+        self.manager.close()
+
+    def test_sessions_are_independent(self):
+        self.manager.create({'sport': 'BASKETBALL', 'nodes': [node('a')]}, 'hoops')
+        self.manager.create({'sport': 'SOCCER', 'nodes': [node('b')]}, 'pitch')
+        self.assertEqual(self.manager.list(), ['hoops', 'pitch'])
+
+        self.manager.start('hoops')
+        self.assertTrue(wait_for(lambda: self.manager.status('hoops')['frame'] > 3))
+        hoops, pitch = self.manager.status('hoops'), self.manager.status('pitch')
+        self.assertTrue(hoops['running'])
+        self.assertFalse(pitch['running'])
+        self.assertEqual(pitch['frame'], 0)
+        self.assertEqual((hoops['active_scenario'], pitch['active_scenario']), ('BASKETBALL', 'SOCCER'))
+        self.assertEqual((hoops['nodes'], pitch['nodes']), (['a'], ['b']))
+        self.assertIn('simulation_frames_total', self.manager.metrics('hoops'))
+
+        self.manager.update('hoops', {'targetFps': 20})
+        self.assertEqual(self.manager.status('hoops')['target_fps'], 20)
+        self.manager.delete('hoops')
+        with self.assertRaises(SessionNotFound):
+            self.manager.status('hoops')
+
+    def test_limits(self):
+        with self.assertRaises(SessionLimitExceeded):
+            self.manager.create({'nodes': [node('a'), node('b'), node('c')]})
+        # A session can tighten the limits but not loosen them
+        with self.assertRaises(SessionLimitExceeded):
+            self.manager.create({'nodes': [node('a')], 'limits': {'maxNodes': 0}})
+        with self.assertRaises(SessionLimitExceeded):
+            self.manager.create({'config': {'targetFps': 120}, 'limits': {'maxFps': 240}})
+        self.assertEqual(self.manager.list(), [])
+
+        self.manager.create({}, 'one')
+        with self.assertRaises(ValueError):
+            self.manager.create({}, 'one')
+        self.manager.create({}, 'two')
+        with self.assertRaises(SessionLimitExceeded):
+            self.manager.create({}, 'three')
+        with self.assertRaises(SessionLimitExceeded):
+            self.manager.update('one', {'targetFps': 61})
+        with self.assertRaises(SessionLimitExceeded):
+            self.manager.update('one', {'rates': {'anomalies': 1e6}})
+        with self.assertRaises(ValueError):
+            self.manager.update('one', {'rates': {'anomalies': 0}})
+        with self.assertRaises(ValueError):
+            self.manager.update('one', {'anomalyRate': 4})
+
+    def test_session_config_is_checked_before_building(self):
+        with self.assertRaises(ValueError):
+            self.manager.create({'config': {'apiUrl': 'http://elsewhere'}})
+        with self.assertRaises(ValueError):
+            self.manager.create({'config': {'record': {'path': '/etc/cron.d'}}})
+        for config in ({'sensorWorkers': 64}, {'shardWorkers': 64}, {'rates': {'physics': 1e5}},
+                       {'physics': {'substeps': 1000}}):
+            with self.assertRaises(SessionLimitExceeded):
+                self.manager.create({'config': config})
+        with self.assertRaises(SessionLimitExceeded):
+            self.manager.create({'nodes': [dict(node('a'), rate=1e4)]})
+        # Refused from the spec alone rather than after allocating the crowd
+        started = time.perf_counter()
+        with self.assertRaises(SessionLimitExceeded):
+            self.manager.create({'scenario': {'crowdMode': 'agents', 'crowdCount': 10 ** 8}})
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertEqual(self.manager.list(), [])
+
+    def test_frames_forwarded_only_while_watched(self):
+        frames = []
+        manager = SessionManager(on_frame=lambda session_id, node_id, frame: frames.append((session_id, node_id)))
+        try:
+            manager.create({'nodes': [node('cam', camera=True)]}, 's1')
+            manager.start('s1')
+            self.assertTrue(wait_for(lambda: manager.status('s1')['frame'] > 2))
+            self.assertEqual(frames, [])
+            manager.watch('s1', 'cam')
+            manager.watch('s1', 'cam')
+            self.assertTrue(wait_for(lambda: frames))
+            self.assertEqual(frames[0], ('s1', 'cam'))
+            manager.watch('s1', 'cam', False)
+            count = len(frames)
+            self.assertTrue(wait_for(lambda: len(frames) > count))  # Still one viewer
+            manager.watch('s1', 'cam', False)
+        finally:
+            manager.close()
+
+class TestProcessSessions(unittest.TestCase):
+    def test_worker_process_hosts_sessions(self):
+        received = threading.Event()
+        manager = SessionManager(
+            workers=1, on_frame=lambda session_id, node_id, frame: received.set()
+        )
+        try:
+            status = manager.create({'nodes': [node('cam', camera=True)]}, 'remote')
+            self.assertEqual(status['sessionId'], 'remote')
+            self.assertEqual(status['nodes'], ['cam'])
+            with self.assertRaises(SessionNotFound):
+                manager.hosts[0].call('status', 'missing')
+
+            manager.start('remote')
+            manager.watch('remote', 'cam')
+            self.assertTrue(received.wait(20))
+            self.assertTrue(manager.status('remote')['running'])
+            manager.delete('remote')
+            self.assertEqual(manager.list(), [])
+        finally:
+            manager.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import numpy as np
+from src.core.orchestrator import SimulationOrchestrator
+from src.core.shard_pool import ShardPool
+from src.sports.crowd import social_repulsion
+
+PARAMS = {'radius': 0.25, 'strength': 2.1, 'range_b': 0.3, 'cutoff': 1.0}
+
+class TestShardPool(unittest.TestCase):
+    def test_sharded_forces_match_single_process(self):
+        rng = np.random.default_rng(3)
+        # Dense clusters straddling the strip boundaries plus a sparse background
+        pos = np.concatenate([
+            rng.uniform((0, 0), (60, 40), size=(3000, 2)),
+            rng.normal((20, 20), 1.5, size=(1500, 2)),
+            rng.normal((40, 10), 1.0, size=(1500, 2))
+        ])
+        pool = ShardPool(workers=3, min_agents=0).start()
+        try:
+            force = pool.repulsion(pos, **PARAMS)
+            np.testing.assert_allclose(force, social_repulsion(pos, **PARAMS), rtol=1e-9, atol=1e-9)
+            split = pool.get_stats()['shards']
+            self.assertEqual([s['owned'] for s in split], [2000, 2000, 2000])
+            self.assertTrue(all(s['halo'] > 0 for s in split))
+            # Growing the crowd re-creates the shared block
+            bigger = np.concatenate([pos, pos[:3000] + 0.1])
+            np.testing.assert_allclose(pool.repulsion(bigger, **PARAMS),
+                                       social_repulsion(bigger, **PARAMS), rtol=1e-9, atol=1e-9)
+        finally:
+            pool.close()
+
+    def test_tall_crowds_are_cut_along_y(self):
+        pos = np.random.default_rng(5).uniform((0, 0), (8, 80), size=(4000, 2))
+        pool = ShardPool(workers=2, min_agents=0).start()
+        try:
+            np.testing.assert_allclose(pool.repulsion(pos, **PARAMS), social_repulsion(pos, **PARAMS),
+                                       rtol=1e-9, atol=1e-9)
+            stats = pool.get_stats()
+            self.assertEqual(stats['axis'], 'y')
+            # A cut across the 8 m side has a halo of a few hundred agents, not half the crowd
+            self.assertTrue(all(s['halo'] < 200 for s in stats['shards']))
+        finally:
+            pool.close()
+
+    def test_small_crowds_stay_in_process(self):
+        pool = ShardPool(workers=2, min_agents=100)
+        pos = np.random.default_rng(0).uniform(0, 5, size=(50, 2))
+        np.testing.assert_array_equal(pool.repulsion(pos, **PARAMS), social_repulsion(pos, **PARAMS))
+        self.assertFalse(pool.running)
+
+    def test_orchestrator_with_shards_matches_serial(self):
+        scenario = {'crowdMode': 'agents', 'crowdCount': 3000, 'crowdFlow': 'egress',
+                    'crowdFlowDuration': 0.0, 'crowdSeed': 1}
+
+        def run(config):
+            orch = SimulationOrchestrator(config)
+            orch.run_headless(frames=10, dt=0.05, seed=2, sport='BASKETBALL',
+                              scenario_config=scenario, callback=lambda result: None)
+            return orch
+
+        serial = run({})
+        sharded = run({'shardWorkers': 2, 'shardMinAgents': 0})
+        self.assertIsNone(sharded.shard_pool)
+        self.assertIsNone(sharded.scenario.shards)
+        self.assertEqual(serial.entities.ids, sharded.entities.ids)
+        np.testing.assert_allclose(serial.entities.positions, sharded.entities.positions, atol=1e-9)
+
+if __name__ == '__main__':
+    unittest.main()
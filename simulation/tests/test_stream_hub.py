@@ -0,0 +1,61 @@
+import asyncio
+import threading
+import unittest
+from src.api.stream_hub import StreamHub
+
+class TestStreamHub(unittest.TestCase):
+    def test_viewers_share_chunks_and_wake_on_publish(self):
+        async def scenario():
+            hub = StreamHub(asyncio.get_running_loop())
+            a, b = hub.subscribe('n1'), hub.subscribe('n1')
+            first_a = asyncio.ensure_future(a.__anext__())
+            first_b = asyncio.ensure_future(b.__anext__())
+            await asyncio.sleep(0)
+
+            # Published from another thread, as the simulation loop does
+            thread = threading.Thread(target=hub.publish, args=('n1', b'jpeg-1'))
+            thread.start()
+            thread.join()
+            chunk_a, chunk_b = await asyncio.wait_for(asyncio.gather(first_a, first_b), 1)
+
+            self.assertIs(chunk_a, chunk_b)
+            self.assertIn(b'jpeg-1', chunk_a)
+            self.assertTrue(chunk_a.startswith(b'--frame\r\n'))
+            self.assertEqual(hub.get_stats()['n1']['viewers'], 2)
+
+            await a.aclose()
+            await b.aclose()
+            self.assertEqual(hub.get_stats()['n1']['viewers'], 0)
+
+        asyncio.run(scenario())
+
+    def test_slow_viewer_gets_latest_frame_only(self):
+        async def scenario():
+            hub = StreamHub(asyncio.get_running_loop())
+            viewer = hub.subscribe('n1')
+            hub.publish('n1', b'jpeg-1')
+            self.assertIn(b'jpeg-1', await viewer.__anext__())
+
+            for i in range(2, 6):
+                hub.publish('n1', f'jpeg-{i}'.encode())
+            self.assertIn(b'jpeg-5', await viewer.__anext__())
+            self.assertEqual(hub.get_stats()['n1']['framesDropped'], 3)
+
+            hub.close()
+            with self.assertRaises(StopAsyncIteration):
+                await asyncio.wait_for(viewer.__anext__(), 1)
+
+        asyncio.run(scenario())
+
+    def test_publish_without_viewers_does_not_touch_the_loop(self):
+        class NoLoop:
+            def call_soon_threadsafe(self, *args):
+                raise AssertionError("loop should not be woken without viewers")
+
+        hub = StreamHub(NoLoop())
+        hub.publish('n1', b'jpeg-1')
+        hub.publish('n1', b'jpeg-2')
+        self.assertEqual(hub.get_stats()['n1'], {'seq': 2, 'viewers': 0, 'framesSent': 0, 'framesDropped': 0})
+
+if __name__ == '__main__':
+    unittest.main()
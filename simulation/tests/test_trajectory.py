@@ -0,0 +1,45 @@
+import unittest
+import numpy as np
+from src.anomalies.trajectory import TrajectoryHistory
+
+
+class TestTrajectoryHistory(unittest.TestCase):
+    def test_window_extents_and_duration(self):
+        history = TrajectoryHistory(window=10.0, bucket_dt=1.0)
+        for step in range(60):
+            t = step * 0.25
+            x_range, y_range, duration, samples = history.update(
+                ['A', 'B'], np.array([[0.1 * step, 0.0], [1.0, 1.0 + 0.01 * (step % 2)]]), t
+            )
+
+        # A keeps moving: range covers roughly the last 10-11s of travel
+        self.assertGreater(x_range[0], 0.1 * 4 * 10 - 0.5)
+        self.assertLess(x_range[0], 0.1 * 4 * 11 + 0.5)
+        # B is stationary apart from jitter
+        self.assertLess(y_range[1], 0.02)
+        self.assertGreaterEqual(duration[1], 10.0)
+        self.assertLessEqual(samples[1], 11 * 4)
+
+    def test_ttl_eviction(self):
+        history = TrajectoryHistory(window=10.0, ttl=5.0)
+        history.update(['A', 'B'], np.zeros((2, 2)), 0.0)
+        history.update(['B'], np.zeros((1, 2)), 6.5)
+        self.assertNotIn('A', history)
+        self.assertIn('B', history)
+
+    def test_hard_cap_evicts_least_recent(self):
+        history = TrajectoryHistory(max_tracks=4, initial_capacity=2, ttl=1000.0)
+        history.update(['A', 'B'], np.zeros((2, 2)), 0.0)
+        history.update(['C', 'D'], np.zeros((2, 2)), 0.1)
+        self.assertEqual(history.capacity, 4)
+
+        _, _, _, samples = history.update(['E', 'F'], np.zeros((2, 2)), 0.2)
+        self.assertEqual(len(history), 4)
+        self.assertNotIn('A', history)
+        self.assertNotIn('B', history)
+        self.assertEqual(samples.tolist(), [1, 1])
+        self.assertEqual(history.evictions, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
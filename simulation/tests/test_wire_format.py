@@ -0,0 +1,68 @@
+import unittest
+from src.core.entity_store import EntityStore
+from src.core.wire_format import BinaryEntityDecoder, BinaryEntityEncoder, HEADER
+
+
+class TestWireFormat(unittest.TestCase):
+    def setUp(self):
+        self.store = EntityStore()
+        for i in range(4):
+            self.store.append({
+                'id': f'P{i}', 'type': 'PERSON', 'role': 'PLAYER', 'team': 'HOME',
+                'position': {'x': i * 1.5, 'y': -2.25, 'z': 0.0},
+                'velocity': {'x': 1.0, 'y': 0.0, 'z': 0.0},
+                'radius': 0.3, 'color': (255, 0, 0)
+            })
+        self.encoder = BinaryEntityEncoder(keyframe_interval=3)
+        self.decoder = BinaryEntityDecoder()
+
+    def _send(self, frame):
+        snapshot = self.store.snapshot()
+        if self.encoder.needs_schema(snapshot):
+            self.decoder.apply_schema(self.encoder.build_schema(snapshot))
+        return self.decoder.decode(self.encoder.encode(snapshot, {'frame': frame, 'fps': 30.0}, 0.0))
+
+    def test_keyframe_round_trip(self):
+        update = self._send(1)
+        self.assertTrue(update['keyframe'])
+        self.assertEqual(update['stats']['frame'], 1)
+        self.assertEqual([e['id'] for e in update['entities']], ['P0', 'P1', 'P2', 'P3'])
+        self.assertEqual(update['entities'][2]['role'], 'PLAYER')
+        self.assertAlmostEqual(update['entities'][2]['position']['x'], 3.0, places=2)
+        self.assertAlmostEqual(update['entities'][2]['position']['y'], -2.25, places=2)
+
+    def test_deltas_carry_only_changed_entities(self):
+        self._send(1)
+        self.store.positions[1, 0] += 0.5
+        update = self._send(2)
+        self.assertFalse(update['keyframe'])
+        self.assertEqual(update['changed'], 1)
+        self.assertAlmostEqual(update['entities'][1]['position']['x'], 2.0, places=2)
+
+        # Sub-threshold jitter is not sent
+        self.store.positions[:, 1] += 0.001
+        self.assertEqual(self._send(3)['changed'], 0)
+
+        # Periodic keyframe resends everything
+        update = self._send(4)
+        self.assertTrue(update['keyframe'])
+        self.assertEqual(update['changed'], 4)
+
+    def test_schema_change_triggers_handshake(self):
+        self._send(1)
+        schema_id = self.encoder.schema_id
+        self.store.append({'id': 'BALL', 'type': 'OBJECT'})
+        update = self._send(2)
+        self.assertEqual(self.encoder.schema_id, schema_id + 1)
+        self.assertTrue(update['keyframe'])
+        self.assertEqual(len(update['entities']), 5)
+
+    def test_delta_frame_is_compact(self):
+        self._send(1)
+        snapshot = self.store.snapshot()
+        body = self.encoder.encode(snapshot, {}, 0.0)
+        self.assertEqual(len(body), HEADER.size)
+
+
+if __name__ == '__main__':
+    unittest.main()
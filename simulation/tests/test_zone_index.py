@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+from src.core.scenario_manager import Zone
+from src.core.zone_index import ZoneIndex
+
+
+class TestZoneIndex(unittest.TestCase):
+    def setUp(self):
+        self.zones = [
+            Zone('COURT', (0, 0, 28.65, 15.24), 436.6, 'FIELD'),
+            Zone('PAINT', (0, 5.18, 5.8, 10.06), 28.3, 'RESTRICTED'),
+            Zone('TRIANGLE', None, None, 'RESTRICTED', polygon=[(10, 2), (20, 2), (15, 12)]),
+        ]
+        self.index = ZoneIndex(self.zones, cell_size=0.5)
+
+    def _brute_force(self, points):
+        pairs = []
+        for row, (x, y) in enumerate(points):
+            for zone_id, zone in enumerate(self.zones):
+                if zone.polygon is None:
+                    x0, y0, x1, y1 = zone.bounds
+                    inside = x0 <= x <= x1 and y0 <= y <= y1
+                else:
+                    # Barycentric test for the triangle
+                    (ax, ay), (bx, by), (cx, cy) = zone.polygon
+                    d = (by - cy) * (ax - cx) + (cx - bx) * (ay - cy)
+                    l1 = ((by - cy) * (x - cx) + (cx - bx) * (y - cy)) / d
+                    l2 = ((cy - ay) * (x - cx) + (ax - cx) * (y - cy)) / d
+                    inside = l1 >= 0 and l2 >= 0 and l1 + l2 <= 1
+                if inside:
+                    pairs.append((row, zone_id))
+        return pairs
+
+    def test_matches_exact_membership(self):
+        rng = np.random.default_rng(7)
+        points = rng.uniform(-5, 35, size=(5000, 2))
+        # Points exactly on rectangle edges and corners are inside
+        points[:4] = [(0, 0), (28.65, 15.24), (5.8, 7.0), (5.81, 7.0)]
+
+        membership = self.index.lookup(points)
+        got = list(zip(membership.rows.tolist(), membership.zone_ids.tolist()))
+        self.assertEqual(got, self._brute_force(points))
+
+    def test_counts_and_rows(self):
+        points = np.array([[1.0, 7.0], [14.0, 7.0], [15.0, 5.0], [-10.0, -10.0]])
+        membership = self.index.lookup(points)
+        self.assertEqual(membership.counts.tolist(), [3, 1, 2])
+        self.assertEqual(membership.rows_in(2).tolist(), [1, 2])
+
+    def test_polygon_zone_area(self):
+        self.assertAlmostEqual(self.zones[2].area, 50.0)
+        self.assertEqual(self.zones[2].bounds, (10.0, 2.0, 20.0, 12.0))
+
+
+if __name__ == '__main__':
+    unittest.main()